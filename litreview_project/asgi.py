@@ -13,5 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE',
                       'litreview_project.settings')
+# Sous ASGI, le flux, les posts et les abonnements utilisent les vues
+# asynchrones (voir reviews/async_views.py)
+os.environ.setdefault('LITREVIEW_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
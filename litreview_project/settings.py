@@ -53,6 +53,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'reviews.middleware.QueryBudgetMiddleware',
+    # En dernier : sous ASGI, dans la boucle d'événements des vues
+    # asynchrones (voir reviews/middleware.py)
+    'reviews.middleware.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'litreview_project.urls'
@@ -78,14 +82,69 @@ WSGI_APPLICATION = 'litreview_project.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# Réglages SQLite appliqués à chaque connexion :
+# - journal WAL : les lectures ne sont plus bloquées par les écritures ;
+# - synchronous NORMAL : sûr en WAL, sans fsync à chaque transaction ;
+# - busy_timeout : attente (ms) d'un verrou avant « database is locked » ;
+# - cache_size (en Kio si négatif) et mmap_size (octets) : cache de pages ;
+# - temp_store : tables temporaires (tris, GROUP BY) en mémoire.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'cache_size': -20000,
+    'mmap_size': 134217728,
+    'temp_store': 'MEMORY',
+}
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            'init_command': ';'.join(
+                f'PRAGMA {name}={value}'
+                for name, value in SQLITE_PRAGMAS.items()),
+            # Les transactions prennent le verrou d'écriture dès BEGIN :
+            # busy_timeout s'applique au lieu d'un échec immédiat
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # Connexions persistantes (secondes, 0 : une par requête), avec
+        # vérification avant réutilisation. Désactivées par défaut sous
+        # ASGI, où chaque requête peut s'exécuter dans un autre thread.
+        'CONN_MAX_AGE': int(os.environ.get(
+            'LITREVIEW_CONN_MAX_AGE',
+            '0' if os.environ.get('LITREVIEW_ASYNC_VIEWS') == '1' else '60')),
+        'CONN_HEALTH_CHECKS': os.environ.get(
+            'LITREVIEW_CONN_HEALTH_CHECKS', '1') == '1',
     }
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# LITREVIEW_CACHE=locmem (par défaut, propre à chaque processus)
+# ou LITREVIEW_CACHE=file (partagé entre les processus d'une machine)
+
+CACHE_BACKENDS = {
+    'locmem': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'litreview',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'LITREVIEW_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {'MAX_ENTRIES': 100000},
+    },
+}
+
+CACHES = {
+    'default': CACHE_BACKENDS[os.environ.get('LITREVIEW_CACHE', 'locmem')],
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -118,11 +177,54 @@ TIME_ZONE = 'UTC'
 # Configurration des médias (pour les images)
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Largeurs (px) des miniatures des images de tickets : affichage en 200px,
+# 400px pour les écrans haute densité
+TICKET_THUMBNAIL_WIDTHS = (200, 400)
+# Traitement des images en tâche de fond (`python manage.py run_workers`) ;
+# False : traitement immédiat, pendant la requête
+IMAGE_JOBS_ASYNC = True
+IMAGE_JOB_MAX_ATTEMPTS = 3
 
 USE_I18N = True
 
 USE_TZ = True
 
+# Stockage des sessions (LITREVIEW_SESSION_MODE) :
+# - 'db' : lues et écrites en base à chaque requête authentifiée ;
+# - 'cached_db' (par défaut) : lues depuis le cache, écrites en base et
+#   dans le cache ; la base n'est lue qu'en cas d'absence du cache ;
+# - 'signed_cookies' : dans un cookie signé (lisible par le navigateur),
+#   sans base ; une session volée reste valable jusqu'à son expiration,
+#   même après déconnexion.
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_ENGINE = SESSION_ENGINES[
+    os.environ.get('LITREVIEW_SESSION_MODE', 'cached_db')]
+# Suppression des sessions expirées par `run_workers` (secondes entre
+# deux passages, 0 : jamais)
+SESSION_CLEANUP_INTERVAL = 3600
+
+# Messages dans un cookie, jamais dans la session
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Limitation des tentatives de connexion (voir reviews/throttle.py), dans
+# le cache : (capacité, tentatives regagnées par minute) par adresse IP et
+# par nom d'utilisateur. Un dictionnaire vide désactive la limitation.
+LOGIN_THROTTLE_RATES = {
+    'ip': (20, 10),
+    'username': (5, 1),
+}
+
+# Adresse IP du client derrière des mandataires inverses (proxy) : en-tête
+# complété par chaque mandataire (par exemple X-Forwarded-For) et nombre
+# de mandataires de confiance devant l'application. Sans en-tête,
+# REMOTE_ADDR. Les adresses plus à gauche que ces mandataires sont
+# fournies par le client et ignorées.
+CLIENT_IP_HEADER = os.environ.get('LITREVIEW_CLIENT_IP_HEADER') or None
+TRUSTED_PROXY_COUNT = int(os.environ.get('LITREVIEW_TRUSTED_PROXY_COUNT', '1'))
 MESSAGE_TAGS = {
     messages.DEBUG: 'debug',
     messages.INFO: 'info',
@@ -148,3 +250,79 @@ AUTH_USER_MODEL = 'reviews.User'
 LOGIN_URL = 'home'
 LOGIN_REDIRECT_URL = 'feed'
 LOGOUT_REDIRECT_URL = 'login'
+
+# Nombre de posts affichés par page du flux
+FEED_PAGE_SIZE = 20
+
+# Mode de construction du flux :
+# - 'pull' : calculé à chaque lecture ;
+# - 'push' : matérialisé dans FeedEntry à l'écriture
+#   (lancer `python manage.py rebuild_feed` après être passé en 'push').
+FEED_MODE = 'pull'
+
+# Vues asynchrones (ORM asynchrone) pour le flux, les posts et les
+# abonnements : activées par LITREVIEW_ASYNC_VIEWS=1, ce que fait asgi.py
+ASYNC_VIEWS = os.environ.get('LITREVIEW_ASYNC_VIEWS') == '1'
+
+# Comptage des requêtes SQL par requête HTTP (en-tête Server-Timing) et
+# alerte dans les logs au-delà du budget de la vue (par nom d'URL).
+# Les budgets sont vérifiés pour chaque route par les tests, dans les deux
+# modes du flux ('push' coûte plus cher à l'écriture) et avec une image
+# envoyée pour les tickets.
+QUERY_INSTRUMENTATION = DEBUG
+QUERY_BUDGETS = {
+    'home': 2,
+    'signup': 6,
+    'login': 9,
+    'logout': 4,
+    'feed': 7,
+    'feed_posts': 7,
+    'search': 5,
+    'search_api': 5,
+    'user_autocomplete': 3,
+    'create_ticket': 9,
+    'edit_ticket': 12,
+    'delete_ticket': 8,
+    'create_ticket_review': 12,
+    'create_review': 9,
+    'edit_review': 7,
+    'delete_review': 7,
+    'posts': 5,
+    'subscriptions': 6,
+    'unfollow_user': 6,
+    'bulk_follow': 9,
+}
+
+# Profilage (cProfile) d'une fraction des requêtes, ou de celles qui
+# portent dans l'en-tête PROFILING_HEADER un jeton signé obtenu avec
+# `python manage.py profile_report --token`. Les profils sont enregistrés
+# par vue dans PROFILING_DIR (les PROFILING_MAX_FILES plus récents) et
+# résumés par `python manage.py profile_report`.
+PROFILING_ENABLED = os.environ.get('LITREVIEW_PROFILING') == '1'
+PROFILING_SAMPLE_RATE = float(
+    os.environ.get('LITREVIEW_PROFILING_SAMPLE_RATE', '0.01'))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_TOKEN_MAX_AGE = 3600
+PROFILING_DIR = os.environ.get(
+    'LITREVIEW_PROFILING_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILING_MAX_FILES = 200
+
+# Suggestions d'abonnements (calculées par `compute_suggestions`) :
+# nombre par utilisateur, et poids d'un ticket critiqué en commun
+# relativement à un abonnement en commun
+FOLLOW_SUGGESTIONS_COUNT = 10
+FOLLOW_SUGGESTIONS_CO_REVIEW_WEIGHT = 0.5
+
+# Nombre de résultats par page de recherche
+SEARCH_PAGE_SIZE = 20
+
+# Nombre maximal de noms par appel de l'API d'abonnements en masse
+BULK_FOLLOW_MAX_USERNAMES = 1000
+
+# Nombre maximal de noms proposés par l'autocomplétion du formulaire
+# d'abonnement
+USER_AUTOCOMPLETE_LIMIT = 10
+
+# Cache des pages du flux (invalidé à chaque changement visible)
+FEED_CACHE_ENABLED = True
+FEED_CACHE_TIMEOUT = 300
@@ -3,7 +3,10 @@ from django.urls import path
 from django.conf import settings
 from django.conf.urls.static import static
 
-from reviews import views
+from reviews import async_views, views
+
+# Sous ASGI, les vues les plus consultées utilisent l'ORM asynchrone
+feed_views = async_views if settings.ASYNC_VIEWS else views
 
 
 urlpatterns = [
@@ -16,7 +19,14 @@ urlpatterns = [
     path('logout/', views.logout_view, name='logout'),
 
     # Flux
-    path('feed/', views.feed_view, name='feed'),
+    path('feed/', feed_views.feed_view, name='feed'),
+    path('feed/posts/', feed_views.feed_posts_view, name='feed_posts'),
+
+    # Recherche
+    path('search/', views.search_view, name='search'),
+    path('api/search/', views.search_api_view, name='search_api'),
+    path('api/users/', views.user_autocomplete_view,
+         name='user_autocomplete'),
 
     # Tickets
     path('ticket/create/', views.create_ticket_view, name='create_ticket'),
@@ -54,8 +64,10 @@ urlpatterns = [
     ),
 
     # Posts et abonnements
-    path('posts/', views.posts_view, name='posts'),
-    path('subscriptions/', views.subscriptions_view, name='subscriptions'),
+    path('posts/', feed_views.posts_view, name='posts'),
+    path('subscriptions/', feed_views.subscriptions_view,
+         name='subscriptions'),
+    path('api/follows/', views.bulk_follow_view, name='bulk_follow'),
     path(
         'unfollow/<int:user_id>/',
         views.unfollow_user_view,
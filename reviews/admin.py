@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Ticket, Review, UserFollows
+from .models import (User, Ticket, Review, UserFollows, ImageJob,
+                     FollowSuggestion)
 
 
 @admin.register(User)
@@ -69,3 +70,20 @@ class UserFollowsAdmin(admin.ModelAdmin):
     def has_change_permission(self, request, obj=None):
         """Empêche la modification depuis l'admin"""
         return False
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    """Suivi de la file des traitements d'images"""
+    list_display = ('ticket', 'status', 'attempts', 'time_updated')
+    list_filter = ('status',)
+    readonly_fields = ('ticket', 'attempts', 'error',
+                       'time_created', 'time_updated')
+
+
+@admin.register(FollowSuggestion)
+class FollowSuggestionAdmin(admin.ModelAdmin):
+    """Consultation des suggestions calculées par compute_suggestions"""
+    list_display = ('user', 'suggested_user', 'score')
+    search_fields = ('user__username',)
+    readonly_fields = ('user', 'suggested_user', 'score')
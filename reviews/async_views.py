@@ -0,0 +1,128 @@
+"""
+Versions asynchrones des vues les plus consultées (flux, posts,
+abonnements), utilisées sous ASGI (réglage ASYNC_VIEWS).
+
+Les lectures passent par l'ORM asynchrone : un worker ASGI sert de
+nombreuses lectures concurrentes sans mobiliser un thread par requête.
+L'utilisateur est chargé au début de chaque vue (`request.auser()`),
+pour qu'aucun accès à la base ne soit fait pendant le rendu.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest
+from django.shortcuts import redirect, render
+
+from .conditional import conditional_page
+from .feed import aget_feed_page, InvalidCursor
+from .forms import FollowUserForm
+from .loaders import aload_user_posts
+from .models import UserFollows
+from .suggestions import get_suggestions
+
+
+async def _load_user(request):
+    request.user = await request.auser()
+    return request.user
+
+
+@login_required
+@conditional_page
+async def feed_view(request):
+    """Vue pour afficher le flux de l'utilisateur, page par page."""
+    user = await _load_user(request)
+    try:
+        page = await aget_feed_page(user, request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Curseur de pagination invalide.")
+
+    return render(request, 'reviews/feed.html', context={
+        'posts': page.posts,
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+@conditional_page
+async def feed_posts_view(request):
+    """
+    Fragment HTML des publications d'une page du flux, pour le défilement
+    infini (voir views.feed_posts_view).
+    """
+    user = await _load_user(request)
+    try:
+        page = await aget_feed_page(user, request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Curseur de pagination invalide.")
+
+    response = render(request, 'reviews/feed_posts.html', context={
+        'posts': page.posts,
+    })
+    if page.next_cursor:
+        response['X-Next-Cursor'] = page.next_cursor
+    return response
+
+
+@login_required
+@conditional_page
+async def posts_view(request):
+    """
+    Vue pour afficher les tickets de l'utilisateur
+    + leurs critiques séparées.
+    """
+    user = await _load_user(request)
+    data = await aload_user_posts(user)
+
+    return render(request, 'reviews/posts.html', {'data': data})
+
+
+@login_required
+@conditional_page
+async def subscriptions_view(request):
+    """
+    Vue pour gérer les abonnements.
+    """
+    user = await _load_user(request)
+
+    # Traiter le formulaire de suivi
+    if request.method == 'POST':
+        form = FollowUserForm(request.POST, current_user=user)
+        # La validation du formulaire interroge la base (ORM synchrone)
+        if await sync_to_async(form.is_valid)():
+            user_to_follow = form.user_to_follow
+            await UserFollows.objects.acreate(user=user,
+                                              followed_user=user_to_follow)
+            messages.success(
+                request,
+                f"Vous suivez maintenant {user_to_follow.username}.")
+            return redirect('subscriptions')
+    else:
+        form = FollowUserForm(current_user=user)
+
+    # Récupérer les abonnements
+    following = [
+        follow async for follow in UserFollows.objects.filter(
+            user=user).select_related('followed_user')
+    ]
+
+    # Récupérer les abonnés (utilisateurs qui me suivent)
+    followers = [
+        follow async for follow in UserFollows.objects.filter(
+            followed_user=user).select_related('user')
+    ]
+
+    # Suggestions précalculées par `compute_suggestions`
+    suggestions = [
+        suggestion async for suggestion in get_suggestions(user)[
+            :settings.FOLLOW_SUGGESTIONS_COUNT]
+    ]
+
+    context = {
+        'form': form,
+        'following': following,
+        'followers': followers,
+        'suggestions': suggestions,
+    }
+
+    return render(request, 'reviews/subscriptions.html', context)
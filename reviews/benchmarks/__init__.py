@@ -0,0 +1,20 @@
+"""
+Benchmarks exécutés par la commande `benchmark <nom>`.
+
+Chaque module enregistré dans BENCHMARKS expose `add_arguments(parser)`
+et `run(stdout, **options)`. Les benchmarks travaillent sur une base de
+test temporaire (voir utils.benchmark_database), jamais sur la base de
+l'application.
+"""
+from . import (async_views, autocomplete, login, search, sessions, sqlite,
+               views)
+
+BENCHMARKS = {
+    'search': search,
+    'async': async_views,
+    'views': views,
+    'sqlite': sqlite,
+    'autocomplete': autocomplete,
+    'sessions': sessions,
+    'login': login,
+}
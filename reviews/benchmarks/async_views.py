@@ -0,0 +1,156 @@
+"""
+Débit des vues synchrones (WSGI) et asynchrones (ASGI) du flux.
+
+Les deux modes sont mesurés en processus, avec le client de test :
+- sync : un `Client` par client simulé, chacun dans son thread ;
+- async : un `AsyncClient` par client simulé, dans une seule boucle
+  asyncio.
+"""
+import asyncio
+import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connections, transaction
+from django.test import AsyncClient, Client, override_settings
+from django.urls import clear_url_caches
+
+from ..models import Ticket, Review, UserFollows
+from .utils import benchmark_database, summarize
+
+User = get_user_model()
+
+
+@contextmanager
+def views_mode(async_views):
+    """Recharge la configuration des URL avec les vues du mode donné."""
+    urls = importlib.import_module(settings.ROOT_URLCONF)
+
+    def reload():
+        importlib.reload(urls)
+        clear_url_caches()
+
+    try:
+        with override_settings(ASYNC_VIEWS=async_views):
+            reload()
+            yield
+    finally:
+        reload()
+
+
+def build_data(users, posts_per_user):
+    """Crée des utilisateurs qui se suivent tous et leurs posts."""
+    with transaction.atomic():
+        authors = User.objects.bulk_create(
+            User(username=f'user{i}') for i in range(users))
+        UserFollows.objects.bulk_create(
+            UserFollows(user=follower, followed_user=followed)
+            for follower in authors for followed in authors
+            if follower != followed)
+        tickets = Ticket.objects.bulk_create(
+            Ticket(user=author, title=f"Livre {i}")
+            for author in authors for i in range(posts_per_user))
+        Review.objects.bulk_create(
+            Review(ticket=ticket, user=authors[i % len(authors)], rating=4,
+                   headline="Avis")
+            for i, ticket in enumerate(tickets))
+    return authors
+
+
+def _session_cookie(user):
+    client = Client()
+    client.force_login(user)
+    return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+
+def run_sync(url, cookies, requests):
+    def client_loop(cookie):
+        client = Client()
+        client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+        durations = []
+        try:
+            for _ in range(requests):
+                start = time.perf_counter()
+                response = client.get(url)
+                durations.append((time.perf_counter() - start) * 1000)
+                assert response.status_code == 200, response.status_code
+        finally:
+            connections.close_all()
+        return durations
+
+    with ThreadPoolExecutor(max_workers=len(cookies)) as pool:
+        return [
+            duration for durations in pool.map(client_loop, cookies)
+            for duration in durations]
+
+
+def run_async(url, cookies, requests):
+    async def client_loop(cookie):
+        client = AsyncClient()
+        client.cookies[settings.SESSION_COOKIE_NAME] = cookie
+        durations = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = await client.get(url)
+            durations.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, response.status_code
+        return durations
+
+    async def main():
+        results = await asyncio.gather(
+            *(client_loop(cookie) for cookie in cookies))
+        return [duration for durations in results for duration in durations]
+
+    return asyncio.run(main())
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--clients', type=int, default=200,
+        help="Nombre de clients concurrents (défaut : 200)."
+    )
+    parser.add_argument(
+        '--requests', type=int, default=5,
+        help="Requêtes par client (défaut : 5)."
+    )
+    parser.add_argument(
+        '--users', type=int, default=50,
+        help="Nombre d'utilisateurs du jeu de données (défaut : 50)."
+    )
+    parser.add_argument(
+        '--posts-per-user', type=int, default=20,
+        help="Tickets par utilisateur (défaut : 20)."
+    )
+    parser.add_argument(
+        '--url', default='/feed/',
+        help="Page mesurée (défaut : /feed/)."
+    )
+    parser.add_argument(
+        '--cache', action='store_true',
+        help="Laisse le cache du flux actif (désactivé par défaut)."
+    )
+
+
+def run(stdout, clients, requests, users, posts_per_user, url, cache,
+        **options):
+    with benchmark_database(), override_settings(FEED_CACHE_ENABLED=cache):
+        authors = build_data(users, posts_per_user)
+        cookies = [
+            _session_cookie(authors[i % len(authors)])
+            for i in range(clients)]
+        stdout.write(
+            f"{clients} clients x {requests} requêtes sur {url}")
+        stdout.write(
+            f"{'mode':<8}{'req/s':>10}{'p50':>12}{'p95':>12}")
+        for mode, runner in (('sync', run_sync), ('async', run_async)):
+            with views_mode(mode == 'async'):
+                start = time.perf_counter()
+                durations = runner(url, cookies, requests)
+                elapsed = time.perf_counter() - start
+            stats = summarize(durations)
+            stdout.write(
+                f"{mode:<8}{len(durations) / elapsed:>10.1f}"
+                f"{stats['p50']:>10.1f}ms{stats['p95']:>10.1f}ms")
@@ -0,0 +1,82 @@
+"""
+Latence de l'autocomplétion des noms d'utilisateurs : intervalle sur
+l'index Lower(username) contre `istartswith` (LIKE, parcours complet).
+"""
+import random
+import string
+import time
+
+from ..bulk import bulk_insert
+from ..models import User
+from ..search import autocomplete_usernames
+from .utils import benchmark_database, summarize, time_calls
+
+# Préfixes de sélectivités variées, en casse mélangée
+PREFIXES = ('a', 'Ma', 'jea', 'Lu', 'xq', 'zzzz')
+
+NAMES = ('jean', 'marie', 'lucas', 'emma', 'louis', 'alice', 'hugo',
+         'chloe', 'paul', 'lea', 'martin', 'sophie', 'arthur', 'manon')
+
+
+def build_users(count, batch_size, stdout, seed=0):
+    """Crée `count` utilisateurs aux noms réalistes (préfixes communs)."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+
+    def users():
+        for i in range(count):
+            name = rng.choice(NAMES)
+            if rng.random() < 0.5:
+                name = name.capitalize()
+            suffix = ''.join(rng.choices(string.ascii_lowercase, k=3))
+            yield User(username=f'{name}_{suffix}{i}', password='!')
+
+    bulk_insert(User, users(), batch_size)
+    stdout.write(
+        f"{count} utilisateurs créés en {time.perf_counter() - start:.1f} s.")
+
+
+def _istartswith(prefix, limit):
+    return list(User.objects.filter(
+        username__istartswith=prefix, is_active=True
+    ).order_by('username').values_list('username', flat=True)[:limit])
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--users', type=int, default=1_000_000,
+        help="Nombre d'utilisateurs (défaut : 1 000 000)."
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=10_000,
+        help="Taille des lots d'insertion (défaut : 10 000)."
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=50,
+        help="Exécutions de chaque recherche indexée (défaut : 50)."
+    )
+    parser.add_argument(
+        '--scan-repeat', type=int, default=5,
+        help="Exécutions de chaque recherche istartswith (défaut : 5)."
+    )
+    parser.add_argument(
+        '--limit', type=int, default=10,
+        help="Nombre maximal de noms retournés (défaut : 10)."
+    )
+
+
+def run(stdout, users, batch_size, repeat, scan_repeat, limit, **options):
+    with benchmark_database():
+        build_users(users, batch_size, stdout)
+        stdout.write(
+            f"{'préfixe':<10}{'index p50':>12}{'index p95':>12}"
+            f"{'scan p50':>12}{'scan p95':>12}")
+        for prefix in PREFIXES:
+            indexed = summarize(time_calls(
+                lambda: autocomplete_usernames(prefix, limit=limit), repeat))
+            scan = summarize(time_calls(
+                lambda: _istartswith(prefix, limit), scan_repeat))
+            stdout.write(
+                f"{prefix:<10}{indexed['p50']:>10.2f}ms"
+                f"{indexed['p95']:>10.2f}ms"
+                f"{scan['p50']:>10.2f}ms{scan['p95']:>10.2f}ms")
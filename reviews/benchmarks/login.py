@@ -0,0 +1,116 @@
+"""
+Coût CPU d'une attaque par force brute sur la connexion, sans puis avec
+la limitation des tentatives (LOGIN_THROTTLE_RATES).
+
+Des attaquants concurrents envoient des mots de passe faux à un débit
+total fixé pendant une durée fixe, soit depuis une seule adresse IP sur
+des noms variés (`ip`), soit depuis des adresses variées sur un seul
+nom (`username`). La commande indique les tentatives traitées par
+seconde, celles qui ont atteint authenticate() (donc le hachage du mot
+de passe) et le temps CPU consommé par seconde (en cœurs) : sans
+limitation, il croît avec le débit de l'attaque jusqu'à saturer les
+processeurs. Des attaquants variant à la fois d'adresse et de nom ne
+sont pas limités par ces seaux.
+"""
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from .utils import benchmark_database
+
+SCENARIOS = ('ip', 'username')
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--attackers', type=int, default=4,
+        help="Nombre d'attaquants concurrents (défaut : 4)."
+    )
+    parser.add_argument(
+        '--rate', type=float, default=20,
+        help="Tentatives envoyées par seconde, au total (défaut : 20)."
+    )
+    parser.add_argument(
+        '--duration', type=float, default=30,
+        help="Durée de chaque mesure en secondes (défaut : 30)."
+    )
+
+
+def _credentials(scenario, attacker, attempt):
+    """(adresse IP, nom) d'une tentative."""
+    if scenario == 'ip':
+        return '10.0.0.1', f'victim{attacker}_{attempt}'
+    return f'10.{attacker}.{attempt // 256 % 256}.{attempt % 256}', 'victim'
+
+
+def attack(scenario, attackers, rate, duration):
+    """
+    Retourne (tentatives, tentatives hachées, secondes, secondes CPU)
+    d'une attaque de `duration` secondes au débit `rate`.
+    """
+    url = reverse('login')
+    start = time.perf_counter()
+    deadline = start + duration
+    interval = attackers / rate
+
+    def attacker_loop(attacker):
+        attempts = hashed = 0
+        try:
+            for attempt in count():
+                # Envoi planifié ; un attaquant en retard n'attend pas
+                scheduled = start + (attempt + attacker / attackers) * \
+                    interval
+                if max(scheduled, time.perf_counter()) >= deadline:
+                    break
+                time.sleep(max(0, scheduled - time.perf_counter()))
+                ip, username = _credentials(scenario, attacker, attempt)
+                response = Client(REMOTE_ADDR=ip).post(
+                    url, {'username': username, 'password': 'motdepasse'})
+                attempts += 1
+                hashed += response.status_code != 429
+        finally:
+            connections.close_all()
+        return attempts, hashed
+
+    cpu_start = time.process_time()
+    with ThreadPoolExecutor(max_workers=attackers) as pool:
+        results = list(pool.map(attacker_loop, range(attackers)))
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+    attempts, hashed = (sum(column) for column in zip(*results))
+    return attempts, hashed, elapsed, cpu
+
+
+def run(stdout, attackers, rate, duration, **options):
+    # Sans un avertissement « Too Many Requests » par tentative refusée
+    request_logger = logging.getLogger('django.request')
+    level = request_logger.level
+    request_logger.setLevel(logging.ERROR)
+    try:
+        _run(stdout, attackers, rate, duration)
+    finally:
+        request_logger.setLevel(level)
+
+
+def _run(stdout, attackers, rate, duration):
+    with benchmark_database():
+        stdout.write(
+            f"{'attaque':<10}{'limitation':<12}{'tentatives/s':>14}"
+            f"{'hachées/s':>11}{'CPU (cœurs)':>13}")
+        for scenario in SCENARIOS:
+            for label, rates in (('non', {}),
+                                 ('oui', settings.LOGIN_THROTTLE_RATES)):
+                cache.clear()
+                with override_settings(LOGIN_THROTTLE_RATES=rates):
+                    attempts, hashed, elapsed, cpu = attack(
+                        scenario, attackers, rate, duration)
+                stdout.write(
+                    f"{scenario:<10}{label:<12}{attempts / elapsed:>14.1f}"
+                    f"{hashed / elapsed:>11.1f}{cpu / elapsed:>13.2f}")
@@ -0,0 +1,110 @@
+"""
+Latence de la recherche : index FTS5 contre parcours `icontains`.
+
+Le corpus (moitié tickets, moitié critiques, une critique par ticket)
+est inséré par lots dans une base temporaire ; les triggers alimentent
+l'index FTS5 au fil des insertions.
+"""
+import random
+import time
+
+from django.db import transaction
+
+from ..models import User, Ticket, Review
+from ..search import _fts_rows, _icontains_rows, search_terms
+from .utils import benchmark_database, summarize, time_calls
+
+SYLLABLES = ('ro', 'man', 'li', 'vre', 'his', 'toi', 're', 'po', 'ème',
+             'ca', 'fé', 'nu', 'it', 'mer', 'ciel', 'ter', 'ville', 'mon',
+             'de', 'jar', 'din', 'é', 'té', 'hi', 'ver', 'lu', 'mi', 'son')
+
+# Requêtes de sélectivités variées (mots fréquents, rares, préfixes)
+QUERIES = ('roman', 'livre histoire', 'mer', 'jardin hiver', 'po',
+           'lumiè', 'zzzz')
+
+
+def _vocabulary(rng, size):
+    words = {'roman', 'livre', 'histoire', 'mer', 'jardin', 'hiver',
+             'poème', 'lumière'}
+    while len(words) < size:
+        words.add(''.join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def _text(rng, vocabulary, count):
+    # Distribution de Zipf approximative : les premiers mots dominent
+    return ' '.join(
+        vocabulary[min(int(rng.paretovariate(1.2)) - 1, len(vocabulary) - 1)]
+        for _ in range(count))
+
+
+def build_corpus(rows, batch_size, stdout, seed=0):
+    """Insère `rows` posts (tickets et critiques) dans la base courante."""
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng, 5000)
+    rng.shuffle(vocabulary)
+    user = User.objects.create_user('benchmark')
+    tickets_count = rows // 2
+    start = time.perf_counter()
+
+    for offset in range(0, tickets_count, batch_size):
+        size = min(batch_size, tickets_count - offset)
+        with transaction.atomic():
+            tickets = Ticket.objects.bulk_create(
+                Ticket(user=user,
+                       title=_text(rng, vocabulary, 4),
+                       description=_text(rng, vocabulary, 30))
+                for _ in range(size))
+            Review.objects.bulk_create(
+                Review(ticket=ticket, user=user, rating=rng.randint(0, 5),
+                       headline=_text(rng, vocabulary, 5),
+                       body=_text(rng, vocabulary, 60))
+                for ticket in tickets[:rows - tickets_count - offset])
+        stdout.write(f"  {min(offset + size, tickets_count) * 2} posts...")
+
+    stdout.write(
+        f"Corpus de {rows} posts créé en "
+        f"{time.perf_counter() - start:.1f} s.")
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--rows', type=int, default=1_000_000,
+        help="Nombre de posts du corpus (défaut : 1 000 000)."
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=10_000,
+        help="Taille des lots d'insertion (défaut : 10 000)."
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=20,
+        help="Nombre d'exécutions de chaque requête FTS5 (défaut : 20)."
+    )
+    parser.add_argument(
+        '--scan-repeat', type=int, default=3,
+        help="Nombre d'exécutions de chaque parcours icontains (défaut : 3)."
+    )
+    parser.add_argument(
+        '--per-page', type=int, default=20,
+        help="Résultats par page (défaut : 20)."
+    )
+
+
+def run(stdout, rows, batch_size, repeat, scan_repeat, per_page,
+        **options):
+    with benchmark_database():
+        build_corpus(rows, batch_size, stdout)
+        stdout.write(
+            f"{'requête':<16}{'FTS5 p50':>12}{'FTS5 p95':>12}"
+            f"{'scan p50':>12}{'scan p95':>12}{'gain':>10}")
+        for query in QUERIES:
+            terms = search_terms(query)
+            fts = summarize(time_calls(
+                lambda: _fts_rows(terms, 0, per_page + 1), repeat))
+            scan = summarize(time_calls(
+                lambda: _icontains_rows(terms, 0, per_page + 1),
+                scan_repeat))
+            stdout.write(
+                f"{query:<16}{fts['p50']:>10.2f}ms{fts['p95']:>10.2f}ms"
+                f"{scan['p50']:>10.2f}ms{scan['p95']:>10.2f}ms"
+                f"{scan['p50'] / max(fts['p50'], 1e-6):>9.0f}x")
@@ -0,0 +1,83 @@
+"""
+Requêtes par requête HTTP selon le stockage des sessions : `db` avec
+les messages dans la session en repli (configuration d'origine), puis
+`cached_db` et `signed_cookies` avec les messages en cookie.
+
+Pour chaque configuration, un utilisateur se connecte puis affiche son
+flux : la commande indique le nombre de requêtes SQL par affichage,
+dont celles sur la table des sessions, et la latence.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .async_views import build_data
+from .utils import benchmark_database, summarize, time_calls
+
+FALLBACK_STORAGE = 'django.contrib.messages.storage.fallback.FallbackStorage'
+COOKIE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# (nom, stockage des sessions, stockage des messages)
+CONFIGURATIONS = (
+    ('db', 'db', FALLBACK_STORAGE),
+    ('cached_db', 'cached_db', COOKIE_STORAGE),
+    ('signed_cookies', 'signed_cookies', COOKIE_STORAGE),
+)
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--users', type=int, default=50,
+        help="Nombre d'utilisateurs (défaut : 50)."
+    )
+    parser.add_argument(
+        '--posts-per-user', type=int, default=10,
+        help="Tickets (et critiques) par utilisateur (défaut : 10)."
+    )
+    parser.add_argument(
+        '--requests', type=int, default=200,
+        help="Affichages du flux par configuration (défaut : 200)."
+    )
+
+
+def _get_feed(client):
+    response = client.get(reverse('feed'))
+    if response.status_code != 200:
+        raise CommandError(
+            f"Réponse {response.status_code} au lieu de 200.")
+
+
+def measure(user, requests):
+    """Requêtes SQL (totales, sessions) d'un affichage du flux, durées."""
+    # Un nouveau client charge les middlewares avec les réglages courants
+    client = Client()
+    client.force_login(user)
+    cache.clear()
+    _get_feed(client)
+    with CaptureQueriesContext(connection) as queries:
+        _get_feed(client)
+    total = len(queries)
+    session_queries = sum(
+        'django_session' in query['sql'] for query in queries)
+    durations = time_calls(lambda: _get_feed(client), requests)
+    return total, session_queries, summarize(durations)
+
+
+def run(stdout, users, posts_per_user, requests, **options):
+    with benchmark_database():
+        viewer = build_data(users, posts_per_user)[0]
+        stdout.write(
+            f"{'sessions':<16}{'requêtes':>10}{'sessions':>10}"
+            f"{'p50':>10}{'p95':>10}")
+        for name, mode, message_storage in CONFIGURATIONS:
+            with override_settings(
+                    SESSION_ENGINE=settings.SESSION_ENGINES[mode],
+                    MESSAGE_STORAGE=message_storage):
+                total, session_queries, timings = measure(viewer, requests)
+            stdout.write(
+                f"{name:<16}{total:>10}{session_queries:>10}"
+                f"{timings['p50']:>8.2f}ms{timings['p95']:>8.2f}ms")
@@ -0,0 +1,129 @@
+"""
+Débit de SQLite en lectures et écritures concurrentes.
+
+Des threads lecteurs chargent des pages du flux pendant que des threads
+écrivains créent des tickets, pendant une durée fixe, avec deux
+configurations de connexion :
+- default : réglages par défaut de SQLite (journal DELETE, synchronous
+  FULL, transactions DEFERRED) ;
+- tuned : réglages de settings.DATABASES (WAL, pragmas, IMMEDIATE).
+"""
+import threading
+import time
+
+from django.db import OperationalError, connection, connections
+from django.test import override_settings
+
+from ..feed import get_feed_page
+from ..models import Ticket
+from .async_views import build_data
+from .utils import benchmark_database, summarize
+
+DEFAULT_OPTIONS = {
+    'init_command': 'PRAGMA journal_mode=DELETE;PRAGMA synchronous=FULL',
+}
+
+
+def run_workload(authors, readers, writers, duration):
+    """
+    Lance les threads pendant `duration` secondes et retourne les durées
+    (ms) des lectures et des écritures, et le nombre d'erreurs de verrou.
+    """
+    results = {'read': [], 'write': [], 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def worker(index, operation):
+        durations = []
+        errors = 0
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    operation(index)
+                except OperationalError:
+                    errors += 1
+                    continue
+                durations.append((time.perf_counter() - start) * 1000)
+        finally:
+            connections.close_all()
+        with lock:
+            results[operation.__name__].extend(durations)
+            results['errors'] += errors
+
+    def read(index):
+        get_feed_page(authors[index % len(authors)])
+
+    def write(index):
+        Ticket.objects.create(
+            user=authors[index % len(authors)], title="Nouveau livre")
+
+    threads = [
+        threading.Thread(target=worker, args=(i, read))
+        for i in range(readers)
+    ] + [
+        threading.Thread(target=worker, args=(i, write))
+        for i in range(writers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--readers', type=int, default=8,
+        help="Threads lecteurs (défaut : 8)."
+    )
+    parser.add_argument(
+        '--writers', type=int, default=2,
+        help="Threads écrivains (défaut : 2)."
+    )
+    parser.add_argument(
+        '--duration', type=float, default=10,
+        help="Durée de chaque mesure en secondes (défaut : 10)."
+    )
+    parser.add_argument(
+        '--users', type=int, default=50,
+        help="Nombre d'utilisateurs du jeu de données (défaut : 50)."
+    )
+    parser.add_argument(
+        '--posts-per-user', type=int, default=20,
+        help="Tickets par utilisateur (défaut : 20)."
+    )
+
+
+def run(stdout, readers, writers, duration, users, posts_per_user,
+        **options):
+    # Les connexions des threads sont créées avec ce même dictionnaire
+    settings_dict = connection.settings_dict
+    tuned_options = settings_dict['OPTIONS']
+    with benchmark_database(), override_settings(FEED_CACHE_ENABLED=False):
+        authors = build_data(users, posts_per_user)
+        connection.close()
+        stdout.write(
+            f"{readers} lecteurs, {writers} écrivains, {duration:g} s "
+            f"par configuration")
+        stdout.write(
+            f"{'config':<9}{'lect./s':>9}{'écr./s':>9}{'p95 lect.':>12}"
+            f"{'p95 écr.':>12}{'verrous':>9}")
+        try:
+            for name, db_options in (('default', DEFAULT_OPTIONS),
+                                     ('tuned', tuned_options)):
+                settings_dict['OPTIONS'] = db_options
+                results = run_workload(authors, readers, writers, duration)
+                row = f"{name:<9}"
+                row += f"{len(results['read']) / duration:>9.1f}"
+                row += f"{len(results['write']) / duration:>9.1f}"
+                for kind in ('read', 'write'):
+                    if results[kind]:
+                        row += f"{summarize(results[kind])['p95']:>10.1f}ms"
+                    else:
+                        row += f"{'-':>12}"
+                row += f"{results['errors']:>9}"
+                stdout.write(row)
+        finally:
+            settings_dict['OPTIONS'] = tuned_options
+            connection.close()
@@ -0,0 +1,62 @@
+"""Outils communs aux benchmarks."""
+import os
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import (setup_test_environment,
+                               teardown_test_environment)
+
+
+@contextmanager
+def benchmark_database():
+    """
+    Crée une base de test SQLite dans un fichier temporaire (migrations
+    comprises), et la supprime à la sortie. L'environnement de test
+    (ALLOWED_HOSTS...) permet d'utiliser le client de test.
+    """
+    setup_test_environment()
+    test_settings = connection.settings_dict.setdefault('TEST', {})
+    old_test_name = test_settings.get('NAME')
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            test_settings['NAME'] = os.path.join(
+                directory, 'benchmark.sqlite3')
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False)
+            try:
+                yield
+            finally:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+    finally:
+        test_settings['NAME'] = old_test_name
+        teardown_test_environment()
+
+
+def time_calls(func, repeat):
+    """Exécute `func` `repeat` fois et retourne les durées en ms."""
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    return durations
+
+
+def percentile(durations, percent):
+    """Percentile (méthode inclusive) d'une liste de durées."""
+    if len(durations) == 1:
+        return durations[0]
+    return statistics.quantiles(
+        durations, n=100, method='inclusive')[percent - 1]
+
+
+def summarize(durations):
+    """Médiane, p95 et maximum d'une liste de durées (ms)."""
+    return {
+        'p50': percentile(durations, 50),
+        'p95': percentile(durations, 95),
+        'max': max(durations),
+    }
@@ -0,0 +1,239 @@
+"""
+Latence, requêtes et mémoire des vues principales, sur des jeux de
+données générés de plusieurs tailles.
+
+Chaque scénario (flux, posts, abonnements, création de critique,
+connexion) est exécuté avec le client de test ; les résultats peuvent
+être enregistrés en JSON et comparés à une référence : la commande
+échoue si une mesure dépasse la référence de plus du seuil donné (ou si
+le nombre de requêtes augmente).
+"""
+import json
+import platform
+import time
+import tracemalloc
+from pathlib import Path
+
+import django
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from ..models import Ticket
+from ..seeding import PASSWORD, Seeder
+from .utils import benchmark_database, summarize
+
+User = get_user_model()
+
+SIZES = {
+    'small': {'users': 100, 'follows_per_user': 10,
+              'tickets': 1000, 'reviews': 1000},
+    'medium': {'users': 1000, 'follows_per_user': 20,
+               'tickets': 20000, 'reviews': 20000},
+    'large': {'users': 10000, 'follows_per_user': 50,
+              'tickets': 200000, 'reviews': 200000},
+}
+
+SCENARIOS = ('feed', 'posts', 'subscriptions', 'create_review', 'login')
+
+# Mesures comparées à la référence
+COMPARED = ('p50', 'p95', 'peak_kb')
+
+PREFIX = 'bench'
+DUMMY_CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'},
+}
+
+
+def _scenarios(viewer, ticket_ids):
+    """
+    Retourne {scénario: (fonction de requête, statut attendu)}. Chaque
+    appel de la création de critique vise un nouveau ticket.
+    """
+    client = Client()
+    client.force_login(viewer)
+    tickets = iter(ticket_ids)
+    return {
+        'feed': (lambda: client.get(reverse('feed')), 200),
+        'posts': (lambda: client.get(reverse('posts')), 200),
+        'subscriptions': (lambda: client.get(reverse('subscriptions')), 200),
+        'create_review': (lambda: client.post(
+            reverse('create_review', args=[next(tickets)]),
+            {'rating': 4, 'headline': "Critique", 'body': "Très bien."}),
+            302),
+        'login': (lambda: Client().post(
+            reverse('login'),
+            {'username': viewer.username, 'password': PASSWORD}), 302),
+    }
+
+
+def _call(request, status):
+    response = request()
+    if response.status_code != status:
+        raise CommandError(
+            f"Réponse {response.status_code} au lieu de {status}.")
+
+
+def measure(request, status, repeat, warmup):
+    """Latences (ms), requêtes SQL et pic mémoire (Ko) d'un scénario."""
+    for _ in range(warmup):
+        _call(request, status)
+
+    durations, queries = [], []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as context:
+            start = time.perf_counter()
+            _call(request, status)
+            durations.append((time.perf_counter() - start) * 1000)
+        queries.append(len(context))
+
+    # Mémoire mesurée à part : tracemalloc ralentit l'exécution
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        _call(request, status)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return {
+        **summarize(durations),
+        'queries': max(queries),
+        'peak_kb': round(peak / 1024, 1),
+    }
+
+
+def run_size(size, repeat, warmup, seed, stdout):
+    """Génère le jeu de données d'une taille et mesure chaque scénario."""
+    Seeder(**SIZES[size], seed=seed, prefix=PREFIX,
+           log=lambda message: None).run()
+    viewer = User.objects.filter(
+        username__startswith=PREFIX).order_by('username').first()
+    ticket_ids = list(Ticket.objects.exclude(user=viewer).exclude(
+        review__user=viewer
+    ).values_list('pk', flat=True)[:repeat + warmup + 1])
+
+    results = {}
+    for scenario, (request, status) in _scenarios(
+            viewer, ticket_ids).items():
+        results[scenario] = measure(request, status, repeat, warmup)
+        stats = results[scenario]
+        stdout.write(
+            f"{size:<8}{scenario:<16}{stats['p50']:>9.1f}ms"
+            f"{stats['p95']:>9.1f}ms{stats['queries']:>9}"
+            f"{stats['peak_kb']:>11.0f}Ko")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Liste des régressions par rapport à la référence."""
+    regressions = []
+    for size, scenarios in results.items():
+        for scenario, stats in scenarios.items():
+            reference = baseline.get(size, {}).get(scenario)
+            if not reference:
+                continue
+            if stats['queries'] > reference['queries']:
+                regressions.append(
+                    f"{size}/{scenario} : {stats['queries']} requêtes "
+                    f"(référence : {reference['queries']})")
+            for metric in COMPARED:
+                limit = reference[metric] * (1 + threshold)
+                if stats[metric] > limit:
+                    regressions.append(
+                        f"{size}/{scenario} : {metric} = "
+                        f"{stats[metric]:.1f} (référence : "
+                        f"{reference[metric]:.1f}, limite : {limit:.1f})")
+    return regressions
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        '--sizes', nargs='+', choices=SIZES, default=['small', 'medium'],
+        help="Tailles de jeux de données (défaut : small medium)."
+    )
+    parser.add_argument(
+        '--repeat', type=int, default=30,
+        help="Mesures par scénario (défaut : 30)."
+    )
+    parser.add_argument(
+        '--warmup', type=int, default=3,
+        help="Requêtes de chauffe non mesurées (défaut : 3)."
+    )
+    parser.add_argument(
+        '--seed', type=int, default=0,
+        help="Graine des jeux de données (défaut : 0)."
+    )
+    parser.add_argument(
+        '--output', type=Path,
+        help="Fichier JSON où écrire les résultats."
+    )
+    parser.add_argument(
+        '--baseline', type=Path,
+        help="Fichier JSON de référence (résultats d'une exécution "
+             "précédente)."
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=0.25,
+        help="Dégradation tolérée par rapport à la référence "
+             "(défaut : 0.25, soit 25 %%)."
+    )
+    parser.add_argument(
+        '--update-baseline', action='store_true',
+        help="Remplace la référence par les résultats de cette exécution."
+    )
+    parser.add_argument(
+        '--cache', action='store_true',
+        help="Garde le cache actif (désactivé par défaut pour mesurer "
+             "le rendu et les requêtes)."
+    )
+
+
+def run(stdout, sizes, repeat, warmup, seed, output, baseline, threshold,
+        update_baseline, cache, **options):
+    if update_baseline and not baseline:
+        raise CommandError("--update-baseline nécessite --baseline.")
+
+    stdout.write(
+        f"{'taille':<8}{'scénario':<16}{'p50':>11}{'p95':>11}"
+        f"{'requêtes':>9}{'mémoire':>13}")
+    results = {}
+    caches = {} if cache else {'CACHES': DUMMY_CACHES}
+    for size in sizes:
+        # Le scénario de connexion se répète au-delà de la limitation
+        with benchmark_database(), override_settings(
+                LOGIN_THROTTLE_RATES={}, **caches):
+            results[size] = run_size(size, repeat, warmup, seed, stdout)
+
+    report = {
+        'meta': {
+            'date': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'repeat': repeat,
+            'seed': seed,
+            'cache': cache,
+        },
+        'results': results,
+    }
+    if output:
+        output.write_text(json.dumps(report, indent=2))
+        stdout.write(f"Résultats écrits dans {output}.")
+
+    if baseline and update_baseline:
+        baseline.write_text(json.dumps(report, indent=2))
+        stdout.write(f"Référence mise à jour : {baseline}.")
+    elif baseline:
+        if not baseline.exists():
+            raise CommandError(f"Référence introuvable : {baseline}.")
+        regressions = compare(
+            results, json.loads(baseline.read_text())['results'], threshold)
+        if regressions:
+            raise CommandError(
+                "Régressions par rapport à la référence :\n"
+                + "\n".join(regressions))
+        stdout.write("Aucune régression par rapport à la référence.")
@@ -0,0 +1,53 @@
+"""
+Outils d'insertion en masse (génération de données, imports).
+
+bulk_create() n'appelle ni save() ni les signaux : les statistiques des
+tickets, le flux matérialisé et le cache du flux ne sont pas tenus à
+jour par ces insertions.
+"""
+from contextlib import contextmanager
+from itertools import islice
+
+from django.db import transaction
+
+
+def bulk_insert(model, objects, batch_size=5000, on_batch=None,
+                **options):
+    """
+    Insère les objets (itérable, éventuellement paresseux) par lots, un
+    lot par transaction, et retourne le nombre d'objets traités.
+    `on_batch(batch)` est appelé après chaque lot (les clés primaires
+    sont alors renseignées) ; `options` est transmis à bulk_create().
+    """
+    objects = iter(objects)
+    count = 0
+    while batch := list(islice(objects, batch_size)):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, **options)
+        if on_batch is not None:
+            on_batch(batch)
+        count += len(batch)
+    return count
+
+
+@contextmanager
+def explicit_timestamps(*models):
+    """
+    Désactive auto_now / auto_now_add sur les champs date des modèles
+    donnés, pour insérer des dates choisies. Modifie les champs au niveau
+    du processus : à n'utiliser que dans une commande, pas dans une vue.
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for model in models
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
@@ -0,0 +1,188 @@
+"""
+Cache du flux.
+
+Les lignes ordonnées de chaque page du flux (voir feed.get_feed_rows)
+sont mises en cache par utilisateur, sous un numéro de version.
+La version d'un utilisateur est incrémentée (voir signals.py) dès qu'un
+post visible dans son flux est créé, modifié ou supprimé, ou que ses
+abonnements changent : les pages de l'ancienne version ne sont alors
+plus jamais lues et expirent d'elles-mêmes.
+
+L'incrément a lieu après la validation de la transaction qui modifie
+les données : avant, un lecteur qui recalculerait la page lirait encore
+l'ancien état et l'enregistrerait sous la nouvelle version.
+
+Ces versions, et celle des noms d'utilisateurs (incrémentée à chaque
+renommage), servent aussi de validateurs aux pages du flux, des posts et
+des abonnements (voir conditional.py).
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = 'feed:version:{user_id}'
+PAGE_KEY = 'feed:page:{user_id}:{version}:{page_size}:{cursor}'
+USERNAMES_VERSION_KEY = 'users:usernames:version'
+HITS_KEY = 'feed:stats:hits'
+MISSES_KEY = 'feed:stats:misses'
+
+
+def _initial_version():
+    # Une version partant de l'horodatage courant évite de relire les
+    # pages d'une ancienne version si la clé de version a été évincée
+    return time.time_ns()
+
+
+def _incr(key):
+    """
+    Incrémente un compteur du cache, en le créant au besoin (sans effet
+    avec un cache qui ne stocke rien, comme DummyCache).
+    """
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+    try:
+        # Créé entre-temps par un autre processus
+        return cache.incr(key)
+    except ValueError:
+        return 0
+
+
+async def _aincr(key):
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        if await cache.aadd(key, 1, timeout=None):
+            return 1
+    try:
+        return await cache.aincr(key)
+    except ValueError:
+        return 0
+
+
+def _get_version(key):
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_version(), timeout=None)
+
+
+def get_feed_version(user_id):
+    """Retourne la version courante du flux d'un utilisateur."""
+    return _get_version(VERSION_KEY.format(user_id=user_id))
+
+
+async def aget_feed_version(user_id):
+    """Version asynchrone de get_feed_version()."""
+    key = VERSION_KEY.format(user_id=user_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, _initial_version(), timeout=None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_feed_versions(user_ids):
+    """Invalide le flux en cache des utilisateurs donnés."""
+    for user_id in set(user_ids):
+        _bump_version(VERSION_KEY.format(user_id=user_id))
+
+
+def bump_feed_versions_on_commit(user_ids):
+    """
+    Invalide le flux en cache des utilisateurs donnés après la
+    validation de la transaction en cours (immédiatement hors
+    transaction).
+    """
+    user_ids = set(user_ids)
+    transaction.on_commit(lambda: bump_feed_versions(user_ids))
+
+
+def get_usernames_version():
+    """Retourne la version courante des noms d'utilisateurs."""
+    return _get_version(USERNAMES_VERSION_KEY)
+
+
+def bump_usernames_version_on_commit():
+    """
+    Signale un renommage après la validation de la transaction en cours :
+    les pages qui affichent des noms ne sont plus valides.
+    """
+    transaction.on_commit(lambda: _bump_version(USERNAMES_VERSION_KEY))
+
+
+def get_cached_feed_rows(user, cursor, page_size, compute_rows):
+    """
+    Retourne les lignes d'une page du flux depuis le cache, ou les
+    calcule avec `compute_rows()` et les met en cache.
+    """
+    if not settings.FEED_CACHE_ENABLED:
+        return compute_rows()
+
+    key = PAGE_KEY.format(
+        user_id=user.id,
+        version=get_feed_version(user.id),
+        page_size=page_size,
+        cursor=cursor or '',
+    )
+    rows = cache.get(key)
+    if rows is None:
+        _incr(MISSES_KEY)
+        rows = compute_rows()
+        cache.set(key, rows, timeout=settings.FEED_CACHE_TIMEOUT)
+    else:
+        _incr(HITS_KEY)
+    return rows
+
+
+async def aget_cached_feed_rows(user, cursor, page_size, compute_rows):
+    """
+    Version asynchrone de get_cached_feed_rows() : `compute_rows()` est
+    une coroutine.
+    """
+    if not settings.FEED_CACHE_ENABLED:
+        return await compute_rows()
+
+    key = PAGE_KEY.format(
+        user_id=user.id,
+        version=await aget_feed_version(user.id),
+        page_size=page_size,
+        cursor=cursor or '',
+    )
+    rows = await cache.aget(key)
+    if rows is None:
+        await _aincr(MISSES_KEY)
+        rows = await compute_rows()
+        await cache.aset(key, rows, timeout=settings.FEED_CACHE_TIMEOUT)
+    else:
+        await _aincr(HITS_KEY)
+    return rows
+
+
+def get_cache_stats():
+    """Compteurs de succès et d'échecs du cache du flux."""
+    hits, misses = (
+        cache.get(HITS_KEY, 0), cache.get(MISSES_KEY, 0))
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def reset_cache_stats():
+    """Remet à zéro les compteurs du cache du flux."""
+    cache.delete_many([HITS_KEY, MISSES_KEY])
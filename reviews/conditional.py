@@ -0,0 +1,91 @@
+"""
+Requêtes conditionnelles (ETag) pour les pages du flux, des posts et
+des abonnements.
+
+Le validateur d'une page est calculé sans lire la base : il combine la
+version du flux de l'utilisateur (voir cache.py), incrémentée après
+chaque modification visible sur ces pages (posts, critiques des tickets
+affichés, miniatures, abonnements, suggestions ; voir signals.py), et la
+version des noms d'utilisateurs, incrémentée à chaque renommage. S'il
+correspond à celui envoyé par le navigateur, la vue n'est pas exécutée
+et la réponse est un 304.
+
+Les pages sont rendues normalement tant que des messages sont en attente
+d'affichage, ou si le cache ne conserve pas les versions. La clé de
+session fait partie du validateur : elle change à la connexion, comme le
+jeton CSRF des formulaires de la page.
+
+Aucun en-tête Last-Modified n'est envoyé : les versions ne sont pas des
+dates, et un navigateur qui n'enverrait que If-Modified-Since recevrait
+un 304 pour une page périmée.
+"""
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from .cache import get_feed_version, get_usernames_version
+
+
+def _has_pending_messages(request):
+    # len() lit les messages sans les marquer comme affichés
+    return bool(len(get_messages(request)))
+
+
+def _etag(request):
+    """Calcule l'ETag de la page, ou None."""
+    if request.method not in ('GET', 'HEAD') or \
+            _has_pending_messages(request):
+        return None
+    versions = (get_feed_version(request.user.pk), get_usernames_version())
+    if None in versions:
+        # Cache sans mémoire (DummyCache) : aucune validation possible
+        return None
+    payload = '|'.join([
+        str(request.user.pk),
+        request.session.session_key or '',
+        *map(str, versions),
+    ])
+    return '"%s"' % hashlib.md5(
+        payload.encode(), usedforsecurity=False).hexdigest()
+
+
+def _finalize(response, etag):
+    if etag is None or response.status_code not in (200, 304):
+        return response
+    response.headers.setdefault('ETag', etag)
+    # Le navigateur (et lui seul) garde la page mais la revalide toujours
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_page(view):
+    """
+    Décorateur de vue (synchrone ou asynchrone) : répond 304 Not
+    Modified sans exécuter la vue si la page n'a pas changé depuis la
+    version détenue par le navigateur.
+    """
+    def pre_process(request):
+        etag = _etag(request)
+        response = None
+        if etag is not None:
+            response = get_conditional_response(request, etag=etag)
+        return response, etag
+
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            response, etag = await sync_to_async(pre_process)(request)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+            return _finalize(response, etag)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response, etag = pre_process(request)
+            if response is None:
+                response = view(request, *args, **kwargs)
+            return _finalize(response, etag)
+    return wrapper
@@ -0,0 +1,318 @@
+"""
+Construction du flux de l'utilisateur, page par page.
+
+Le flux est paginé par curseur (keyset) sur le triplet
+(time_created, type, id) trié par ordre décroissant : seule une page de
+posts est lue en base, quelle que soit la taille de l'historique.
+
+Deux modes sont disponibles (réglage FEED_MODE) :
+- "pull" : le flux est calculé à la lecture depuis UserFollows, Ticket
+  et Review ;
+- "push" : le flux est matérialisé dans FeedEntry, alimentée à
+  l'écriture (voir signals.py) et lue par un simple parcours d'index.
+"""
+import base64
+import binascii
+import json
+from collections import namedtuple
+from datetime import datetime
+from itertools import chain, islice
+
+from django.conf import settings
+from django.db.models import (
+    BooleanField, CharField, Exists, OuterRef, Q, Value
+)
+
+from .cache import aget_cached_feed_rows, get_cached_feed_rows
+from .loaders import (aload_feed_posts, amark_already_reviewed,
+                      load_feed_posts, mark_already_reviewed)
+from .models import Ticket, Review, User, UserFollows, FeedEntry
+
+TICKET = FeedEntry.TICKET
+REVIEW = FeedEntry.REVIEW
+
+PULL = 'pull'
+PUSH = 'push'
+
+FeedPage = namedtuple('FeedPage', ['posts', 'next_cursor'])
+
+
+class InvalidCursor(ValueError):
+    """Curseur de pagination illisible."""
+
+
+def encode_cursor(row):
+    """Encode la position d'un post du flux en un curseur opaque."""
+    payload = json.dumps(
+        [row['time_created'].isoformat(), row['content_type'], row['id']])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Décode un curseur en (time_created, type, id)."""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        payload = base64.urlsafe_b64decode(cursor + padding)
+        time_created, content_type, post_id = json.loads(payload)
+        time_created = datetime.fromisoformat(time_created)
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise InvalidCursor(cursor)
+    if content_type not in (TICKET, REVIEW) or not isinstance(post_id, int):
+        raise InvalidCursor(cursor)
+    return time_created, content_type, post_id
+
+
+def _keyset_filter(content_type, cursor):
+    """
+    Filtre les posts d'un type donné situés après le curseur,
+    dans l'ordre (time_created, type, id) décroissant.
+    """
+    time_created, cursor_type, post_id = cursor
+    condition = Q(time_created__lt=time_created)
+    if content_type < cursor_type:
+        condition |= Q(time_created=time_created)
+    elif content_type == cursor_type:
+        condition |= Q(time_created=time_created, pk__lt=post_id)
+    return condition
+
+
+def _entry_keyset_filter(position):
+    """Filtre les entrées du flux matérialisé situées après le curseur."""
+    time_created, content_type, post_id = position
+    return (
+        Q(time_created__lt=time_created)
+        | Q(time_created=time_created, content_type__lt=content_type)
+        | Q(time_created=time_created, content_type=content_type,
+            post_id__lt=post_id)
+    )
+
+
+def is_push_mode():
+    """Indique si le flux est matérialisé dans FeedEntry."""
+    return settings.FEED_MODE == PUSH
+
+
+def _followed_users(user):
+    return UserFollows.objects.filter(
+        user=user).values_list('followed_user', flat=True)
+
+
+def get_followed_ids(user):
+    """Identifiants des utilisateurs suivis, plus l'utilisateur lui-même."""
+    return [*_followed_users(user), user.id]
+
+
+async def aget_followed_ids(user):
+    """Version asynchrone de get_followed_ids()."""
+    return [
+        followed_id async for followed_id in _followed_users(user)
+    ] + [user.id]
+
+
+def post_audience_ids(post):
+    """
+    Identifiants (requête non évaluée) des utilisateurs dont le flux ou
+    la page des posts affiche le post (ticket ou critique) : son auteur,
+    l'auteur du ticket critiqué (dont les statistiques changent) ou les
+    auteurs des critiques du ticket (qui l'affichent), et leurs abonnés.
+    """
+    if isinstance(post, Ticket):
+        others = Review.objects.filter(ticket_id=post.pk).values('user')
+    else:
+        others = Ticket.objects.filter(pk=post.ticket_id).values('user')
+    followers = UserFollows.objects.filter(
+        Q(followed_user_id=post.user_id) | Q(followed_user__in=others)
+    ).values('user')
+    return User.objects.filter(
+        Q(pk=post.user_id) | Q(pk__in=others) | Q(pk__in=followers)
+    ).values_list('pk', flat=True)
+
+
+def feed_rows(user, followed_ids, position=None, limit=None):
+    """
+    Requête des lignes du flux (id, time_created, content_type,
+    already_reviewed) triées par ordre décroissant.
+
+    Les tickets et les critiques sont combinés par un UNION ALL : le tri
+    et la limite sont appliqués par la base, qui s'arrête après `limit`
+    lignes.
+    """
+    tickets = Ticket.objects.filter(
+        user__in=followed_ids
+    ).annotate(
+        content_type=Value(TICKET, CharField()),
+        already_reviewed=Exists(
+            Review.objects.filter(ticket=OuterRef('pk'), user=user)
+        )
+    )
+    reviews = Review.objects.filter(
+        user__in=followed_ids
+    ).annotate(
+        content_type=Value(REVIEW, CharField()),
+        already_reviewed=Value(False, BooleanField())
+    )
+    if position:
+        tickets = tickets.filter(_keyset_filter(TICKET, position))
+        reviews = reviews.filter(_keyset_filter(REVIEW, position))
+
+    fields = ('id', 'time_created', 'content_type', 'already_reviewed')
+    rows = tickets.order_by().values(*fields).union(
+        reviews.order_by().values(*fields), all=True
+    ).order_by('-time_created', '-content_type', '-id')
+    if limit is not None:
+        rows = rows[:limit]
+    return rows
+
+
+def get_feed_rows(user, followed_ids, position=None, limit=None):
+    """Retourne les lignes du flux (voir feed_rows())."""
+    return list(feed_rows(user, followed_ids, position, limit))
+
+
+def _feed_entries(user, position=None, limit=None):
+    entries = FeedEntry.objects.filter(owner=user)
+    if position:
+        entries = entries.filter(_entry_keyset_filter(position))
+    entries = entries.order_by(
+        '-time_created', '-content_type', '-post_id'
+    ).values('post_id', 'time_created', 'content_type')
+    if limit is not None:
+        entries = entries[:limit]
+    return entries
+
+
+def _entry_row(entry):
+    return {'id': entry['post_id'], 'time_created': entry['time_created'],
+            'content_type': entry['content_type']}
+
+
+def get_feed_entry_rows(user, position=None, limit=None):
+    """
+    Retourne les lignes du flux matérialisé de l'utilisateur, dans le
+    même format que get_feed_rows().
+    """
+    return mark_already_reviewed([
+        _entry_row(entry) for entry in _feed_entries(user, position, limit)
+    ], user)
+
+
+async def aget_feed_entry_rows(user, position=None, limit=None):
+    """Version asynchrone de get_feed_entry_rows()."""
+    return await amark_already_reviewed([
+        _entry_row(entry)
+        async for entry in _feed_entries(user, position, limit)
+    ], user)
+
+
+def _split_page(rows, page_size):
+    """Sépare les lignes d'une page et calcule le curseur suivant."""
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        return rows, encode_cursor(rows[-1])
+    return rows, None
+
+
+def get_feed_page(user, cursor=None, page_size=None):
+    """
+    Retourne une page du flux de l'utilisateur et le curseur de la suivante.
+    """
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    position = decode_cursor(cursor) if cursor else None
+
+    def compute_rows():
+        if is_push_mode():
+            return get_feed_entry_rows(user, position, limit=page_size + 1)
+        return get_feed_rows(
+            user, get_followed_ids(user), position, limit=page_size + 1)
+
+    rows, next_cursor = _split_page(
+        get_cached_feed_rows(user, cursor, page_size, compute_rows),
+        page_size)
+    return FeedPage(load_feed_posts(rows), next_cursor)
+
+
+async def aget_feed_page(user, cursor=None, page_size=None):
+    """Version asynchrone de get_feed_page()."""
+    page_size = page_size or settings.FEED_PAGE_SIZE
+    position = decode_cursor(cursor) if cursor else None
+
+    async def compute_rows():
+        if is_push_mode():
+            return await aget_feed_entry_rows(
+                user, position, limit=page_size + 1)
+        followed_ids = await aget_followed_ids(user)
+        return [
+            row async for row in feed_rows(
+                user, followed_ids, position, limit=page_size + 1)
+        ]
+
+    rows, next_cursor = _split_page(
+        await aget_cached_feed_rows(user, cursor, page_size, compute_rows),
+        page_size)
+    return FeedPage(await aload_feed_posts(rows), next_cursor)
+
+
+def _bulk_insert_entries(entries, batch_size=1000):
+    """Insère les entrées par lots, en ignorant celles déjà présentes."""
+    entries = iter(entries)
+    while batch := list(islice(entries, batch_size)):
+        FeedEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def fan_out(post):
+    """
+    Ajoute un nouveau post au flux de son auteur et de tous ses abonnés.
+    """
+    content_type = TICKET if isinstance(post, Ticket) else REVIEW
+    follower_ids = UserFollows.objects.filter(
+        followed_user_id=post.user_id
+    ).values_list('user_id', flat=True)
+    _bulk_insert_entries(
+        FeedEntry(owner_id=owner_id, author_id=post.user_id,
+                  content_type=content_type, post_id=post.pk,
+                  time_created=post.time_created)
+        for owner_id in chain([post.user_id], follower_ids.iterator())
+    )
+
+
+def remove_post(post):
+    """Retire un post supprimé de tous les flux matérialisés."""
+    content_type = TICKET if isinstance(post, Ticket) else REVIEW
+    FeedEntry.objects.filter(
+        content_type=content_type, post_id=post.pk
+    ).delete()
+
+
+def backfill_feed(owner_id, author_ids):
+    """Ajoute au flux d'un utilisateur tous les posts des auteurs donnés."""
+    tickets = Ticket.objects.filter(
+        user_id__in=author_ids
+    ).values_list('id', 'user_id', 'time_created')
+    reviews = Review.objects.filter(
+        user_id__in=author_ids
+    ).values_list('id', 'user_id', 'time_created')
+    _bulk_insert_entries(chain(
+        (FeedEntry(owner_id=owner_id, author_id=author_id,
+                   content_type=TICKET, post_id=post_id,
+                   time_created=time_created)
+         for post_id, author_id, time_created in tickets.iterator()),
+        (FeedEntry(owner_id=owner_id, author_id=author_id,
+                   content_type=REVIEW, post_id=post_id,
+                   time_created=time_created)
+         for post_id, author_id, time_created in reviews.iterator()),
+    ))
+
+
+def prune_feed(owner_id, author_ids):
+    """Retire du flux d'un utilisateur les posts des auteurs donnés."""
+    author_ids = [
+        author_id for author_id in author_ids if author_id != owner_id]
+    FeedEntry.objects.filter(
+        owner_id=owner_id, author_id__in=author_ids
+    ).delete()
+
+
+def rebuild_feed(owner):
+    """Recalcule entièrement le flux matérialisé d'un utilisateur."""
+    FeedEntry.objects.filter(owner=owner).delete()
+    backfill_feed(owner.id, get_followed_ids(owner))
@@ -0,0 +1,120 @@
+"""
+Abonnements et désabonnements en masse (API `api/follows/` et commande
+`bulk_follow`).
+
+Les noms sont résolus en une requête par lot et les abonnements insérés
+avec bulk_create(ignore_conflicts=True). bulk_create n'envoie pas les
+signaux de UserFollows : leurs effets (flux matérialisé, flux en cache,
+suggestions) sont appliqués une seule fois pour le lot. Les
+désabonnements passent par QuerySet.delete(), dont les signaux
+post_delete appliquent ces effets comme pour un désabonnement unique.
+"""
+from collections import namedtuple
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+
+from . import feed
+from .cache import bump_feed_versions_on_commit
+from .models import UserFollows
+from .suggestions import mark_suggestions_stale
+
+User = get_user_model()
+
+# Noms traités par requête (limite de paramètres des bases de données)
+BATCH_SIZE = 500
+
+# changed : noms (dés)abonnés ; unchanged : déjà suivis (abonnement) ou
+# non suivis (désabonnement) ; unknown : utilisateurs inexistants
+FollowResult = namedtuple('FollowResult', ['changed', 'unchanged', 'unknown'])
+
+
+def _batches(usernames):
+    """Noms sans doublons ni blancs, par lots de BATCH_SIZE."""
+    usernames = iter(dict.fromkeys(
+        name.strip() for name in usernames if name.strip()))
+    while batch := list(islice(usernames, BATCH_SIZE)):
+        yield batch
+
+
+def _resolve(user, usernames):
+    """
+    {nom: (id, suivi ou non par `user`)} des noms existants, en une
+    requête.
+    """
+    return {
+        username: (pk, followed)
+        for pk, username, followed in User.objects.filter(
+            username__in=usernames
+        ).annotate(followed=Exists(UserFollows.objects.filter(
+            user=user, followed_user=OuterRef('pk')))
+        ).values_list('pk', 'username', 'followed')
+    }
+
+
+def _result(usernames, resolved, changed_ids):
+    result = FollowResult([], [], [])
+    for username in usernames:
+        if username not in resolved:
+            result.unknown.append(username)
+        elif resolved[username][0] in changed_ids:
+            result.changed.append(username)
+        else:
+            result.unchanged.append(username)
+    return result
+
+
+def _merge(results):
+    return FollowResult(*(
+        [name for result in results for name in getattr(result, field)]
+        for field in FollowResult._fields))
+
+
+def follow_users(user, usernames):
+    """
+    Abonne `user` aux utilisateurs nommés, sauf lui-même ; retourne un
+    FollowResult.
+    """
+    results = []
+    followed_ids = set()
+    usernames = (name for name in usernames if name.strip() != user.username)
+    for batch in _batches(usernames):
+        resolved = _resolve(user, batch)
+        new_ids = {pk for pk, followed in resolved.values() if not followed}
+        if new_ids:
+            with transaction.atomic():
+                # Un abonnement créé entre-temps est ignoré sans erreur
+                UserFollows.objects.bulk_create(
+                    [UserFollows(user=user, followed_user_id=pk)
+                     for pk in new_ids],
+                    ignore_conflicts=True)
+                if feed.is_push_mode():
+                    feed.backfill_feed(user.pk, new_ids)
+            followed_ids |= new_ids
+        results.append(_result(batch, resolved, new_ids))
+    if followed_ids:
+        _follows_changed(user, followed_ids)
+    return _merge(results)
+
+
+def unfollow_users(user, usernames):
+    """
+    Désabonne `user` des utilisateurs nommés ; retourne un FollowResult.
+    """
+    results = []
+    for batch in _batches(usernames):
+        resolved = _resolve(user, batch)
+        old_ids = {pk for pk, followed in resolved.values() if followed}
+        if old_ids:
+            UserFollows.objects.filter(
+                user=user, followed_user_id__in=old_ids).delete()
+        results.append(_result(batch, resolved, old_ids))
+    return _merge(results)
+
+
+def _follows_changed(user, followed_ids):
+    """Effets des signaux post_save de UserFollows, pour tout un lot."""
+    bump_feed_versions_on_commit([user.pk, *followed_ids])
+    mark_suggestions_stale([user.pk])
@@ -1,6 +1,7 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from .models import Ticket, Review, UserFollows
 
 User = get_user_model()
@@ -168,39 +169,47 @@ class FollowUserForm(forms.Form):
     """
     Formulaire pour suivre un utilisateur.
 
+    Après validation, l'utilisateur à suivre est dans `user_to_follow`.
     """
     username = forms.CharField(
         max_length=150,
         required=True,
         widget=forms.TextInput(attrs={
-            'class': 'form-input', 'autofocus': True}),
+            'class': 'form-input', 'autofocus': True,
+            # Suggestions de l'autocomplétion (subscriptions.html)
+            'list': 'username-options', 'autocomplete': 'off'}),
         label="Nom d'utilisateur"
     )
 
     def __init__(self, *args, **kwargs):
         self.current_user = kwargs.pop(
             'current_user', None)
+        self.user_to_follow = None
         super().__init__(*args, **kwargs)
 
     def clean_username(self):
         """Valide le nom d'utilisateur à suivre"""
         username = self.cleaned_data.get('username')
 
+        # Une seule requête : l'utilisateur, et s'il est déjà suivi
+        users = User.objects.filter(username=username)
+        if self.current_user:
+            users = users.annotate(already_followed=Exists(
+                UserFollows.objects.filter(user=self.current_user,
+                                           followed_user=OuterRef('pk'))))
+        user_to_follow = users.first()
+
         # Vérifier que l'utilisateur existe
-        try:
-            user_to_follow = User.objects.get(username=username)
-        except User.DoesNotExist:
+        if user_to_follow is None:
             raise forms.ValidationError(
                 f"L'utilisateur '{username}' n'existe pas.")
 
         # Vérifier si l'abonnement existe déjà
-        if self.current_user and UserFollows.objects.filter(
-            user=self.current_user,
-            followed_user=user_to_follow
-        ).exists():
+        if getattr(user_to_follow, 'already_followed', False):
             raise forms.ValidationError(
                 f"Vous suivez déjà {username}.")
 
+        self.user_to_follow = user_to_follow
         return username
 
 
@@ -0,0 +1,87 @@
+"""
+File de traitements d'images, stockée en base (ImageJob).
+
+Les vues ajoutent une tâche par image envoyée ; la commande `run_workers`
+réserve les tâches en attente et les exécute dans un pool de processus.
+Tout fonctionne sur une seule machine, sans serveur de messages.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from .models import ImageJob
+from .thumbnails import process_ticket_image
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_image_processing(ticket):
+    """
+    Programme le traitement de l'image d'un ticket, ou l'exécute tout de
+    suite si IMAGE_JOBS_ASYNC est désactivé.
+    """
+    if not settings.IMAGE_JOBS_ASYNC:
+        process_ticket_image(ticket)
+        return None
+    job, _ = ImageJob.objects.get_or_create(
+        ticket=ticket, status=ImageJob.PENDING)
+    return job
+
+
+def claim_jobs(limit):
+    """
+    Réserve jusqu'à `limit` tâches en attente et retourne leurs ids.
+    La réservation est conditionnelle : plusieurs `run_workers` peuvent
+    tourner en parallèle sans traiter deux fois la même tâche.
+    """
+    pending_ids = ImageJob.objects.filter(
+        status=ImageJob.PENDING
+    ).order_by('time_created').values_list('pk', flat=True)[:limit]
+
+    claimed = []
+    for job_id in pending_ids:
+        if ImageJob.objects.filter(
+            pk=job_id, status=ImageJob.PENDING
+        ).update(status=ImageJob.RUNNING, attempts=F('attempts') + 1,
+                 time_updated=timezone.now()):
+            claimed.append(job_id)
+    return claimed
+
+
+def requeue_stale_jobs(max_age):
+    """Remet en attente les tâches bloquées (worker interrompu)."""
+    return ImageJob.objects.filter(
+        status=ImageJob.RUNNING,
+        time_updated__lt=timezone.now() - timedelta(seconds=max_age)
+    ).update(status=ImageJob.PENDING, time_updated=timezone.now())
+
+
+def run_image_job(job_id):
+    """
+    Exécute une tâche (dans un processus du pool). Retourne True si le
+    traitement a réussi.
+    """
+    try:
+        job = ImageJob.objects.select_related('ticket').get(pk=job_id)
+    except ImageJob.DoesNotExist:
+        # Ticket supprimé entre-temps
+        return False
+
+    try:
+        process_ticket_image(job.ticket)
+    except Exception:
+        logger.exception("Échec du traitement d'image %s", job_id)
+        status = ImageJob.PENDING
+        if job.attempts >= settings.IMAGE_JOB_MAX_ATTEMPTS:
+            status = ImageJob.FAILED
+        ImageJob.objects.filter(pk=job_id).update(
+            status=status, error=traceback.format_exc(),
+            time_updated=timezone.now())
+        return False
+
+    job.delete()
+    return True
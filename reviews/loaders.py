@@ -0,0 +1,149 @@
+"""
+Chargement des posts affichés par les templates.
+
+Les snippets accèdent à l'auteur du post et, pour une critique, au ticket
+associé et à son auteur : ces relations sont chargées en un nombre
+constant de requêtes (select_related / Prefetch), quel que soit le nombre
+de posts.
+"""
+from django.db.models import Prefetch
+
+from .models import Ticket, Review, FeedEntry
+
+
+def _ticket_ids(rows):
+    return [
+        row['id'] for row in rows if row['content_type'] == FeedEntry.TICKET]
+
+
+def _review_ids(rows):
+    return [
+        row['id'] for row in rows if row['content_type'] == FeedEntry.REVIEW]
+
+
+def _reviewed_ticket_ids(rows, user):
+    return Review.objects.filter(
+        user=user, ticket_id__in=_ticket_ids(rows)
+    ).values_list('ticket_id', flat=True)
+
+
+def _set_already_reviewed(rows, reviewed):
+    for row in rows:
+        row['already_reviewed'] = (
+            row['content_type'] == FeedEntry.TICKET and row['id'] in reviewed)
+    return rows
+
+
+def mark_already_reviewed(rows, user):
+    """
+    Renseigne `already_reviewed` sur des lignes de posts (dictionnaires
+    avec 'id' et 'content_type') en une requête.
+    """
+    reviewed = set()
+    if _ticket_ids(rows):
+        reviewed = set(_reviewed_ticket_ids(rows, user))
+    return _set_already_reviewed(rows, reviewed)
+
+
+async def amark_already_reviewed(rows, user):
+    """Version asynchrone de mark_already_reviewed()."""
+    reviewed = set()
+    if _ticket_ids(rows):
+        reviewed = {
+            ticket_id
+            async for ticket_id in _reviewed_ticket_ids(rows, user)}
+    return _set_already_reviewed(rows, reviewed)
+
+
+def _tickets_to_load():
+    return Ticket.objects.select_related('user')
+
+
+def _reviews_to_load():
+    return Review.objects.select_related('user', 'ticket__user')
+
+
+def _ordered_posts(rows, tickets, reviews):
+    posts = []
+    for row in rows:
+        if row['content_type'] == FeedEntry.TICKET:
+            post = tickets.get(row['id'])
+        else:
+            post = reviews.get(row['id'])
+        if post is None:
+            # Post supprimé entre les deux requêtes
+            continue
+        post.content_type = row['content_type']
+        post.already_reviewed = row['already_reviewed']
+        posts.append(post)
+    return posts
+
+
+def load_feed_posts(rows):
+    """
+    Charge les tickets et critiques correspondant aux lignes du flux,
+    dans l'ordre des lignes, avec les annotations utilisées par les
+    templates (content_type, already_reviewed).
+    """
+    return _ordered_posts(
+        rows,
+        _tickets_to_load().in_bulk(_ticket_ids(rows)),
+        _reviews_to_load().in_bulk(_review_ids(rows)),
+    )
+
+
+async def aload_feed_posts(rows):
+    """Version asynchrone de load_feed_posts()."""
+    return _ordered_posts(
+        rows,
+        await _tickets_to_load().ain_bulk(_ticket_ids(rows)),
+        await _reviews_to_load().ain_bulk(_review_ids(rows)),
+    )
+
+
+def _user_tickets(user):
+    return Ticket.objects.filter(
+        user=user
+    ).select_related('user').prefetch_related(
+        Prefetch(
+            'review_set',
+            queryset=Review.objects.select_related('user'),
+            to_attr='prefetched_reviews'
+        )
+    )
+
+
+def _split_reviews(ticket, user):
+    """Sépare la critique de l'utilisateur de celles des autres."""
+    my_review = None
+    other_reviews = []
+    for review in ticket.prefetched_reviews:
+        if review.user_id != user.id:
+            other_reviews.append(review)
+        elif my_review is None:
+            my_review = review
+    return {
+        'ticket': ticket,
+        'my_review': my_review,
+        'other_reviews': other_reviews,
+    }
+
+
+def load_user_posts(user):
+    """
+    Charge les tickets de l'utilisateur avec leurs critiques, séparées
+    entre la sienne et celles des autres, en deux requêtes.
+    """
+    return [_split_reviews(ticket, user) for ticket in _user_tickets(user)]
+
+
+async def aload_user_posts(user, chunk_size=2000):
+    """
+    Version asynchrone de load_user_posts() : les critiques sont
+    préchargées par lots de `chunk_size` tickets.
+    """
+    return [
+        _split_reviews(ticket, user)
+        async for ticket in _user_tickets(user).aiterator(
+            chunk_size=chunk_size)
+    ]
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from reviews.benchmarks import BENCHMARKS
+
+
+class Command(BaseCommand):
+    """
+    Lance un benchmark sur une base temporaire, par exemple :
+    `python manage.py benchmark search --rows 100000`.
+    """
+    help = "Lance un benchmark (voir reviews/benchmarks)."
+
+    def add_arguments(self, parser):
+        subparsers = parser.add_subparsers(
+            dest='benchmark', required=True,
+            parser_class=parser.__class__,
+        )
+        for name, module in BENCHMARKS.items():
+            subparser = subparsers.add_parser(
+                name, help=(module.__doc__ or '').strip().splitlines()[0],
+                called_from_command_line=getattr(
+                    parser, 'called_from_command_line', None),
+            )
+            module.add_arguments(subparser)
+
+    def handle(self, *args, **options):
+        BENCHMARKS[options.pop('benchmark')].run(self.stdout, **options)
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.follows import follow_users, unfollow_users
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Abonne (ou désabonne, avec --unfollow) un utilisateur à une liste
+    d'utilisateurs, par exemple : `python manage.py bulk_follow alice
+    bob carol` ou `python manage.py bulk_follow alice --file noms.txt`.
+    """
+    help = "Abonne un utilisateur à une liste d'utilisateurs."
+
+    def add_arguments(self, parser):
+        parser.add_argument('user', help="Nom de l'abonné.")
+        parser.add_argument(
+            'usernames', nargs='*',
+            help="Noms des utilisateurs à suivre."
+        )
+        parser.add_argument(
+            '--file', metavar='PATH',
+            help="Fichier de noms, un par ligne."
+        )
+        parser.add_argument(
+            '--unfollow', action='store_true',
+            help="Désabonne au lieu d'abonner."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(
+                f"L'utilisateur '{options['user']}' n'existe pas.")
+
+        usernames = list(options['usernames'])
+        if options['file']:
+            with open(options['file'], encoding='utf-8') as names:
+                usernames.extend(line.strip() for line in names)
+        if not usernames:
+            raise CommandError("Aucun nom d'utilisateur donné.")
+
+        if options['unfollow']:
+            result = unfollow_users(user, usernames)
+            changed, unchanged = "désabonné(s)", "non suivi(s)"
+        else:
+            result = follow_users(user, usernames)
+            changed, unchanged = "abonné(s)", "déjà suivi(s)"
+
+        for label, names in ((unchanged, result.unchanged),
+                             ("inconnu(s)", result.unknown)):
+            if names:
+                self.stdout.write(f"{len(names)} {label} : {', '.join(names)}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{user.username} : {len(result.changed)} {changed}."))
@@ -0,0 +1,50 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reviews.models import SuggestionRefresh
+from reviews.suggestions import refresh_suggestions
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Calcule les suggestions d'abonnements (voir reviews/suggestions.py)
+    des utilisateurs dont les abonnements ont changé, ou de tous avec
+    --all. À lancer régulièrement, par exemple toutes les 10 minutes.
+    """
+    help = "Calcule les suggestions d'abonnements."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Recalcule les suggestions de tous les utilisateurs."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Utilisateurs traités par transaction (défaut : 500)."
+        )
+
+    def handle(self, *args, **options):
+        # Les demandes faites pendant le calcul seront traitées au
+        # prochain passage
+        start = timezone.now()
+        pending = SuggestionRefresh.objects.filter(time_requested__lte=start)
+        if options['all']:
+            queryset = User.objects.filter(is_active=True)
+        else:
+            queryset = pending
+
+        users = suggestions = last_id = 0
+        while batch := list(queryset.filter(pk__gt=last_id).order_by(
+                'pk').values_list('pk', flat=True)[:options['batch_size']]):
+            suggestions += refresh_suggestions(batch)
+            pending.filter(pk__in=batch).delete()
+            users += len(batch)
+            last_id = batch[-1]
+        if options['all']:
+            pending.delete()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{suggestions} suggestion(s) pour {users} utilisateur(s)."))
@@ -0,0 +1,48 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+
+from reviews.transfer import export_data, open_export
+
+
+class Command(BaseCommand):
+    """
+    Exporte les utilisateurs, abonnements, tickets et critiques au
+    format JSONL (compressé si le fichier se termine par `.gz`), par
+    exemple : `python manage.py export_litreview backup.jsonl.gz
+    --media backup-media`. Les mots de passe sont exportés hachés.
+    """
+    help = "Exporte les données au format JSONL, en flux."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help="Fichier d'export, ou - pour la sortie standard."
+        )
+        parser.add_argument(
+            '--media', metavar='DIR',
+            help="Copie aussi les images des tickets dans ce dossier."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help="Lignes lues par requête (défaut : 2000)."
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        to_stdout = options['path'] == '-'
+        # Le journal ne doit pas se mêler aux données
+        log = self.stderr.write if to_stdout else self.stdout.write
+        kwargs = {'chunk_size': options['chunk_size'],
+                  'media_dir': options['media'], 'log': log}
+
+        if to_stdout:
+            counts = export_data(sys.stdout, **kwargs)
+        else:
+            with open_export(options['path'], 'w') as stream:
+                counts = export_data(stream, **kwargs)
+
+        log(self.style.SUCCESS(
+            f"{sum(counts.values())} objet(s) exporté(s) en "
+            f"{time.perf_counter() - start:.1f} s."))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from reviews.cache import get_cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Affiche les compteurs de succès / échecs du cache du flux.
+    Avec le cache 'locmem', les compteurs sont propres à chaque processus :
+    utiliser LITREVIEW_CACHE=file pour les consulter depuis cette commande.
+    """
+    help = "Affiche les compteurs du cache du flux."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help="Remet les compteurs à zéro après affichage."
+        )
+
+    def handle(self, *args, **options):
+        stats = get_cache_stats()
+        self.stdout.write(
+            f"Succès : {stats['hits']}\n"
+            f"Échecs : {stats['misses']}\n"
+            f"Taux de succès : {stats['hit_ratio']:.1%}"
+        )
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS("Compteurs remis à zéro."))
@@ -0,0 +1,42 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Ticket
+from reviews.thumbnails import generate_thumbnails
+
+
+class Command(BaseCommand):
+    """
+    Génère les miniatures des images de tickets existantes.
+    """
+    help = "Génère les miniatures manquantes des images de tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Régénère aussi les miniatures existantes."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Nombre de tickets lus par requête."
+        )
+
+    def handle(self, *args, **options):
+        tickets = Ticket.objects.exclude(image='').exclude(image=None)
+        if not options['force']:
+            tickets = tickets.filter(thumbnails={})
+
+        count = 0
+        last_pk = 0
+        # Parcours par lots de clés : la table est modifiée en cours de route
+        while batch := list(tickets.filter(
+                pk__gt=last_pk).order_by('pk')[:options['batch_size']]):
+            for ticket in batch:
+                if generate_thumbnails(ticket):
+                    count += 1
+                if options['verbosity'] > 1:
+                    self.stdout.write(
+                        f"Ticket {ticket.pk} : {ticket.image.name}")
+            last_pk = batch[-1].pk
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Miniatures générées pour {count} ticket(s)."))
@@ -0,0 +1,61 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError
+
+from reviews.feed import is_push_mode
+from reviews.transfer import Importer, InvalidExport, open_export
+
+
+class Command(BaseCommand):
+    """
+    Importe un fichier produit par `export_litreview`, par lots et en
+    flux, par exemple : `python manage.py import_litreview
+    backup.jsonl.gz --media backup-media`. Les identifiants sont
+    réattribués ; un utilisateur dont le nom existe déjà est réutilisé.
+    """
+    help = "Importe des données exportées au format JSONL."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help="Fichier d'export, ou - pour l'entrée standard."
+        )
+        parser.add_argument(
+            '--media', metavar='DIR',
+            help="Dossier des images copiées par export_litreview --media "
+                 "(sans lui, les chemins des images sont conservés)."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Objets insérés par transaction (défaut : 5000)."
+        )
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        importer = Importer(batch_size=options['batch_size'],
+                            media_dir=options['media'],
+                            log=self.stdout.write)
+        try:
+            if options['path'] == '-':
+                counts = importer.run(sys.stdin)
+            else:
+                with open_export(options['path'], 'r') as stream:
+                    counts = importer.run(stream)
+        except (InvalidExport, DatabaseError, OSError) as error:
+            raise CommandError(
+                f"Import interrompu ({error}) : les lots déjà importés "
+                "restent en base.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{sum(counts.values())} objet(s) importé(s) en "
+            f"{time.perf_counter() - start:.1f} s."))
+        if importer.image_jobs:
+            self.stdout.write(
+                "Lancez `run_workers` pour générer les miniatures des "
+                "images importées.")
+        if is_push_mode():
+            self.stdout.write(
+                "FEED_MODE vaut 'push' : lancez `rebuild_feed` pour "
+                "remplir le flux matérialisé.")
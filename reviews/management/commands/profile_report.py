@@ -0,0 +1,61 @@
+import io
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.profiling import make_profile_token, merged_stats, view_names
+
+
+class Command(BaseCommand):
+    """
+    Fusionne les profils enregistrés par ProfilingMiddleware et affiche,
+    pour chaque vue, les fonctions les plus coûteuses.
+    """
+    help = "Affiche les fonctions les plus coûteuses des vues profilées."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--view', dest='views', action='append', default=[],
+            help="Nom d'URL de la vue (option répétable ; défaut : toutes)."
+        )
+        parser.add_argument(
+            '--limit', type=int, default=20,
+            help="Nombre de fonctions affichées par vue (défaut : 20)."
+        )
+        parser.add_argument(
+            '--sort', default='cumulative',
+            choices=['cumulative', 'tottime', 'ncalls'],
+            help="Tri : temps cumulé, temps propre ou nombre d'appels "
+                 "(défaut : cumulative)."
+        )
+        parser.add_argument(
+            '--token', action='store_true',
+            help="Affiche un jeton pour profiler une requête précise "
+                 f"(en-tête {settings.PROFILING_HEADER})."
+        )
+
+    def handle(self, *args, **options):
+        if options['token']:
+            self.stdout.write(
+                f"{settings.PROFILING_HEADER}: {make_profile_token()}")
+            return
+
+        available = view_names()
+        views = options['views'] or available
+        unknown = set(views) - set(available)
+        if unknown:
+            raise CommandError("Aucun profil pour : "
+                               + ", ".join(sorted(unknown)))
+        if not views:
+            self.stdout.write(
+                f"Aucun profil dans {settings.PROFILING_DIR}.")
+            return
+
+        for view in views:
+            output = io.StringIO()
+            stats, count = merged_stats(view, stream=output)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(
+                options['limit'])
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"== {view} ({count} requête(s) profilée(s))"))
+            self.stdout.write(output.getvalue())
@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from reviews.feed import rebuild_feed
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Reconstruit le flux matérialisé (FeedEntry) à partir de UserFollows,
+    Ticket et Review. À lancer après le passage de FEED_MODE à "push".
+    """
+    help = "Reconstruit le flux matérialisé des utilisateurs."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user', dest='usernames', action='append', default=[],
+            help="Ne reconstruire que le flux de cet utilisateur "
+                 "(option répétable)."
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.order_by('pk')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+            missing = set(options['usernames']) - set(
+                users.values_list('username', flat=True))
+            if missing:
+                raise CommandError("Utilisateur(s) inconnu(s) : "
+                                   + ", ".join(sorted(missing)))
+
+        count = 0
+        for user in users.iterator():
+            with transaction.atomic():
+                rebuild_feed(user)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Flux reconstruit pour {count} utilisateur(s)."))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews.search import (install_search_index,
+                            is_fts_available,
+                            rebuild_search_index)
+
+
+class Command(BaseCommand):
+    """
+    Reconstruit l'index de recherche plein texte (SQLite FTS5) à partir
+    des tickets et des critiques.
+    """
+    help = "Reconstruit l'index de recherche."
+
+    def handle(self, *args, **options):
+        if not is_fts_available():
+            self.stdout.write(
+                "Pas d'index FTS5 pour cette base : "
+                "la recherche parcourt directement les tables.")
+            return
+        with transaction.atomic():
+            install_search_index()
+            rebuild_search_index()
+        self.stdout.write(
+            self.style.SUCCESS("Index de recherche reconstruit."))
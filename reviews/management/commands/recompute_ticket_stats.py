@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, Now
+
+from reviews.models import Ticket, Review
+
+
+def recompute_ticket_stats(tickets):
+    """
+    Recalcule review_count et rating_sum des tickets donnés en un seul
+    UPDATE, limité aux tickets dont les statistiques ont dérivé : les
+    autres gardent leur time_updated, dont dépendent les ETag et les
+    fragments en cache. Retourne le nombre de tickets corrigés.
+    """
+    stats = Review.objects.filter(
+        ticket=OuterRef('pk')
+    ).order_by().values('ticket')
+    review_count = Coalesce(
+        Subquery(stats.annotate(count=Count('pk')).values('count')), 0)
+    rating_sum = Coalesce(
+        Subquery(stats.annotate(total=Sum('rating')).values('total')), 0)
+    return tickets.filter(
+        ~Q(review_count=review_count) | ~Q(rating_sum=rating_sum)
+    ).update(
+        review_count=review_count,
+        rating_sum=rating_sum,
+        time_updated=Now(),
+    )
+
+
+class Command(BaseCommand):
+    """
+    Reconstruit les statistiques dénormalisées des tickets (nombre de
+    critiques, somme des notes) pour réparer une éventuelle dérive.
+    """
+    help = "Recalcule les statistiques de critiques de tous les tickets."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help="Nombre de tickets mis à jour par transaction."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = Ticket.objects.aggregate(last_id=Max('pk'))['last_id'] or 0
+
+        updated = 0
+        for start in range(0, last_id, batch_size):
+            with transaction.atomic():
+                updated += recompute_ticket_stats(Ticket.objects.filter(
+                    pk__gt=start, pk__lte=start + batch_size))
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Statistiques corrigées pour {updated} ticket(s)."))
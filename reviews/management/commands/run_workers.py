@@ -0,0 +1,88 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reviews.jobs import claim_jobs, requeue_stale_jobs, run_image_job
+
+
+class Command(BaseCommand):
+    """
+    Exécute les traitements d'images en attente (miniatures, suppression
+    des métadonnées EXIF) dans un pool de processus locaux, et supprime
+    régulièrement les sessions expirées.
+    """
+    help = "Lance les workers de traitement des images."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+            help="Nombre de processus du pool (défaut : nombre de CPU)."
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help="Délai (s) entre deux consultations de la file vide."
+        )
+        parser.add_argument(
+            '--stale-after', type=int, default=600,
+            help="Délai (s) après lequel une tâche en cours est relancée."
+        )
+        parser.add_argument(
+            '--session-cleanup-interval', type=int,
+            default=settings.SESSION_CLEANUP_INTERVAL,
+            help="Délai (s) entre deux suppressions des sessions expirées "
+                 "(0 : jamais)."
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help="Vide la file puis s'arrête."
+        )
+
+    def handle(self, *args, **options):
+        processes = max(1, options['processes'])
+        # 'spawn' : les processus ne partagent pas la connexion à la base,
+        # et initialisent Django au démarrage
+        context = multiprocessing.get_context('spawn')
+        self.stdout.write(f"Démarrage de {processes} worker(s)...")
+
+        with ProcessPoolExecutor(max_workers=processes,
+                                 mp_context=context,
+                                 initializer=django.setup) as pool:
+            try:
+                self._run(pool, processes, options)
+            except KeyboardInterrupt:
+                self.stdout.write("Arrêt des workers.")
+
+    def _run(self, pool, processes, options):
+        next_cleanup = time.monotonic()
+        while True:
+            interval = options['session_cleanup_interval']
+            if interval and time.monotonic() >= next_cleanup:
+                call_command('clearsessions')
+                next_cleanup = time.monotonic() + interval
+            requeue_stale_jobs(options['stale_after'])
+            job_ids = claim_jobs(limit=processes * 2)
+            if not job_ids:
+                if options['once']:
+                    return
+                # Pas de connexion inutilement ouverte pendant l'attente
+                connections.close_all()
+                time.sleep(options['poll_interval'])
+                continue
+
+            futures = {
+                pool.submit(run_image_job, job_id): job_id
+                for job_id in job_ids
+            }
+            for future in as_completed(futures):
+                job_id = futures[future]
+                if future.result():
+                    self.stdout.write(f"Tâche {job_id} traitée.")
+                else:
+                    self.stderr.write(f"Tâche {job_id} en échec.")
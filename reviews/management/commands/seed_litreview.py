@@ -0,0 +1,108 @@
+import argparse
+import time
+from datetime import datetime, timezone
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from reviews.feed import is_push_mode
+from reviews.seeding import END, PASSWORD, Seeder
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    Génère un jeu de données synthétique (utilisateurs, abonnements,
+    tickets, critiques) pour les tests de charge, par exemple :
+    `python manage.py seed_litreview --users 10000 --tickets 500000
+    --reviews 500000`.
+    """
+    help = "Génère des données synthétiques pour les tests de charge."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=1000,
+            help="Nombre d'utilisateurs (défaut : 1000)."
+        )
+        parser.add_argument(
+            '--follows-per-user', type=int, default=20,
+            help="Abonnements par utilisateur (défaut : 20)."
+        )
+        parser.add_argument(
+            '--tickets', type=int, default=10000,
+            help="Nombre de tickets (défaut : 10 000)."
+        )
+        parser.add_argument(
+            '--reviews', type=int, default=10000,
+            help="Nombre de critiques (défaut : 10 000)."
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help="Graine du générateur : mêmes données pour une même "
+                 "graine (défaut : 0)."
+        )
+        parser.add_argument(
+            '--images', type=float, default=0.0,
+            help="Proportion de tickets avec une image de remplacement "
+                 "(défaut : 0)."
+        )
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help="Période couverte par les posts, en jours (défaut : 365)."
+        )
+        parser.add_argument(
+            '--end', type=self.parse_date, default=END,
+            help="Date (AAAA-MM-JJ, UTC) de fin de la période "
+                 f"(défaut : {END:%Y-%m-%d})."
+        )
+        parser.add_argument(
+            '--prefix', default='user',
+            help="Préfixe des noms d'utilisateur (défaut : user)."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help="Taille des lots d'insertion (défaut : 5000)."
+        )
+
+    @staticmethod
+    def parse_date(value):
+        try:
+            return datetime.strptime(value, '%Y-%m-%d').replace(
+                tzinfo=timezone.utc)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"date invalide : {value}")
+
+    def handle(self, *args, **options):
+        if options['users'] < 1:
+            raise CommandError("Il faut au moins un utilisateur.")
+        if not 0 <= options['images'] <= 1:
+            raise CommandError("--images doit être compris entre 0 et 1.")
+        if User.objects.filter(
+                username__startswith=options['prefix']).exists():
+            raise CommandError(
+                f"Des utilisateurs '{options['prefix']}...' existent déjà : "
+                "choisissez un autre --prefix.")
+
+        start = time.perf_counter()
+        Seeder(
+            users=options['users'],
+            follows_per_user=options['follows_per_user'],
+            tickets=options['tickets'],
+            reviews=options['reviews'],
+            seed=options['seed'],
+            images=options['images'],
+            days=options['days'],
+            end=options['end'],
+            prefix=options['prefix'],
+            batch_size=options['batch_size'],
+            log=self.stdout.write,
+        ).run()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Données générées en {time.perf_counter() - start:.1f} s "
+            f"(mot de passe des comptes : {PASSWORD})."))
+        if is_push_mode():
+            self.stdout.write(
+                "FEED_MODE vaut 'push' : lancez `rebuild_feed` pour "
+                "remplir le flux matérialisé.")
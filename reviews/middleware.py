@@ -0,0 +1,184 @@
+"""
+Middlewares d'instrumentation.
+
+QueryBudgetMiddleware compte les requêtes SQL et leur durée totale pour
+chaque requête HTTP, les expose dans l'en-tête Server-Timing (visible
+dans les outils de développement du navigateur) et journalise les vues
+qui dépassent leur budget (réglage QUERY_BUDGETS, par nom d'URL).
+Activé par QUERY_INSTRUMENTATION.
+
+ProfilingMiddleware profile (cProfile) une fraction des requêtes, ou
+celles qui portent un jeton signé, et enregistre les profils par vue
+(voir profiling.py). Activé par PROFILING_ENABLED ; placé en fin de
+MIDDLEWARE, il profile la résolution de l'URL, la vue et son rendu.
+"""
+import cProfile
+import logging
+import random
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import (async_to_sync, iscoroutinefunction,
+                          markcoroutinefunction, sync_to_async)
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import Resolver404, get_resolver
+
+from .profiling import is_valid_profile_token, save_profile
+
+logger = logging.getLogger(__name__)
+
+
+class QueryCounter:
+    """execute_wrapper qui compte les requêtes SQL et leur durée."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.duration += time.perf_counter() - start
+
+    def __enter__(self):
+        # Les connexions sont propres au thread : celles de la requête
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+
+def get_query_budget(url_name):
+    """Budget de requêtes SQL d'une vue, ou None s'il n'y en a pas."""
+    return settings.QUERY_BUDGETS.get(url_name)
+
+
+class QueryBudgetMiddleware:
+    """
+    Compte les requêtes SQL de chaque requête HTTP (en-tête
+    Server-Timing) et signale les dépassements de budget.
+
+    Middleware synchrone : sous ASGI, les requêtes des vues asynchrones
+    sont exécutées dans le thread de la requête et sont donc comptées.
+    """
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+
+        response.headers['Server-Timing'] = (
+            f'db;dur={counter.duration * 1000:.1f};'
+            f'desc="{counter.count} queries"')
+
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+        budget = get_query_budget(url_name)
+        if budget is not None and counter.count > budget:
+            logger.warning(
+                "%s : %d requêtes SQL pour un budget de %d (%s %s)",
+                url_name, counter.count, budget,
+                request.method, request.path)
+        return response
+
+
+class ProfilingMiddleware:
+    """
+    Profile les requêtes échantillonnées (PROFILING_SAMPLE_RATE) ou
+    portant un jeton valide dans l'en-tête PROFILING_HEADER.
+
+    cProfile ne voit que le thread où il est activé. Placé en fin de
+    MIDDLEWARE, le middleware s'exécute sous ASGI dans la boucle
+    d'événements, où tournent les vues asynchrones (ASYNC_VIEWS) : elles
+    y sont profilées, les requêtes SQL de l'ORM asynchrone (exécutées
+    dans un thread) et les autres requêtes servies pendant ce temps par
+    la boucle en plus. Une vue synchrone est profilée dans le thread de
+    sync_to_async où Django l'exécute.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = 'HTTP_' + settings.PROFILING_HEADER.upper().replace(
+            '-', '_')
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def should_profile(self, request):
+        token = request.META.get(self.header)
+        if token:
+            return is_valid_profile_token(token)
+        return random.random() < settings.PROFILING_SAMPLE_RATE
+
+    def save(self, profiler, request):
+        match = request.resolver_match
+        try:
+            save_profile(profiler, match.url_name if match else None)
+        except OSError:
+            logger.exception("Impossible d'enregistrer le profil")
+
+    def profile(self, request, get_response):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Un autre profilage est déjà actif dans ce thread
+            return get_response(request)
+        try:
+            response = get_response(request)
+        finally:
+            profiler.disable()
+        self.save(profiler, request)
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.should_profile(request):
+            return self.get_response(request)
+        return self.profile(request, self.get_response)
+
+    async def __acall__(self, request):
+        if not self.should_profile(request):
+            return await self.get_response(request)
+        if not _is_async_view(request):
+            # La vue s'exécutera dans ce thread : les appels
+            # sync_to_async imbriqués reviennent au thread appelant
+            return await sync_to_async(self.profile)(
+                request, async_to_sync(self.get_response))
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return await self.get_response(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            profiler.disable()
+        self.save(profiler, request)
+        return response
+
+
+def _is_async_view(request):
+    try:
+        match = get_resolver(getattr(request, 'urlconf', None)).resolve(
+            request.path_info)
+    except Resolver404:
+        return False
+    return iscoroutinefunction(match.func)
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:45
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_alter_review_options_alter_ticket_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='time_created',
+            field=models.DateTimeField(auto_now_add=True, verbose_name='Date de la création'),
+        ),
+        migrations.CreateModel(
+            name='FeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('TICKET', 'Ticket'), ('REVIEW', 'Critique')], max_length=6, verbose_name='Type')),
+                ('post_id', models.PositiveBigIntegerField(verbose_name='Identifiant du post')),
+                ('time_created', models.DateTimeField(verbose_name='Date du post')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Auteur du post')),
+                ('owner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to=settings.AUTH_USER_MODEL, verbose_name='Propriétaire du flux')),
+            ],
+            options={
+                'verbose_name': 'Entrée de flux',
+                'indexes': [models.Index(fields=['owner', '-time_created', '-content_type', '-post_id'], name='feed_entry_page_idx'), models.Index(fields=['content_type', 'post_id'], name='feed_entry_post_idx')],
+                'constraints': [models.UniqueConstraint(fields=('owner', 'content_type', 'post_id'), name='unique_feed_entry')],
+            },
+        ),
+    ]
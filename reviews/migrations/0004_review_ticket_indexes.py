@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:46
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def remove_duplicate_reviews(apps, schema_editor):
+    """Garde la plus ancienne critique de chaque couple (ticket, user)."""
+    Review = apps.get_model('reviews', 'Review')
+    kept_ids = Review.objects.values('ticket', 'user').annotate(
+        first_id=Min('id')
+    ).values('first_id')
+    Review.objects.exclude(id__in=kept_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0003_feedentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_reviews, migrations.RunPython.noop
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', '-time_created'], name='review_user_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', '-time_created'], name='ticket_user_time_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.UniqueConstraint(fields=('ticket', 'user'), name='unique_review_per_ticket_user'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:48
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def compute_ticket_stats(apps, schema_editor):
+    """Initialise les statistiques à partir des critiques existantes."""
+    Ticket = apps.get_model('reviews', 'Ticket')
+    Review = apps.get_model('reviews', 'Review')
+    stats = Review.objects.filter(
+        ticket=OuterRef('pk')
+    ).order_by().values('ticket')
+    Ticket.objects.update(
+        review_count=Coalesce(
+            Subquery(stats.annotate(count=Count('pk')).values('count')), 0),
+        rating_sum=Coalesce(
+            Subquery(stats.annotate(total=Sum('rating')).values('total')), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0004_review_ticket_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Somme des notes'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='review_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nombre de critiques'),
+        ),
+        migrations.RunPython(
+            compute_ticket_stats, migrations.RunPython.noop
+        ),
+    ]
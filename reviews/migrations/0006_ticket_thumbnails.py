@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_ticket_review_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Miniatures'),
+        ),
+    ]
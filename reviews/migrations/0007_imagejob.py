@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:50
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_ticket_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('running', 'En cours'), ('failed', 'Échec')], default='pending', max_length=8, verbose_name='Statut')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('time_created', models.DateTimeField(auto_now_add=True, verbose_name='Date de création')),
+                ('time_updated', models.DateTimeField(auto_now=True, verbose_name='Dernière mise à jour')),
+                ('ticket', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_jobs', to='reviews.ticket', verbose_name='Ticket')),
+            ],
+            options={
+                'verbose_name': "Traitement d'image",
+                'indexes': [models.Index(fields=['status', 'time_created'], name='image_job_queue_idx')],
+            },
+        ),
+    ]
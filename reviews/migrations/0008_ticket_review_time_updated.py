@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:59
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_time_created(apps, schema_editor):
+    """Les posts existants n'ont pas été modifiés depuis leur création."""
+    for model_name in ('Ticket', 'Review'):
+        model = apps.get_model('reviews', model_name)
+        model.objects.update(time_updated=F('time_created'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0007_imagejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='time_updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Date de modification'),
+        ),
+        migrations.AddField(
+            model_name='ticket',
+            name='time_updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='Date de modification'),
+        ),
+        migrations.RunPython(copy_time_created, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['user', 'time_updated'], name='review_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', 'time_updated'], name='ticket_user_updated_idx'),
+        ),
+    ]
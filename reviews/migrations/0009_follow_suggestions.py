@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_ticket_review_time_updated'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SuggestionRefresh',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+                ('time_requested', models.DateTimeField(auto_now=True, verbose_name='Date de la demande')),
+            ],
+            options={
+                'verbose_name': 'Suggestions à recalculer',
+                'verbose_name_plural': 'Suggestions à recalculer',
+            },
+        ),
+        migrations.CreateModel(
+            name='FollowSuggestion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(verbose_name='Score')),
+                ('suggested_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur suggéré')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follow_suggestions', to=settings.AUTH_USER_MODEL, verbose_name='Utilisateur')),
+            ],
+            options={
+                'verbose_name': "Suggestion d'abonnement",
+                'constraints': [models.UniqueConstraint(fields=('user', 'suggested_user'), name='unique_follow_suggestion')],
+            },
+        ),
+    ]
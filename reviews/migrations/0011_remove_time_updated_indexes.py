@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-18 19:34
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0010_user_username_lower_idx'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='review',
+            name='review_user_updated_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_user_updated_idx',
+        ),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.db.models.functions import Lower
 
 
 class User(AbstractUser):
@@ -11,6 +12,18 @@ class User(AbstractUser):
 
     class Meta:
         verbose_name = "Utilisateur"
+        indexes = [
+            # Autocomplétion insensible à la casse : recherche par
+            # intervalle sur Lower(username) (voir search.py)
+            models.Index(Lower('username'), name='user_username_lower_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        user = super().from_db(db, field_names, values)
+        # Nom enregistré, pour invalider les pages après un renommage
+        user._loaded_username = user.__dict__.get('username')
+        return user
 
     def __str__(self):
         return self.username
@@ -30,9 +43,72 @@ class Ticket(models.Model):
         verbose_name="Auteur"
         )
     image = models.ImageField(null=True, blank=True, verbose_name="Image")
+    # Chemins des miniatures : {largeur: {format: chemin}} (thumbnails.py)
+    thumbnails = models.JSONField(
+        default=dict, blank=True, editable=False, verbose_name="Miniatures"
+        )
     time_created = models.DateTimeField(
         auto_now_add=True, verbose_name="Date de création"
         )
+    # Mis à jour à chaque modification visible (y compris par les UPDATE
+    # dédiés), pour les fragments en cache (ticket_snippet.html)
+    time_updated = models.DateTimeField(
+        auto_now=True, verbose_name="Date de modification"
+        )
+    # Statistiques dénormalisées, maintenues par des UPDATE atomiques
+    # (voir signals.py) et réparables avec `recompute_ticket_stats`
+    review_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Nombre de critiques"
+        )
+    rating_sum = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Somme des notes"
+        )
+
+    # Champs mis à jour par des UPDATE dédiés, hors du formulaire
+    MAINTAINED_FIELDS = ('review_count', 'rating_sum', 'thumbnails')
+
+    def save(self, *args, **kwargs):
+        # Une mise à jour ne doit pas écraser ces champs avec les
+        # valeurs (peut-être périmées) chargées en mémoire
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            excluded = {*self.MAINTAINED_FIELDS, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in excluded
+            ]
+        super().save(*args, **kwargs)
+
+    @property
+    def average_rating(self):
+        """Note moyenne des critiques, ou None sans critique."""
+        if not self.review_count:
+            return None
+        return self.rating_sum / self.review_count
+
+    def _thumbnail_srcset(self, fmt):
+        return ', '.join(
+            f'{self.image.storage.url(variants[fmt])} {width}w'
+            for width, variants in self.thumbnails.items()
+            if fmt in variants
+        )
+
+    @property
+    def webp_srcset(self):
+        """Attribut srcset des miniatures WebP."""
+        return self._thumbnail_srcset('webp')
+
+    @property
+    def jpeg_srcset(self):
+        """Attribut srcset des miniatures JPEG."""
+        return self._thumbnail_srcset('jpeg')
+
+    @property
+    def thumbnail_url(self):
+        """Plus petite miniature JPEG, ou l'image d'origine à défaut."""
+        for width in sorted(self.thumbnails, key=int):
+            if 'jpeg' in self.thumbnails[width]:
+                return self.image.storage.url(self.thumbnails[width]['jpeg'])
+        return self.image.url
 
     def user_has_reviewed(self, user):
         """Vérifie si l'utilisateur a déjà créé une critique pour ce ticket"""
@@ -41,6 +117,12 @@ class Ticket(models.Model):
     class Meta:
         ordering = ['-time_created']
         verbose_name = "Ticket"
+        indexes = [
+            models.Index(
+                fields=['user', '-time_created'],
+                name='ticket_user_time_idx'
+            ),
+        ]
 
 
 class Review(models.Model):
@@ -68,10 +150,33 @@ class Review(models.Model):
     time_created = models.DateTimeField(
         auto_now_add=True, verbose_name="Date de la création"
         )
+    time_updated = models.DateTimeField(
+        auto_now=True, verbose_name="Date de modification"
+        )
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        review = super().from_db(db, field_names, values)
+        # Note enregistrée, pour répercuter une modification sur le ticket
+        review._loaded_rating = review.__dict__.get('rating')
+        return review
 
     class Meta:
         ordering = ['-time_created']
         verbose_name = "Critique"
+        indexes = [
+            models.Index(
+                fields=['user', '-time_created'],
+                name='review_user_time_idx'
+            ),
+        ]
+        constraints = [
+            # Une seule critique par utilisateur et par ticket
+            models.UniqueConstraint(
+                fields=['ticket', 'user'],
+                name='unique_review_per_ticket_user'
+            ),
+        ]
 
 
 class UserFollows(models.Model):
@@ -98,3 +203,159 @@ class UserFollows(models.Model):
 
     def __str__(self):
         return f"{self.user.username} suit {self.followed_user.username}"
+
+
+class FeedEntry(models.Model):
+    """
+    Entrée du flux matérialisé (mode "push") : un post visible
+    dans le flux d'un utilisateur.
+    """
+    TICKET = 'TICKET'
+    REVIEW = 'REVIEW'
+    CONTENT_TYPE_CHOICES = [
+        (TICKET, "Ticket"),
+        (REVIEW, "Critique"),
+    ]
+
+    owner = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name="Propriétaire du flux"
+    )
+    author = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Auteur du post"
+    )
+    content_type = models.CharField(
+        max_length=6, choices=CONTENT_TYPE_CHOICES, verbose_name="Type"
+    )
+    post_id = models.PositiveBigIntegerField(
+        verbose_name="Identifiant du post"
+        )
+    time_created = models.DateTimeField(verbose_name="Date du post")
+
+    class Meta:
+        verbose_name = "Entrée de flux"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['owner', 'content_type', 'post_id'],
+                name='unique_feed_entry'
+            ),
+        ]
+        indexes = [
+            # Lecture d'une page du flux : un seul parcours d'index
+            models.Index(
+                fields=['owner', '-time_created', '-content_type', '-post_id'],
+                name='feed_entry_page_idx'
+            ),
+            # Nettoyage lors de la suppression d'un post
+            models.Index(
+                fields=['content_type', 'post_id'],
+                name='feed_entry_post_idx'
+            ),
+        ]
+
+
+class ImageJob(models.Model):
+    """
+    Traitement d'image en attente pour un ticket, exécuté par la commande
+    `run_workers`. Les tâches réussies sont supprimées.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, "En attente"),
+        (RUNNING, "En cours"),
+        (FAILED, "Échec"),
+    ]
+
+    ticket = models.ForeignKey(
+        to=Ticket,
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+        verbose_name="Ticket"
+    )
+    status = models.CharField(
+        max_length=8, choices=STATUS_CHOICES, default=PENDING,
+        verbose_name="Statut"
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0, verbose_name="Tentatives"
+    )
+    error = models.TextField(blank=True, verbose_name="Dernière erreur")
+    time_created = models.DateTimeField(
+        auto_now_add=True, verbose_name="Date de création"
+    )
+    time_updated = models.DateTimeField(
+        auto_now=True, verbose_name="Dernière mise à jour"
+    )
+
+    class Meta:
+        verbose_name = "Traitement d'image"
+        indexes = [
+            models.Index(
+                fields=['status', 'time_created'],
+                name='image_job_queue_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f"Image du ticket {self.ticket_id} ({self.status})"
+
+
+class FollowSuggestion(models.Model):
+    """
+    Utilisateur suggéré à un autre (« Qui suivre ? »), précalculé par la
+    commande `compute_suggestions` (voir suggestions.py).
+    """
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='follow_suggestions',
+        verbose_name="Utilisateur"
+    )
+    suggested_user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name="Utilisateur suggéré"
+    )
+    score = models.FloatField(verbose_name="Score")
+
+    class Meta:
+        verbose_name = "Suggestion d'abonnement"
+        constraints = [
+            # Son index sert aussi à lire les suggestions d'un utilisateur
+            models.UniqueConstraint(
+                fields=['user', 'suggested_user'],
+                name='unique_follow_suggestion'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.suggested_user_id} suggéré à {self.user_id}"
+
+
+class SuggestionRefresh(models.Model):
+    """
+    Utilisateur dont les suggestions sont à recalculer, ses abonnements
+    ayant changé depuis le dernier calcul.
+    """
+    user = models.OneToOneField(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+        verbose_name="Utilisateur"
+    )
+    time_requested = models.DateTimeField(
+        auto_now=True, verbose_name="Date de la demande"
+    )
+
+    class Meta:
+        verbose_name = "Suggestions à recalculer"
+        verbose_name_plural = "Suggestions à recalculer"
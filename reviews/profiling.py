@@ -0,0 +1,84 @@
+"""
+Profilage des requêtes par échantillonnage (voir ProfilingMiddleware).
+
+Les profils cProfile sont enregistrés dans PROFILING_DIR, un
+sous-dossier par vue (nom d'URL), en ne gardant que les
+PROFILING_MAX_FILES plus récents par vue. La commande `profile_report`
+les fusionne et affiche les fonctions les plus coûteuses de chaque vue.
+"""
+import os
+import pstats
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core import signing
+
+TOKEN_SALT = 'reviews.profiling'
+
+
+def make_profile_token():
+    """
+    Jeton signé à placer dans l'en-tête PROFILING_HEADER pour profiler
+    une requête précise (valable PROFILING_TOKEN_MAX_AGE secondes).
+    """
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign('profile')
+
+
+def is_valid_profile_token(token):
+    try:
+        signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=settings.PROFILING_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def _view_dir(url_name):
+    return Path(settings.PROFILING_DIR) / (url_name or '_unresolved')
+
+
+def save_profile(profiler, url_name):
+    """Enregistre un profil et supprime les plus anciens de la vue."""
+    directory = _view_dir(url_name)
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / f'{time.time_ns()}-{uuid.uuid4().hex[:8]}.prof'
+    profiler.dump_stats(path)
+
+    profiles = sorted(directory.glob('*.prof'))
+    for old in profiles[:-settings.PROFILING_MAX_FILES]:
+        try:
+            old.unlink()
+        except FileNotFoundError:
+            # Déjà supprimé par un autre processus
+            pass
+    return path
+
+
+def view_names():
+    """Vues pour lesquelles des profils ont été enregistrés."""
+    root = Path(settings.PROFILING_DIR)
+    if not root.is_dir():
+        return []
+    return sorted(
+        entry.name for entry in os.scandir(root)
+        if entry.is_dir() and any(Path(entry.path).glob('*.prof')))
+
+
+def merged_stats(url_name, stream=None):
+    """
+    Fusionne les profils d'une vue ; retourne (pstats.Stats, nombre de
+    profils), ou (None, 0) s'il n'y en a aucun.
+    """
+    paths = sorted(str(path) for path in _view_dir(url_name).glob('*.prof'))
+    if not paths:
+        return None, 0
+    stats = pstats.Stats(paths[0], stream=stream)
+    for path in paths[1:]:
+        try:
+            stats.add(path)
+        except (EOFError, ValueError, TypeError):
+            # Profil en cours d'écriture ou tronqué
+            continue
+    return stats, len(paths)
@@ -0,0 +1,179 @@
+"""
+Recherche plein texte dans les tickets et les critiques, et
+autocomplétion des noms d'utilisateurs.
+
+Sous SQLite, la recherche s'appuie sur la table virtuelle FTS5
+`reviews_search` (titre + texte de chaque post), tenue à jour par des
+triggers. Le rowid encode le post : id * 2 pour un ticket, id * 2 + 1
+pour une critique, ce qui permet de mettre à jour une entrée sans
+parcourir l'index.
+
+La table et les triggers sont (re)créés après chaque `migrate` (voir
+install_search_index) : sous SQLite, les migrations qui reconstruisent
+une table suppriment ses triggers.
+"""
+import re
+from collections import namedtuple
+
+from django.db import connection
+from django.db.models import CharField, Q, Value
+from django.db.models.functions import Lower
+
+from .loaders import load_feed_posts, mark_already_reviewed
+from .models import Ticket, Review, FeedEntry, User
+
+SEARCH_TABLE = 'reviews_search'
+
+SearchPage = namedtuple('SearchPage', ['posts', 'number', 'has_next'])
+
+_TRIGGERS = {
+    Ticket: ('ticket', 0, 'title', 'description'),
+    Review: ('review', 1, 'headline', 'body'),
+}
+
+
+def _trigger_statements(model):
+    name, offset, title, body = _TRIGGERS[model]
+    table = model._meta.db_table
+    insert = (
+        f"INSERT INTO {SEARCH_TABLE}(rowid, title, body) "
+        f"VALUES (new.id * 2 + {offset}, new.{title}, new.{body});"
+    )
+    delete = f"DELETE FROM {SEARCH_TABLE} WHERE rowid = old.id * 2 + {offset};"
+    return [
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_{name}_insert "
+        f"AFTER INSERT ON {table} BEGIN {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_{name}_update "
+        f"AFTER UPDATE OF {title}, {body} ON {table} "
+        f"BEGIN {delete} {insert} END",
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_{name}_delete "
+        f"AFTER DELETE ON {table} BEGIN {delete} END",
+    ]
+
+
+def is_fts_available(using=connection):
+    return using.vendor == 'sqlite'
+
+
+def install_search_index(using=connection):
+    """
+    Crée la table FTS5 et ses triggers s'ils n'existent pas, et remplit
+    l'index lors de sa création.
+    """
+    if not is_fts_available(using):
+        return
+    with using.cursor() as cursor:
+        created = SEARCH_TABLE not in using.introspection.table_names(cursor)
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+            "USING fts5(title, body, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+        for model in _TRIGGERS:
+            for statement in _trigger_statements(model):
+                cursor.execute(statement)
+    if created:
+        rebuild_search_index(using)
+
+
+def rebuild_search_index(using=connection):
+    """Reconstruit entièrement l'index de recherche."""
+    if not is_fts_available(using):
+        return
+    with using.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for model, (_, offset, title, body) in _TRIGGERS.items():
+            cursor.execute(
+                f"INSERT INTO {SEARCH_TABLE}(rowid, title, body) "
+                f"SELECT id * 2 + {offset}, {title}, {body} "
+                f"FROM {model._meta.db_table}"
+            )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')")
+
+
+def search_terms(query):
+    """Mots de la recherche, sans la syntaxe propre à FTS5."""
+    return re.findall(r'\w+', query.lower())
+
+
+def _fts_rows(terms, offset, limit):
+    # Chaque mot est cherché comme préfixe ; tous doivent être présents.
+    # Le titre pèse deux fois plus que le texte dans le classement.
+    match = ' '.join(f'"{term}"*' for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s "
+            f"ORDER BY bm25({SEARCH_TABLE}, 2.0, 1.0) LIMIT %s OFFSET %s",
+            [match, limit, offset]
+        )
+        return [
+            {'id': rowid // 2,
+             'content_type': (FeedEntry.REVIEW if rowid % 2
+                              else FeedEntry.TICKET)}
+            for rowid, in cursor.fetchall()
+        ]
+
+
+def _icontains_rows(terms, offset, limit):
+    # Repli sans FTS5 : parcours complet, du plus récent au plus ancien
+    ticket_filter, review_filter = Q(), Q()
+    for term in terms:
+        ticket_filter &= (
+            Q(title__icontains=term) | Q(description__icontains=term))
+        review_filter &= (
+            Q(headline__icontains=term) | Q(body__icontains=term))
+    tickets = Ticket.objects.filter(ticket_filter).annotate(
+        content_type=Value(FeedEntry.TICKET, CharField()))
+    reviews = Review.objects.filter(review_filter).annotate(
+        content_type=Value(FeedEntry.REVIEW, CharField()))
+    fields = ('id', 'time_created', 'content_type')
+    return list(
+        tickets.order_by().values(*fields).union(
+            reviews.order_by().values(*fields), all=True
+        ).order_by('-time_created', '-content_type', '-id')
+        [offset:offset + limit]
+    )
+
+
+def search_posts(query, user, page=1, per_page=20):
+    """
+    Retourne une page de résultats (posts chargés pour les snippets),
+    du plus pertinent au moins pertinent.
+    """
+    terms = search_terms(query)
+    if not terms:
+        return SearchPage([], page, False)
+
+    find_rows = _fts_rows if is_fts_available() else _icontains_rows
+    rows = find_rows(terms, (page - 1) * per_page, per_page + 1)
+    has_next = len(rows) > per_page
+    rows = mark_already_reviewed(rows[:per_page], user)
+    return SearchPage(load_feed_posts(rows), page, has_next)
+
+
+def _prefix_range(prefix):
+    """Bornes [début, fin) des chaînes qui commencent par `prefix`."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def autocomplete_usernames(prefix, user=None, limit=10):
+    """
+    Noms des utilisateurs actifs qui commencent par `prefix` (sans tenir
+    compte de la casse), par ordre alphabétique, hors `user`.
+
+    La recherche par intervalle sur Lower(username), plutôt qu'un LIKE,
+    parcourt l'index user_username_lower_idx et s'arrête aux `limit`
+    premiers noms. SQLite ne passe en minuscules que les lettres ASCII.
+    """
+    prefix = prefix.strip().lower()
+    if not prefix:
+        return []
+    start, end = _prefix_range(prefix)
+    users = User.objects.alias(lower=Lower('username')).filter(
+        lower__gte=start, lower__lt=end, is_active=True)
+    if user is not None:
+        users = users.exclude(pk=user.pk)
+    return list(users.order_by('lower').values_list(
+        'username', flat=True)[:limit])
@@ -0,0 +1,236 @@
+"""
+Génération de données synthétiques pour les tests de charge
+(commande `seed_litreview`).
+
+Le graphe d'abonnements suit une loi de puissance : quelques comptes
+populaires concentrent la plupart des abonnés et publient le plus.
+Les données ne dépendent que de la graine et des paramètres : les dates
+sont réparties sur les `days` jours précédant une date fixe (END par
+défaut), et non le jour courant.
+
+Tout est inséré avec bulk_create, par lots : les statistiques des
+tickets sont calculées avant l'insertion, l'index de recherche est
+alimenté par ses triggers, mais le flux matérialisé (mode "push") doit
+être reconstruit avec `rebuild_feed`.
+"""
+import bisect
+import itertools
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from io import BytesIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from .bulk import bulk_insert, explicit_timestamps
+from .models import Ticket, Review, UserFollows
+
+User = get_user_model()
+
+PASSWORD = 'testpass123'
+
+# Fin de la période couverte par les posts, par défaut
+END = datetime(2026, 1, 1, tzinfo=dt_timezone.utc)
+
+WORDS = (
+    'livre', 'roman', 'histoire', 'poème', 'essai', 'article', 'auteur',
+    'lecture', 'chapitre', 'personnage', 'intrigue', 'style', 'récit',
+    'voyage', 'mer', 'ville', 'nuit', 'jardin', 'hiver', 'été', 'guerre',
+    'amour', 'mémoire', 'enfance', 'science', 'politique', 'philosophie',
+    'fantastique', 'policier', 'biographie', 'classique', 'moderne',
+    'surprenant', 'captivant', 'long', 'court', 'dense', 'léger', 'sombre',
+    'lumineux', 'le', 'la', 'un', 'une', 'des', 'et', 'de', 'très', 'bien',
+)
+
+PLACEHOLDER_COLORS = ('#8e9aaf', '#cbc0d3', '#efd3d7', '#feeafa',
+                      '#dee2ff', '#a3c4bc', '#f4a261', '#2a9d8f')
+
+
+class PowerLaw:
+    """Tirage d'indices 0..n-1 de poids proportionnels à 1 / (rang + 1)^a."""
+
+    def __init__(self, rng, n, exponent):
+        self.rng = rng
+        self.cum_weights = list(itertools.accumulate(
+            (rank + 1) ** -exponent for rank in range(n)))
+
+    def sample(self):
+        x = self.rng.random() * self.cum_weights[-1]
+        return bisect.bisect_right(self.cum_weights, x)
+
+
+def _text(rng, words):
+    return ' '.join(rng.choices(WORDS, k=words)).capitalize()
+
+
+def _placeholder_images(count):
+    """Enregistre `count` images unies et retourne leurs chemins."""
+    names = []
+    for color in PLACEHOLDER_COLORS[:count]:
+        buffer = BytesIO()
+        Image.new('RGB', (400, 600), color).save(buffer, format='JPEG')
+        names.append(default_storage.save(
+            f'seed/placeholder_{color[1:]}.jpg',
+            ContentFile(buffer.getvalue())))
+    return names
+
+
+class Seeder:
+    """
+    Génère et insère un jeu de données. Les tickets et les critiques sont
+    d'abord planifiés (indices et dates, en mémoire), puis insérés par lots.
+    """
+
+    def __init__(self, users, follows_per_user, tickets, reviews, seed=0,
+                 images=0.0, days=365, end=END, prefix='user',
+                 batch_size=5000, exponent=1.1, log=print):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.follows_per_user = min(follows_per_user, users - 1)
+        self.tickets = tickets
+        self.reviews = reviews
+        self.images = images
+        self.prefix = prefix
+        self.batch_size = batch_size
+        self.log = log
+        self.end = end
+        self.span = timedelta(days=days).total_seconds()
+        # Le rang de popularité de chaque utilisateur est tiré au hasard
+        self.popularity = PowerLaw(self.rng, users, exponent)
+        self.ranked_users = list(range(users))
+        self.rng.shuffle(self.ranked_users)
+
+    def popular_user(self):
+        return self.ranked_users[self.popularity.sample()]
+
+    def run(self):
+        user_ids = self.create_users()
+        follows = self.create_follows(user_ids)
+        self.log(f"{len(user_ids)} utilisateurs, {follows} abonnements.")
+
+        tickets = self.plan_tickets()
+        reviews = self.plan_reviews(tickets)
+        with explicit_timestamps(Ticket, Review):
+            ticket_ids = self.create_tickets(user_ids, tickets)
+            self.log(f"{len(ticket_ids)} tickets.")
+            count = self.create_reviews(user_ids, ticket_ids, reviews)
+            self.log(f"{count} critiques.")
+
+    def create_users(self):
+        password = make_password(PASSWORD)
+        width = len(str(self.users - 1))
+        bulk_insert(User, (
+            User(username=f'{self.prefix}{i:0{width}d}', password=password)
+            for i in range(self.users)
+        ), self.batch_size)
+        ids = dict(User.objects.filter(
+            username__startswith=self.prefix
+        ).values_list('username', 'pk'))
+        return [ids[f'{self.prefix}{i:0{width}d}'] for i in range(self.users)]
+
+    def create_follows(self, user_ids):
+        def follows():
+            for follower in range(self.users):
+                followed = set()
+                while len(followed) < self.follows_per_user:
+                    candidate = self.popular_user()
+                    if candidate != follower:
+                        followed.add(candidate)
+                for index in sorted(followed):
+                    yield UserFollows(user_id=user_ids[follower],
+                                      followed_user_id=user_ids[index])
+        return bulk_insert(UserFollows, follows(), self.batch_size)
+
+    def random_time(self, after=None):
+        start = after if after is not None else -self.span
+        return start + self.rng.random() * (0 - start)
+
+    def plan_tickets(self):
+        """
+        Liste de [auteur, date (s avant la fin), nb critiques, somme des
+        notes], par date croissante comme en production.
+        """
+        tickets = [
+            [self.popular_user(), self.random_time(), 0, 0]
+            for _ in range(self.tickets)
+        ]
+        tickets.sort(key=lambda ticket: ticket[1])
+        return tickets
+
+    def plan_reviews(self, tickets):
+        """
+        Liste de (ticket, auteur, note, date) ; une critique au plus par
+        utilisateur et par ticket. Les tickets des comptes populaires
+        reçoivent plus de critiques.
+        """
+        if not tickets:
+            return []
+        by_author = {}
+        for index, ticket in enumerate(tickets):
+            by_author.setdefault(ticket[0], []).append(index)
+
+        reviews = []
+        seen = set()
+        attempts = 0
+        while len(reviews) < self.reviews and attempts < self.reviews * 10:
+            attempts += 1
+            candidates = by_author.get(self.popular_user())
+            if not candidates:
+                continue
+            index = self.rng.choice(candidates)
+            reviewer = self.rng.randrange(self.users)
+            if reviewer == tickets[index][0] or (index, reviewer) in seen:
+                continue
+            seen.add((index, reviewer))
+            rating = min(5, max(0, round(self.rng.gauss(3.5, 1.2))))
+            tickets[index][2] += 1
+            tickets[index][3] += rating
+            reviews.append((index, reviewer, rating,
+                            self.random_time(after=tickets[index][1])))
+        reviews.sort(key=lambda review: review[3])
+        return reviews
+
+    def timestamp(self, offset):
+        return self.end + timedelta(seconds=offset)
+
+    def create_tickets(self, user_ids, tickets):
+        images = []
+        if self.images:
+            images = _placeholder_images(len(PLACEHOLDER_COLORS))
+        ids = []
+
+        def objects():
+            for author, offset, review_count, rating_sum in tickets:
+                created = self.timestamp(offset)
+                image = None
+                if images and self.rng.random() < self.images:
+                    image = self.rng.choice(images)
+                yield Ticket(
+                    user_id=user_ids[author],
+                    title=_text(self.rng, self.rng.randint(2, 6)),
+                    description=_text(self.rng, self.rng.randint(0, 40)),
+                    image=image,
+                    time_created=created, time_updated=created,
+                    review_count=review_count, rating_sum=rating_sum,
+                )
+
+        bulk_insert(Ticket, objects(), self.batch_size, on_batch=lambda batch:
+                    ids.extend(ticket.pk for ticket in batch))
+        return ids
+
+    def create_reviews(self, user_ids, ticket_ids, reviews):
+        def objects():
+            for index, reviewer, rating, offset in reviews:
+                created = self.timestamp(offset)
+                yield Review(
+                    ticket_id=ticket_ids[index],
+                    user_id=user_ids[reviewer],
+                    rating=rating,
+                    headline=_text(self.rng, self.rng.randint(2, 8)),
+                    body=_text(self.rng, self.rng.randint(0, 80)),
+                    time_created=created, time_updated=created,
+                )
+        return bulk_insert(Review, objects(), self.batch_size)
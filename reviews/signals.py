@@ -0,0 +1,171 @@
+"""
+Signaux de l'application :
+- maintien du flux matérialisé (mode "push") ;
+- invalidation du flux en cache et des pages validées par ETag ;
+- statistiques des critiques dénormalisées sur Ticket ;
+- suggestions d'abonnements à recalculer ;
+- installation de l'index de recherche après les migrations.
+"""
+from django.db.models import F, QuerySet
+from django.db.models.functions import Greatest, Now
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.db import connections
+from django.dispatch import receiver
+
+from . import feed
+from .search import install_search_index
+from .suggestions import mark_suggestions_stale
+from .cache import (bump_feed_versions_on_commit,
+                    bump_usernames_version_on_commit)
+from .models import Ticket, Review, User, UserFollows
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=Review)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Distribue un nouveau post dans les flux de l'auteur et des abonnés."""
+    if created and feed.is_push_mode():
+        feed.fan_out(instance)
+
+
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Review)
+def remove_deleted_post(sender, instance, **kwargs):
+    """Retire un post supprimé des flux matérialisés."""
+    if feed.is_push_mode():
+        feed.remove_post(instance)
+
+
+@receiver(post_save, sender=UserFollows)
+def backfill_new_follow(sender, instance, created, **kwargs):
+    """Ajoute au flux de l'abonné les posts existants du suivi."""
+    if created and feed.is_push_mode():
+        feed.backfill_feed(instance.user_id, [instance.followed_user_id])
+
+
+@receiver(pre_delete, sender=UserFollows)
+def prune_deleted_follow(sender, instance, **kwargs):
+    """Retire du flux de l'abonné les posts de l'ancien suivi."""
+    if not feed.is_push_mode():
+        return
+    origin = kwargs.get('origin')
+    followed_ids = [instance.followed_user_id]
+    if isinstance(origin, QuerySet) and origin.model is UserFollows:
+        # QuerySet.delete() envoie un signal par abonnement : les flux
+        # sont élagués au premier signal de chaque abonné, pour tous ses
+        # abonnements supprimés (encore lisibles avant la suppression)
+        pruned = vars(origin).setdefault('_pruned_feeds', set())
+        if instance.user_id in pruned:
+            return
+        pruned.add(instance.user_id)
+        followed_ids = origin.filter(
+            user_id=instance.user_id).values_list('followed_user', flat=True)
+    feed.prune_feed(instance.user_id, followed_ids)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Ticket)
+@receiver(post_delete, sender=Review)
+def invalidate_followers_feed(sender, instance, **kwargs):
+    """
+    Invalide le flux en cache de ceux qui voient un post créé, modifié ou
+    supprimé (voir feed.post_audience_ids). L'auteur d'une critique voit
+    aussi changer `already_reviewed` sur le ticket critiqué.
+    """
+    # Lecteurs lus maintenant : une suppression en cascade de l'auteur
+    # aura supprimé ses abonnements à la validation
+    bump_feed_versions_on_commit(feed.post_audience_ids(instance))
+
+
+@receiver(post_save, sender=UserFollows)
+@receiver(post_delete, sender=UserFollows)
+def invalidate_follower_feed(sender, instance, **kwargs):
+    """
+    Invalide le flux en cache d'un utilisateur qui (ne) suit (plus), et
+    la page des abonnements de l'utilisateur suivi.
+    """
+    bump_feed_versions_on_commit(
+        [instance.user_id, instance.followed_user_id])
+
+
+@receiver(post_save, sender=User)
+def invalidate_pages_on_rename(sender, instance, created, **kwargs):
+    """Les pages qui affichent l'ancien nom ne sont plus valides."""
+    loaded_username = getattr(instance, '_loaded_username', None)
+    if not created and loaded_username is not None and \
+            loaded_username != instance.username:
+        bump_usernames_version_on_commit()
+    instance._loaded_username = instance.username
+
+
+def _deleted_user_ids(origin):
+    """Comptes supprimés par la suppression `origin`, s'il y en a."""
+    if isinstance(origin, User):
+        return {origin.pk}
+    if isinstance(origin, QuerySet) and origin.model is User:
+        # Lus une fois, avant la suppression des comptes (les
+        # abonnements sont supprimés d'abord)
+        if '_deleted_user_ids' not in vars(origin):
+            origin._deleted_user_ids = set(
+                origin.values_list('pk', flat=True))
+        return origin._deleted_user_ids
+    return set()
+
+
+@receiver(post_save, sender=UserFollows)
+@receiver(post_delete, sender=UserFollows)
+def mark_follower_suggestions_stale(sender, instance, **kwargs):
+    """Les suggestions de l'abonné dépendent de ses abonnements."""
+    origin = kwargs.get('origin')
+    if instance.user_id in _deleted_user_ids(origin):
+        # Suppression en cascade du compte de l'abonné : ses suggestions
+        # disparaissent avec lui. Celles des abonnés d'un compte supprimé
+        # sont à recalculer.
+        return
+    if isinstance(origin, QuerySet):
+        # QuerySet.delete() envoie un signal par abonnement supprimé :
+        # un seul marquage par abonné
+        marked = vars(origin).setdefault('_stale_suggestions', set())
+        if instance.user_id in marked:
+            return
+        marked.add(instance.user_id)
+    mark_suggestions_stale([instance.user_id])
+
+
+@receiver(post_save, sender=Review)
+def update_ticket_stats_on_save(sender, instance, created, **kwargs):
+    """Répercute une nouvelle critique, ou un changement de note."""
+    rating = int(instance.rating)
+    if created:
+        Ticket.objects.filter(pk=instance.ticket_id).update(
+            review_count=F('review_count') + 1,
+            rating_sum=F('rating_sum') + rating,
+            time_updated=Now(),
+        )
+    else:
+        loaded_rating = getattr(instance, '_loaded_rating', None)
+        if loaded_rating is not None and loaded_rating != rating:
+            Ticket.objects.filter(pk=instance.ticket_id).update(
+                rating_sum=Greatest(
+                    F('rating_sum') + (rating - loaded_rating), 0),
+                time_updated=Now(),
+            )
+    instance._loaded_rating = rating
+
+
+@receiver(post_delete, sender=Review)
+def update_ticket_stats_on_delete(sender, instance, **kwargs):
+    """Retire une critique supprimée des statistiques de son ticket."""
+    # Greatest() évite de violer la contrainte >= 0 si les statistiques
+    # ont dérivé (elles se réparent avec `recompute_ticket_stats`)
+    Ticket.objects.filter(pk=instance.ticket_id).update(
+        review_count=Greatest(F('review_count') - 1, 0),
+        rating_sum=Greatest(F('rating_sum') - int(instance.rating), 0),
+        time_updated=Now(),
+    )
+
+
+def install_search_index_after_migrate(sender, using, **kwargs):
+    """(Ré)installe la table FTS5 et ses triggers (connecté dans apps.py)."""
+    install_search_index(connections[using])
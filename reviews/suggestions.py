@@ -0,0 +1,106 @@
+"""
+Suggestions d'abonnements (« Qui suivre ? »).
+
+Le score d'un candidat pour un utilisateur combine :
+- le nombre de ses abonnements qui suivent le candidat (amis d'amis) ;
+- le nombre de tickets critiqués par tous les deux (co-critiques),
+  pondéré par FOLLOW_SUGGESTIONS_CO_REVIEW_WEIGHT.
+
+Les FOLLOW_SUGGESTIONS_COUNT meilleurs candidats sont enregistrés dans
+FollowSuggestion par la commande `compute_suggestions` : la page des
+abonnements lit ces lignes sans parcourir le graphe. Un changement
+d'abonnements place l'utilisateur dans SuggestionRefresh (voir
+signals.py) ; la commande ne recalcule alors que ces utilisateurs.
+"""
+import heapq
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .cache import bump_feed_versions_on_commit
+from .models import FollowSuggestion, Review, SuggestionRefresh, UserFollows
+
+
+def mark_suggestions_stale(user_ids):
+    """Demande le recalcul des suggestions des utilisateurs donnés."""
+    SuggestionRefresh.objects.bulk_create(
+        [SuggestionRefresh(user_id=user_id) for user_id in set(user_ids)],
+        update_conflicts=True,
+        unique_fields=['user'],
+        update_fields=['time_requested'],
+    )
+
+
+def _friends_of_friends(user_id):
+    """{candidat: nombre d'abonnements de l'utilisateur qui le suivent}"""
+    followed = UserFollows.objects.filter(
+        user_id=user_id).values('followed_user')
+    return dict(UserFollows.objects.filter(
+        user__in=followed, followed_user__is_active=True
+    ).order_by().values('followed_user').annotate(
+        count=Count('pk')).values_list('followed_user', 'count'))
+
+
+def _co_reviewers(user_id):
+    """{candidat: nombre de tickets critiqués par les deux}"""
+    tickets = Review.objects.filter(user_id=user_id).values('ticket')
+    return dict(Review.objects.filter(
+        ticket__in=tickets, user__is_active=True
+    ).exclude(user_id=user_id).order_by().values('user').annotate(
+        count=Count('pk')).values_list('user', 'count'))
+
+
+def score_candidates(user_id, count=None, co_review_weight=None):
+    """
+    Meilleurs candidats pour un utilisateur, hors lui-même et ses
+    abonnements : liste de (id, score) par score décroissant.
+    """
+    if count is None:
+        count = settings.FOLLOW_SUGGESTIONS_COUNT
+    if co_review_weight is None:
+        co_review_weight = settings.FOLLOW_SUGGESTIONS_CO_REVIEW_WEIGHT
+
+    scores = _friends_of_friends(user_id)
+    for candidate, shared in _co_reviewers(user_id).items():
+        scores[candidate] = scores.get(candidate, 0) + \
+            co_review_weight * shared
+    excluded = {user_id, *UserFollows.objects.filter(
+        user_id=user_id).values_list('followed_user', flat=True)}
+    # À score égal, les comptes les plus anciens d'abord (résultat stable)
+    return heapq.nsmallest(
+        count,
+        ((candidate, score) for candidate, score in scores.items()
+         if candidate not in excluded),
+        key=lambda item: (-item[1], item[0]))
+
+
+def refresh_suggestions(user_ids):
+    """
+    Recalcule et remplace les suggestions des utilisateurs donnés.
+    Retourne le nombre de suggestions enregistrées.
+    """
+    suggestions = [
+        FollowSuggestion(user_id=user_id, suggested_user_id=candidate,
+                         score=score)
+        for user_id in user_ids
+        for candidate, score in score_candidates(user_id)
+    ]
+    with transaction.atomic():
+        FollowSuggestion.objects.filter(user_id__in=user_ids).delete()
+        FollowSuggestion.objects.bulk_create(suggestions)
+        # Pages des abonnements validées par ETag (conditional.py)
+        bump_feed_versions_on_commit(user_ids)
+    return len(suggestions)
+
+
+def get_suggestions(user):
+    """
+    Suggestions enregistrées pour un utilisateur, sans ceux qu'il suit
+    déjà (abonnements faits depuis le dernier calcul).
+    """
+    return FollowSuggestion.objects.filter(user=user).exclude(
+        suggested_user__in=UserFollows.objects.filter(
+            user=user).values('followed_user')
+    ).select_related('suggested_user').order_by(
+        '-score', 'suggested_user_id')
@@ -0,0 +1,10 @@
+"""Filtres utilisés par les snippets des posts."""
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def authored_by(post, user):
+    """Indique si le post a été publié par l'utilisateur."""
+    return post.user_id == user.id
@@ -0,0 +1,60 @@
+"""
+Outils de test : vérification des budgets de requêtes SQL des vues
+(réglage QUERY_BUDGETS, voir middleware.py).
+"""
+from contextlib import contextmanager
+from functools import wraps
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .middleware import get_query_budget
+
+
+def iter_url_names(urlconf=None):
+    """
+    Noms des routes de la configuration d'URL, hors applications
+    incluses avec un espace de noms (admin).
+    """
+    def walk(patterns):
+        for pattern in patterns:
+            if isinstance(pattern, URLPattern) and pattern.name:
+                yield pattern.name
+            elif isinstance(pattern, URLResolver) and not pattern.namespace:
+                yield from walk(pattern.url_patterns)
+    return list(walk(get_resolver(urlconf).url_patterns))
+
+
+@contextmanager
+def assert_query_budget(test_case, url_name):
+    """
+    Vérifie que le bloc exécute au plus QUERY_BUDGETS[url_name]
+    requêtes SQL.
+    """
+    budget = get_query_budget(url_name)
+    if budget is None:
+        test_case.fail(f"Pas de budget de requêtes pour '{url_name}'.")
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    queries = '\n'.join(
+        f"{i}. {query['sql']}"
+        for i, query in enumerate(context.captured_queries, start=1))
+    test_case.assertLessEqual(
+        len(context), budget,
+        f"'{url_name}' : {len(context)} requêtes pour un budget de "
+        f"{budget}.\n{queries}")
+
+
+def query_budget(url_name):
+    """
+    Décorateur de méthode de test : toutes les requêtes SQL de la
+    méthode comptent dans le budget de la vue `url_name`.
+    """
+    def decorator(test_method):
+        @wraps(test_method)
+        def wrapper(self, *args, **kwargs):
+            with assert_query_budget(self, url_name):
+                return test_method(self, *args, **kwargs)
+        return wrapper
+    return decorator
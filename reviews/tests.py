@@ -0,0 +1,1411 @@
+import base64
+import json
+import re
+import tempfile
+from io import BytesIO, StringIO
+from datetime import timedelta
+from pathlib import Path
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.contrib.sessions.backends.cache import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import (AsyncClient, AsyncRequestFactory, Client,
+                         RequestFactory, TestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+from PIL import Image, features
+
+from . import async_views, views
+from .benchmarks.async_views import views_mode
+from .bulk import explicit_timestamps
+from .cache import get_feed_version
+from .feed import get_feed_page, rebuild_feed
+from .forms import FollowUserForm
+from .jobs import claim_jobs, requeue_stale_jobs, run_image_job
+from .management.commands.recompute_ticket_stats import (
+    recompute_ticket_stats)
+from .middleware import ProfilingMiddleware
+from .models import (FeedEntry, FollowSuggestion, ImageJob, Review,
+                     SuggestionRefresh, Ticket, User, UserFollows)
+from .profiling import merged_stats
+from .search import search_posts
+from .suggestions import get_suggestions, score_candidates
+from .testing import assert_query_budget, iter_url_names, query_budget
+
+
+def image_upload(name, color, size=(600, 400), exif=None):
+    """Image JPEG envoyée par un formulaire."""
+    buffer = BytesIO()
+    Image.new('RGB', size, color).save(
+        buffer, 'JPEG', exif=exif or Image.Exif())
+    return SimpleUploadedFile(
+        name, buffer.getvalue(), content_type='image/jpeg')
+
+
+def use_temporary_media_root(test_case):
+    """MEDIA_ROOT temporaire pour la durée du test ; retourne son chemin."""
+    media_root = tempfile.TemporaryDirectory()
+    test_case.addCleanup(media_root.cleanup)
+    media = override_settings(MEDIA_ROOT=media_root.name)
+    media.enable()
+    test_case.addCleanup(media.disable)
+    return Path(media_root.name)
+
+
+class PostLoadingQueryCountTests(TestCase):
+    """
+    Le nombre de requêtes du flux et de la page des posts ne dépend pas
+    du nombre de posts affichés.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        UserFollows.objects.create(user=cls.alice, followed_user=cls.bob)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.alice)
+
+    def create_posts(self, count):
+        """Crée des tickets d'Alice critiqués par Bob, et inversement."""
+        # Le flux en cache est invalidé à la validation de la transaction
+        with self.captureOnCommitCallbacks(execute=True):
+            self._create_posts(count)
+
+    def _create_posts(self, count):
+        for i in range(count):
+            ticket = Ticket.objects.create(title=f"Livre {i}", user=self.alice)
+            Review.objects.create(
+                ticket=ticket, rating=4, headline=f"Avis {i}", user=self.bob)
+            ticket = Ticket.objects.create(title=f"Article {i}", user=self.bob)
+            Review.objects.create(
+                ticket=ticket, rating=2, headline=f"Avis {i}", user=self.alice)
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_feed_query_count_is_constant(self):
+        self.create_posts(1)
+        expected = self.count_queries(reverse('feed'))
+        self.create_posts(5)
+        self.assertEqual(self.count_queries(reverse('feed')), expected)
+
+    def test_posts_query_count_is_constant(self):
+        self.create_posts(1)
+        expected = self.count_queries(reverse('posts'))
+        self.create_posts(5)
+        self.assertEqual(self.count_queries(reverse('posts')), expected)
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Chaque route respecte son budget de requêtes SQL (QUERY_BUDGETS),
+    avec plusieurs posts affichés pour révéler les requêtes N+1.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        UserFollows.objects.create(user=cls.alice, followed_user=cls.bob)
+        UserFollows.objects.create(user=cls.bob, followed_user=cls.alice)
+        for i in range(5):
+            ticket = Ticket.objects.create(title=f"Livre {i}", user=cls.alice)
+            Review.objects.create(
+                ticket=ticket, rating=4, headline=f"Avis {i}", user=cls.bob)
+            ticket = Ticket.objects.create(title=f"Article {i}", user=cls.bob)
+            cls.review = Review.objects.create(
+                ticket=ticket, rating=2, headline=f"Avis {i}", user=cls.alice)
+        cls.ticket = Ticket.objects.filter(user=cls.alice).first()
+        cls.other_ticket = Ticket.objects.create(title="Essai", user=cls.bob)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.alice)
+
+    def url_args(self, url_name):
+        return {
+            'edit_ticket': [self.ticket.id],
+            'delete_ticket': [self.ticket.id],
+            'create_review': [self.other_ticket.id],
+            'edit_review': [self.review.id],
+            'delete_review': [self.review.id],
+            'unfollow_user': [self.bob.id],
+        }.get(url_name, [])
+
+    def test_every_route_has_a_budget(self):
+        for url_name in iter_url_names():
+            with self.subTest(url_name=url_name):
+                self.assertIn(url_name, settings.QUERY_BUDGETS)
+
+    def test_get_routes_within_budget(self):
+        for url_name in iter_url_names():
+            url = reverse(url_name, args=self.url_args(url_name))
+            # La route de déconnexion ne doit pas fausser les suivantes
+            self.client.force_login(self.alice)
+            with self.subTest(url_name=url_name), \
+                    assert_query_budget(self, url_name):
+                self.client.get(url, {'q': 'livre'})
+
+    @query_budget('create_review')
+    def test_create_review_within_budget(self):
+        response = self.client.post(
+            reverse('create_review', args=[self.other_ticket.id]),
+            {'rating': 3, 'headline': "Bien", 'body': ""})
+        self.assertEqual(response.status_code, 302)
+
+    @query_budget('create_ticket_review')
+    def test_create_ticket_review_within_budget(self):
+        response = self.client.post(reverse('create_ticket_review'), {
+            'ticket_title': "Nouveau livre", 'ticket_description': "",
+            'rating': 5, 'headline': "Excellent", 'body': "",
+        })
+        self.assertEqual(response.status_code, 302)
+
+    def test_ticket_image_writes_within_budget(self):
+        use_temporary_media_root(self)
+        with assert_query_budget(self, 'create_ticket'):
+            response = self.client.post(reverse('create_ticket'), {
+                'title': "Nouveau livre", 'description': "",
+                'image': image_upload('red.jpg', 'red')})
+        self.assertEqual(response.status_code, 302)
+        ticket = Ticket.objects.get(title="Nouveau livre")
+        # Image traitée : la modification crée une nouvelle tâche et
+        # supprime les miniatures
+        for job_id in claim_jobs(limit=1):
+            run_image_job(job_id)
+
+        with assert_query_budget(self, 'edit_ticket'):
+            response = self.client.post(
+                reverse('edit_ticket', args=[ticket.id]), {
+                    'title': "Nouveau livre", 'description': "",
+                    'image': image_upload('blue.jpg', 'blue')})
+        self.assertEqual(response.status_code, 302)
+
+    def test_bulk_follow_within_budget(self):
+        User.objects.bulk_create(
+            User(username=f'reader{i}') for i in range(20))
+        usernames = ['bob', 'nobody'] + [f'reader{i}' for i in range(20)]
+        with assert_query_budget(self, 'bulk_follow'):
+            response = self.client.post(
+                reverse('bulk_follow'), {'usernames': usernames},
+                content_type='application/json')
+        self.assertEqual(response.json()['already_followed'], ['bob'])
+        self.assertEqual(response.json()['unknown'], ['nobody'])
+        self.assertEqual(len(response.json()['followed']), 20)
+
+    def test_bulk_unfollow_within_budget(self):
+        readers = User.objects.bulk_create(
+            User(username=f'reader{i}') for i in range(20))
+        UserFollows.objects.bulk_create(
+            UserFollows(user=self.alice, followed_user=reader)
+            for reader in readers)
+        with assert_query_budget(self, 'bulk_follow'):
+            response = self.client.delete(
+                reverse('bulk_follow'),
+                {'usernames': [reader.username for reader in readers]},
+                content_type='application/json')
+        self.assertEqual(len(response.json()['unfollowed']), 20)
+
+    @query_budget('login')
+    def test_login_within_budget(self):
+        response = Client().post(reverse('login'), {
+            'username': 'alice', 'password': 'testpass123'})
+        self.assertEqual(response.status_code, 302)
+
+
+@override_settings(FEED_MODE='push')
+class PushQueryBudgetTests(QueryBudgetTests):
+    """Mêmes budgets avec le flux matérialisé (écritures plus coûteuses)."""
+
+
+class SessionModeTests(TestCase):
+    """
+    Connexion et messages dans chaque mode de stockage des sessions
+    (settings.SESSION_ENGINES), les messages étant dans un cookie.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user('alice', password='testpass123')
+
+    def setUp(self):
+        cache.clear()
+
+    def check_messages_survive_redirects(self, mode):
+        with override_settings(SESSION_ENGINE=settings.SESSION_ENGINES[mode]):
+            client = Client()
+            response = client.post(reverse('login'), {
+                'username': 'alice', 'password': 'testpass123'}, follow=True)
+            self.assertTrue(response.context['user'].is_authenticated)
+
+            with self.captureOnCommitCallbacks(execute=True):
+                response = client.post(reverse('create_ticket'), {
+                    'title': "Livre", 'description': ""})
+            # Sans suivre la redirection, qui afficherait le message
+            self.assertRedirects(response, reverse('feed'),
+                                 fetch_redirect_response=False)
+            self.assertIn('messages', response.cookies)
+            self.assertNotIn('_messages', client.session.keys())
+
+            response = client.get(reverse('feed'))
+            self.assertContains(
+                response, "Votre ticket a été créé avec succès !")
+            self.assertTrue(response.context['user'].is_authenticated)
+            # Affiché une seule fois
+            self.assertNotContains(
+                client.get(reverse('feed')), "créé avec succès")
+
+            # La déconnexion vide la session, pas le cookie des messages
+            response = client.get(reverse('logout'), follow=True)
+            self.assertRedirects(response, reverse('home'))
+            self.assertContains(response, "Vous avez été déconnecté.")
+            self.assertFalse(response.context['user'].is_authenticated)
+
+    def test_db_sessions(self):
+        self.check_messages_survive_redirects('db')
+
+    def test_cached_db_sessions(self):
+        self.check_messages_survive_redirects('cached_db')
+
+    def test_signed_cookie_sessions(self):
+        self.check_messages_survive_redirects('signed_cookies')
+        self.assertFalse(Session.objects.exists())
+
+
+@override_settings(LOGIN_THROTTLE_RATES={'ip': (5, 1), 'username': (3, 1)})
+class LoginThrottleTests(TestCase):
+    """
+    Les tentatives de connexion en excès sont refusées (429) avant
+    authenticate().
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+
+    def setUp(self):
+        cache.clear()
+
+    def attempt(self, username, password='mauvais', ip='10.0.0.1'):
+        return Client(REMOTE_ADDR=ip).post(reverse('login'), {
+            'username': username, 'password': password})
+
+    def test_username_is_throttled_across_addresses(self):
+        for i in range(3):
+            self.assertEqual(
+                self.attempt('alice', ip=f'10.0.0.{i}').status_code, 200)
+        with mock.patch('reviews.views.authenticate') as authenticate:
+            response = self.attempt('ALICE', ip='10.0.0.9')
+        authenticate.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+        self.assertIn(int(response['Retry-After']), range(1, 61))
+        self.assertContains(
+            response, "Trop de tentatives de connexion", status_code=429)
+
+    def test_address_is_throttled_across_usernames(self):
+        for i in range(5):
+            self.assertEqual(self.attempt(f'user{i}').status_code, 200)
+        self.assertEqual(self.attempt('alice').status_code, 429)
+        self.assertEqual(
+            self.attempt('alice', ip='10.0.0.2').status_code, 200)
+
+    @override_settings(CLIENT_IP_HEADER='X-Forwarded-For',
+                       TRUSTED_PROXY_COUNT=2)
+    def test_address_is_read_behind_trusted_proxies(self):
+        def attempt(forwarded_for, username):
+            # Client -> mandataire 10.1.0.1 -> mandataire 10.2.0.1 -> Django
+            return Client(
+                REMOTE_ADDR='10.2.0.1', HTTP_X_FORWARDED_FOR=forwarded_for
+            ).post(reverse('login'), {
+                'username': username, 'password': 'mauvais'})
+
+        for i in range(5):
+            # Adresse de gauche fournie par l'attaquant : ignorée
+            response = attempt(f'1.2.3.{i}, 203.0.113.7, 10.1.0.1', f'u{i}')
+            self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            attempt('203.0.113.7, 10.1.0.1', 'alice').status_code, 429)
+        # Les autres clients du même mandataire ne sont pas bloqués
+        self.assertEqual(
+            attempt('198.51.100.4, 10.1.0.1', 'alice').status_code, 200)
+
+    def test_successful_login_refills_username_bucket(self):
+        for i in range(2):
+            self.attempt('alice', ip=f'10.0.0.{i}')
+        response = self.attempt('alice', 'testpass123', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 302)
+        for i in range(3):
+            self.assertEqual(
+                self.attempt('alice', ip=f'10.0.1.{i}').status_code, 200)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """Le profil d'une requête contient la vue, synchrone ou non."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+
+    def setUp(self):
+        cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1,
+            PROFILING_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def build_request(self, factory):
+        request = factory.get(reverse('feed'))
+        request.resolver_match = resolve(reverse('feed'))
+        request.user = self.alice
+        request.session = SessionStore()
+
+        async def auser():
+            return self.alice
+        request.auser = auser
+        return request
+
+    def profiled_functions(self):
+        stats, count = merged_stats('feed')
+        self.assertEqual(count, 1)
+        return {(Path(filename).name, function)
+                for filename, _, function in stats.stats}
+
+    def test_sync_view_is_profiled(self):
+        middleware = ProfilingMiddleware(views.feed_view)
+        response = middleware(self.build_request(RequestFactory()))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(('views.py', 'feed_view'), self.profiled_functions())
+
+    async def test_sync_view_under_asgi_is_profiled(self):
+        async def get_response(request):
+            return await sync_to_async(views.feed_view)(request)
+
+        middleware = ProfilingMiddleware(get_response)
+        # La vue appelée est synchrone, quelle que soit la configuration
+        # d'URL (ASYNC_VIEWS)
+        with mock.patch('reviews.middleware._is_async_view',
+                        return_value=False):
+            response = await middleware(
+                self.build_request(AsyncRequestFactory()))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(('views.py', 'feed_view'), self.profiled_functions())
+
+    async def test_async_view_is_profiled(self):
+        middleware = ProfilingMiddleware(async_views.feed_view)
+        # La vue appelée est asynchrone, quelle que soit la configuration
+        # d'URL (ASYNC_VIEWS)
+        with mock.patch('reviews.middleware._is_async_view',
+                        return_value=True):
+            response = await middleware(
+                self.build_request(AsyncRequestFactory()))
+        self.assertEqual(response.status_code, 200)
+        functions = self.profiled_functions()
+        self.assertIn(('async_views.py', 'feed_view'), functions)
+        self.assertIn(('feed.py', 'aget_feed_page'), functions)
+
+
+class AsyncViewsTests(TestCase):
+    """Les vues asynchrones rendent les mêmes pages que les vues WSGI."""
+
+    PAGES = ('feed', 'feed_posts', 'posts', 'subscriptions')
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        cls.carol = User.objects.create_user('carol', password='testpass123')
+        UserFollows.objects.create(user=cls.alice, followed_user=cls.bob)
+        UserFollows.objects.create(user=cls.carol, followed_user=cls.alice)
+        FollowSuggestion.objects.create(
+            user=cls.alice, suggested_user=cls.carol, score=1)
+        for author, reviewer in ((cls.alice, cls.bob), (cls.bob, cls.alice)):
+            ticket = Ticket.objects.create(
+                title=f"Livre de {author}", user=author)
+            Review.objects.create(
+                ticket=ticket, rating=4, headline=f"Avis de {reviewer}",
+                user=reviewer)
+        Ticket.objects.create(title="Sans critique", user=cls.bob)
+
+    def setUp(self):
+        cache.clear()
+
+    @staticmethod
+    def content(response):
+        # Jeton CSRF masqué différemment à chaque rendu
+        return re.sub(r'value="[^"]+" name="csrfmiddlewaretoken"|'
+                      r'name="csrfmiddlewaretoken" value="[^"]+"',
+                      'csrf', response.content.decode())
+
+    def get_pages(self, client, async_views):
+        get = async_to_sync(client.get) if async_views else client.get
+        with views_mode(async_views):
+            self.assertEqual(
+                resolve(reverse('feed')).func.__module__,
+                'reviews.async_views' if async_views else 'reviews.views')
+            return {url_name: get(reverse(url_name))
+                    for url_name in self.PAGES}
+
+    def test_pages_match_sync_views(self):
+        client, async_client = Client(), AsyncClient()
+        client.force_login(self.alice)
+        async_client.force_login(self.alice)
+        expected = self.get_pages(client, async_views=False)
+        actual = self.get_pages(async_client, async_views=True)
+        for url_name in self.PAGES:
+            with self.subTest(url_name=url_name):
+                self.assertEqual(actual[url_name].status_code, 200)
+                self.assertEqual(self.content(actual[url_name]),
+                                 self.content(expected[url_name]))
+                self.assertEqual(
+                    actual[url_name].get('X-Next-Cursor'),
+                    expected[url_name].get('X-Next-Cursor'))
+        self.assertContains(actual['feed'], "Livre de bob")
+        self.assertContains(actual['subscriptions'], "carol")
+
+    def test_anonymous_user_is_redirected(self):
+        responses = self.get_pages(AsyncClient(), async_views=True)
+        for url_name, response in responses.items():
+            with self.subTest(url_name=url_name):
+                self.assertRedirects(
+                    response,
+                    f"{reverse('home')}?next={reverse(url_name)}",
+                    fetch_redirect_response=False)
+
+
+class FeedCacheInvalidationTests(TestCase):
+    """
+    La version du flux en cache change, après validation, quand un post
+    visible ou les abonnements changent.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        cls.carol = User.objects.create_user('carol', password='testpass123')
+        UserFollows.objects.create(user=cls.alice, followed_user=cls.bob)
+        cls.ticket = Ticket.objects.create(title="Livre", user=cls.bob)
+        cls.review = Review.objects.create(
+            ticket=cls.ticket, rating=3, headline="Avis", user=cls.bob)
+        cls.other_ticket = Ticket.objects.create(title="Essai", user=cls.carol)
+
+    def setUp(self):
+        cache.clear()
+
+    def assert_invalidates(self, user, change):
+        version = get_feed_version(user.pk)
+        with self.captureOnCommitCallbacks() as callbacks:
+            change()
+            # Pas avant la validation de la transaction
+            self.assertEqual(get_feed_version(user.pk), version)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_feed_version(user.pk), version)
+
+    def test_post_changes_invalidate_followers(self):
+        def edit_ticket():
+            self.ticket.title = "Livre modifié"
+            self.ticket.save()
+
+        def edit_review():
+            self.review.rating = 5
+            self.review.save()
+
+        changes = {
+            'create_ticket': lambda: Ticket.objects.create(
+                title="Autre", user=self.bob),
+            'edit_ticket': edit_ticket,
+            'create_review': lambda: Review.objects.create(
+                ticket=self.other_ticket, rating=4, headline="Bis",
+                user=self.bob),
+            'edit_review': edit_review,
+            'delete_review': lambda: self.review.delete(),
+            'delete_ticket': lambda: self.ticket.delete(),
+        }
+        for name, change in changes.items():
+            with self.subTest(name):
+                self.assert_invalidates(self.alice, change)
+
+    def test_follow_changes_invalidate_follower(self):
+        self.assert_invalidates(self.alice, lambda: UserFollows.objects.create(
+            user=self.alice, followed_user=self.carol))
+        self.assert_invalidates(self.alice, lambda: UserFollows.objects.get(
+            user=self.alice, followed_user=self.bob).delete())
+
+    def test_cached_page_is_not_served_after_change(self):
+        self.client.force_login(self.alice)
+        self.assertNotContains(self.client.get(reverse('feed')), "Nouveau")
+        with self.captureOnCommitCallbacks(execute=True):
+            Ticket.objects.create(title="Nouveau", user=self.bob)
+        self.assertContains(self.client.get(reverse('feed')), "Nouveau")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            UserFollows.objects.filter(user=self.alice).delete()
+        self.assertNotContains(self.client.get(reverse('feed')), "Nouveau")
+
+
+class BulkFollowTests(TestCase):
+    """Abonnements et désabonnements en masse (reviews/follows.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        cls.carol = User.objects.create_user('carol', password='testpass123')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.alice)
+
+    def bulk_follow(self, method, usernames):
+        with self.captureOnCommitCallbacks(execute=True):
+            return getattr(self.client, method)(
+                reverse('bulk_follow'), {'usernames': usernames},
+                content_type='application/json')
+
+    def feed_authors(self, user):
+        return set(FeedEntry.objects.filter(
+            owner=user).values_list('author__username', flat=True))
+
+    def test_follow_skips_own_username(self):
+        response = self.bulk_follow('post', ['alice', 'bob'])
+        self.assertEqual(response.json()['followed'], ['bob'])
+        self.assertFalse(UserFollows.objects.filter(
+            user=self.alice, followed_user=self.alice).exists())
+
+    @override_settings(FEED_MODE='push')
+    def test_unfollow_prunes_materialized_feed(self):
+        for user in (self.alice, self.bob, self.carol):
+            Ticket.objects.create(title=f"Livre de {user}", user=user)
+        self.bulk_follow('post', ['bob', 'carol'])
+        self.assertEqual(
+            self.feed_authors(self.alice), {'alice', 'bob', 'carol'})
+
+        response = self.bulk_follow('delete', ['bob', 'nobody'])
+        self.assertEqual(response.json(), {
+            'unfollowed': ['bob'], 'not_followed': [], 'unknown': ['nobody']})
+        # Les posts de l'utilisateur lui-même restent dans son flux
+        self.assertEqual(self.feed_authors(self.alice), {'alice', 'carol'})
+
+    def test_unfollow_invalidates_cache_and_suggestions(self):
+        self.bulk_follow('post', ['bob'])
+        SuggestionRefresh.objects.all().delete()
+        Ticket.objects.create(title="Livre de Bob", user=self.bob)
+        self.assertContains(self.client.get(reverse('feed')), "Livre de Bob")
+
+        version = get_feed_version(self.alice.pk)
+        self.bulk_follow('delete', ['bob'])
+        self.assertNotEqual(get_feed_version(self.alice.pk), version)
+        self.assertNotContains(
+            self.client.get(reverse('feed')), "Livre de Bob")
+        self.assertTrue(
+            SuggestionRefresh.objects.filter(user=self.alice).exists())
+
+    def test_followed_user_deletion_marks_suggestions_stale(self):
+        for delete in (lambda user: user.delete(),
+                       lambda user: User.objects.filter(pk=user.pk).delete()):
+            with self.subTest(delete=delete):
+                followed = User.objects.create_user('dave')
+                UserFollows.objects.create(
+                    user=self.alice, followed_user=followed)
+                SuggestionRefresh.objects.all().delete()
+                with self.captureOnCommitCallbacks(execute=True):
+                    delete(followed)
+                self.assertTrue(SuggestionRefresh.objects.filter(
+                    user=self.alice).exists())
+
+    def test_follower_deletion_leaves_no_suggestions(self):
+        UserFollows.objects.create(user=self.bob, followed_user=self.carol)
+        bob_pk = self.bob.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.bob.delete()
+        self.assertFalse(
+            SuggestionRefresh.objects.filter(user_id=bob_pk).exists())
+
+
+class SuggestionTests(TestCase):
+    """Suggestions d'abonnements (reviews/suggestions.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        names = ('alice', 'bob', 'carol', 'dave', 'erin', 'frank', 'gina')
+        cls.users = {
+            name: User.objects.create_user(name) for name in names}
+        cls.users['henry'] = User.objects.create_user(
+            'henry', is_active=False)
+        for follower, followed in (
+                ('alice', 'bob'), ('alice', 'carol'),
+                ('bob', 'dave'), ('bob', 'erin'), ('bob', 'alice'),
+                ('bob', 'henry'),
+                ('carol', 'dave'), ('carol', 'frank'), ('carol', 'bob')):
+            UserFollows.objects.create(
+                user=cls.users[follower], followed_user=cls.users[followed])
+        # Tickets critiqués en commun : deux avec gina, un avec erin
+        tickets = [Ticket.objects.create(title=f"Livre {i}",
+                                         user=cls.users['frank'])
+                   for i in range(2)]
+        for name, reviewed in (('alice', tickets), ('gina', tickets),
+                               ('erin', tickets[:1])):
+            for ticket in reviewed:
+                Review.objects.create(ticket=ticket, rating=3,
+                                      headline="Avis", user=cls.users[name])
+
+    def ids(self, *names):
+        return [self.users[name].pk for name in names]
+
+    def test_candidates_by_score_without_self_or_followed(self):
+        candidates = score_candidates(
+            self.users['alice'].pk, count=10, co_review_weight=0.5)
+        # dave : 2 abonnements ; erin : 1 + 0,5 ; frank : 1 ; gina :
+        # 2 × 0,5 (à égalité, le compte le plus ancien d'abord)
+        self.assertEqual(candidates, list(zip(
+            self.ids('dave', 'erin', 'frank', 'gina'), [2, 1.5, 1, 1.0])))
+        self.assertEqual(
+            score_candidates(self.users['alice'].pk, count=2,
+                             co_review_weight=0.5),
+            candidates[:2])
+
+    def suggested(self, name):
+        return list(get_suggestions(self.users[name]).values_list(
+            'suggested_user__username', flat=True))
+
+    def test_only_stale_users_are_recomputed(self):
+        call_command('compute_suggestions', stdout=StringIO())
+        self.assertFalse(SuggestionRefresh.objects.exists())
+        self.assertEqual(
+            self.suggested('alice'), ['dave', 'erin', 'frank', 'gina'])
+        bob_suggestions = self.suggested('bob')
+        FollowSuggestion.objects.filter(user=self.users['bob']).delete()
+
+        UserFollows.objects.create(
+            user=self.users['alice'], followed_user=self.users['dave'])
+        self.assertEqual(list(SuggestionRefresh.objects.values_list(
+            'user', flat=True)), self.ids('alice'))
+        stdout = StringIO()
+        call_command('compute_suggestions', stdout=stdout)
+        self.assertIn("pour 1 utilisateur(s)", stdout.getvalue())
+        self.assertEqual(self.suggested('alice'), ['erin', 'frank', 'gina'])
+        # bob n'était pas à recalculer
+        self.assertEqual(self.suggested('bob'), [])
+        call_command('compute_suggestions', '--all', stdout=StringIO())
+        self.assertEqual(self.suggested('bob'), bob_suggestions)
+
+
+class ConditionalPageTests(TestCase):
+    """Revalidation des pages par ETag (reviews/conditional.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.ticket = Ticket.objects.create(title="Livre", user=cls.alice)
+
+    def setUp(self):
+        cache.clear()
+        self.client.post(reverse('login'), {
+            'username': 'alice', 'password': 'testpass123'})
+
+    def test_first_revalidation_after_login_is_not_modified(self):
+        response = self.client.get(reverse('feed'))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response.headers)
+        response = self.client.get(
+            reverse('feed'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def revalidate(self, name, etag):
+        return self.client.get(reverse(name), HTTP_IF_NONE_MATCH=etag)
+
+    def test_deletion_changes_validator(self):
+        etag = self.client.get(reverse('feed'))['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ticket.delete()
+        self.assertEqual(self.revalidate('feed', etag).status_code, 200)
+
+    def test_revalidation_reads_no_posts(self):
+        etag = self.client.get(reverse('feed'))['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.revalidate('feed', etag).status_code, 304)
+        self.assertFalse([
+            query for query in queries if 'reviews_ticket' in query['sql']
+            or 'reviews_review' in query['sql']])
+
+    def test_review_by_stranger_changes_ticket_author_pages(self):
+        # Les statistiques du ticket changent dans le flux et les posts
+        etags = {name: self.client.get(reverse(name))['ETag']
+                 for name in ('feed', 'posts')}
+        stranger = User.objects.create_user('stranger')
+        with self.captureOnCommitCallbacks(execute=True):
+            Review.objects.create(
+                ticket=self.ticket, user=stranger, rating=4, headline="Bien")
+        for name, etag in etags.items():
+            with self.subTest(name=name):
+                self.assertEqual(self.revalidate(name, etag).status_code, 200)
+
+    def test_rename_changes_validator(self):
+        bob = User.objects.create_user('bob')
+        UserFollows.objects.create(user=self.alice, followed_user=bob)
+        etag = self.client.get(reverse('subscriptions'))['ETag']
+        bob = User.objects.get(pk=bob.pk)
+        bob.username = 'robert'
+        with self.captureOnCommitCallbacks(execute=True):
+            bob.save()
+        response = self.revalidate('subscriptions', etag)
+        self.assertContains(response, 'robert')
+
+
+class TicketStatsTests(TestCase):
+    """Statistiques de critiques dénormalisées sur Ticket."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        cls.ticket = Ticket.objects.create(title="Livre", user=cls.alice)
+
+    def assert_stats(self, ticket, review_count, rating_sum):
+        ticket.refresh_from_db()
+        self.assertEqual(
+            (ticket.review_count, ticket.rating_sum),
+            (review_count, rating_sum))
+
+    def review(self, user, rating):
+        return Review.objects.create(
+            ticket=self.ticket, rating=rating, headline="Avis", user=user)
+
+    def test_create_increments_stats(self):
+        self.review(self.bob, 4)
+        self.review(self.alice, 2)
+        self.assert_stats(self.ticket, 2, 6)
+
+    def test_rating_edit_applies_difference(self):
+        created = self.review(self.bob, 4)
+        # Instance créée puis modifiée en mémoire
+        created.rating = 5
+        created.save()
+        self.assert_stats(self.ticket, 1, 5)
+        # Instance chargée depuis la base
+        loaded = Review.objects.get(pk=created.pk)
+        loaded.rating = 1
+        loaded.save()
+        self.assert_stats(self.ticket, 1, 1)
+        loaded.headline = "Sans changement de note"
+        loaded.save()
+        self.assert_stats(self.ticket, 1, 1)
+
+    def test_delete_decrements_stats(self):
+        self.review(self.bob, 4)
+        self.review(self.alice, 2).delete()
+        self.assert_stats(self.ticket, 1, 4)
+
+    def test_author_deletion_cascades_to_stats(self):
+        self.review(self.bob, 4)
+        self.review(self.alice, 2)
+        self.bob.delete()
+        self.assert_stats(self.ticket, 1, 2)
+
+    def test_ticket_deletion_cascades_to_reviews(self):
+        self.review(self.bob, 4)
+        self.ticket.delete()
+        self.assertFalse(Review.objects.exists())
+        self.assertFalse(Ticket.objects.filter(pk=self.ticket.pk).exists())
+
+    def test_stale_ticket_save_keeps_stats(self):
+        stale = Ticket.objects.get(pk=self.ticket.pk)
+        self.review(self.bob, 4)
+        stale.title = "Titre modifié"
+        stale.save()
+        self.assert_stats(self.ticket, 1, 4)
+        self.assertEqual(self.ticket.title, "Titre modifié")
+
+    def test_recompute_repairs_only_drifted_tickets(self):
+        Review.objects.create(
+            ticket=self.ticket, rating=4, headline="Avis", user=self.bob)
+        sound = Ticket.objects.create(title="Intact", user=self.bob)
+        Review.objects.create(
+            ticket=sound, rating=2, headline="Avis", user=self.alice)
+        Ticket.objects.filter(pk=self.ticket.pk).update(
+            review_count=7, rating_sum=1)
+        sound.refresh_from_db()
+
+        self.assertEqual(recompute_ticket_stats(Ticket.objects.all()), 1)
+        self.assert_stats(self.ticket, 1, 4)
+        time_updated = sound.time_updated
+        self.assert_stats(sound, 1, 2)
+        self.assertEqual(sound.time_updated, time_updated)
+
+    def test_recompute_command_repairs_drift(self):
+        self.review(self.bob, 4)
+        Ticket.objects.filter(pk=self.ticket.pk).update(
+            review_count=0, rating_sum=0)
+        out = StringIO()
+        call_command('recompute_ticket_stats', batch_size=1, stdout=out)
+        self.assert_stats(self.ticket, 1, 4)
+        self.assertIn("1 ticket(s)", out.getvalue())
+
+
+class FeedPaginationTests(TestCase):
+    """Pagination du flux par curseur (reviews/feed.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        UserFollows.objects.create(user=cls.alice, followed_user=cls.bob)
+        for i in range(4):
+            ticket = Ticket.objects.create(title=f"Livre {i}", user=cls.bob)
+            Review.objects.create(
+                ticket=ticket, rating=3, headline=f"Avis {i}", user=cls.alice)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.alice)
+
+    def expected_order(self):
+        """Posts du flux triés par (date, type, id) décroissants."""
+        posts = [(post.time_created, 'TICKET', post.pk)
+                 for post in Ticket.objects.all()]
+        posts += [(post.time_created, 'REVIEW', post.pk)
+                  for post in Review.objects.all()]
+        return [(content_type, pk) for _, content_type, pk
+                in sorted(posts, reverse=True)]
+
+    @override_settings(FEED_PAGE_SIZE=3)
+    def test_older_link_walks_every_post_once(self):
+        seen = []
+        url = reverse('feed')
+        while url:
+            response = self.client.get(url)
+            seen += [(post.content_type, post.pk)
+                     for post in response.context['posts']]
+            cursor = response.context['next_cursor']
+            url = None
+            if cursor:
+                self.assertContains(response, f'href="?cursor={cursor}"')
+                url = f"{reverse('feed')}?cursor={cursor}"
+        self.assertNotContains(response, 'id="feed-next"')
+        self.assertEqual(seen, self.expected_order())
+
+    @override_settings(FEED_PAGE_SIZE=5)
+    def test_fragment_pages_follow_next_cursor_header(self):
+        first = self.client.get(reverse('feed_posts'))
+        self.assertEqual(first.status_code, 200)
+        self.assertTemplateUsed(first, 'reviews/feed_posts.html')
+        self.assertTemplateNotUsed(first, 'reviews/base.html')
+        self.assertNotContains(first, '<html')
+        self.assertEqual(first.content.count(b'card-badge'), 5)
+        cursor = first['X-Next-Cursor']
+        self.assertEqual(cursor, get_feed_page(
+            self.alice, page_size=5).next_cursor)
+
+        last = self.client.get(reverse('feed_posts'), {'cursor': cursor})
+        self.assertEqual(last.status_code, 200)
+        self.assertNotIn('X-Next-Cursor', last.headers)
+        self.assertEqual(last.content.count(b'card-badge'), 3)
+        seen = [(post.content_type, post.pk)
+                for response in (first, last)
+                for post in response.context['posts']]
+        self.assertEqual(seen, self.expected_order())
+
+    def test_equal_timestamps_break_ties_by_type_then_id(self):
+        now = timezone.now()
+        Ticket.objects.update(time_created=now)
+        Review.objects.update(time_created=now)
+        seen = []
+        cursor = None
+        while True:
+            page = get_feed_page(self.alice, cursor, page_size=3)
+            seen += [(post.content_type, post.pk) for post in page.posts]
+            if not (cursor := page.next_cursor):
+                break
+        review_ids = sorted(Review.objects.values_list('pk', flat=True))
+        ticket_ids = sorted(Ticket.objects.values_list('pk', flat=True))
+        # 'TICKET' > 'REVIEW' : les tickets d'abord, par id décroissant
+        self.assertEqual(seen, [
+            *(('TICKET', pk) for pk in reversed(ticket_ids)),
+            *(('REVIEW', pk) for pk in reversed(review_ids)),
+        ])
+
+    def test_invalid_cursor_is_rejected(self):
+        def encoded(payload):
+            return base64.urlsafe_b64encode(
+                json.dumps(payload).encode()).decode().rstrip('=')
+
+        cursors = [
+            'zzz',
+            '%%%',
+            encoded(['hier', 'TICKET', 1]),
+            encoded(['2026-01-01T00:00:00+00:00', 'USER', 1]),
+            encoded(['2026-01-01T00:00:00+00:00', 'TICKET', '1']),
+            encoded({'id': 1}),
+        ]
+        for url_name in ('feed', 'feed_posts'):
+            for cursor in cursors:
+                with self.subTest(url_name=url_name, cursor=cursor):
+                    response = self.client.get(
+                        reverse(url_name), {'cursor': cursor})
+                    self.assertEqual(response.status_code, 400)
+
+
+class SearchTests(TestCase):
+    """Recherche plein texte FTS5 (reviews/search.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+
+    def setUp(self):
+        self.client.force_login(self.alice)
+
+    def found(self, query):
+        return [(post.content_type, post.pk)
+                for post in search_posts(query, self.alice).posts]
+
+    def test_index_follows_inserts_updates_and_deletes(self):
+        ticket = Ticket.objects.create(title="Dune", user=self.alice)
+        review = Review.objects.create(
+            ticket=ticket, rating=5, headline="Chef-d'œuvre",
+            body="Arrakis et ses vers des sables", user=self.alice)
+        self.assertEqual(self.found('dune'), [('TICKET', ticket.pk)])
+        self.assertEqual(self.found('arrakis'), [('REVIEW', review.pk)])
+
+        ticket.title = "Fondation"
+        ticket.save()
+        self.assertEqual(self.found('dune'), [])
+        self.assertEqual(self.found('fondation'), [('TICKET', ticket.pk)])
+
+        review.delete()
+        self.assertEqual(self.found('arrakis'), [])
+        ticket.delete()
+        self.assertEqual(self.found('fondation'), [])
+
+    def test_prefix_matches_every_term(self):
+        ticket = Ticket.objects.create(
+            title="Éléphants d'Afrique", description="Savane",
+            user=self.alice)
+        Ticket.objects.create(title="Éléments", user=self.alice)
+        self.assertEqual(self.found('elephan'), [('TICKET', ticket.pk)])
+        self.assertEqual(self.found('élé sav'), [('TICKET', ticket.pk)])
+
+    def test_title_match_ranks_first(self):
+        in_body = Ticket.objects.create(
+            title="Notes", description="Un jardin, des fleurs et un potager",
+            user=self.alice)
+        in_title = Ticket.objects.create(
+            title="Jardin", description="Des fleurs et un potager",
+            user=self.alice)
+        self.assertEqual(self.found('jardin'), [
+            ('TICKET', in_title.pk), ('TICKET', in_body.pk)])
+
+    def test_query_without_words_finds_nothing(self):
+        Ticket.objects.create(title="Dune", user=self.alice)
+        for query in ('', '   ', '"', '*', '(" OR *)', '-:^'):
+            with self.subTest(query=query):
+                self.assertEqual(self.found(query), [])
+                response = self.client.get(reverse('search_api'), {'q': query})
+                self.assertEqual(response.json()['results'], [])
+
+    def test_fts_operators_are_searched_as_words(self):
+        ticket = Ticket.objects.create(
+            title="Guerre and paix", user=self.alice)
+        self.assertEqual(self.found('AND "paix'), [('TICKET', ticket.pk)])
+        self.assertEqual(self.found('NOT'), [])
+
+
+class UsernameAutocompleteTests(TestCase):
+    """Autocomplétion des noms et formulaire d'abonnement."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alex = User.objects.create_user('alex', password='testpass123')
+        for username in ('Alice', 'alain', 'ALBERT', 'bob', 'al_x'):
+            User.objects.create_user(username)
+        User.objects.create_user('alfred', is_active=False)
+        UserFollows.objects.create(
+            user=cls.alex, followed_user=User.objects.get(username='bob'))
+
+    def setUp(self):
+        self.client.force_login(self.alex)
+
+    def complete(self, query):
+        response = self.client.get(reverse('user_autocomplete'), {'q': query})
+        return response.json()['results']
+
+    def test_prefix_is_case_insensitive(self):
+        # Ni l'utilisateur lui-même, ni les comptes inactifs
+        self.assertEqual(
+            self.complete('AL'), ['al_x', 'alain', 'ALBERT', 'Alice'])
+        self.assertEqual(self.complete(' alb '), ['ALBERT'])
+        # Pas de caractères spéciaux LIKE
+        self.assertEqual(self.complete('al%'), [])
+        self.assertEqual(self.complete('a_'), [])
+        self.assertEqual(self.complete(''), [])
+
+    @override_settings(USER_AUTOCOMPLETE_LIMIT=2)
+    def test_results_are_limited(self):
+        self.assertEqual(self.complete('a'), ['al_x', 'alain'])
+
+    def test_follow_form_looks_up_user_once(self):
+        for username, error in (
+                ('alain', None),
+                ('bob', "Vous suivez déjà bob."),
+                ('nobody', "L'utilisateur 'nobody' n'existe pas.")):
+            with self.subTest(username=username):
+                form = FollowUserForm(
+                    {'username': username}, current_user=self.alex)
+                with self.assertNumQueries(1):
+                    valid = form.is_valid()
+                if error is None:
+                    self.assertTrue(valid)
+                    self.assertEqual(form.user_to_follow.username, username)
+                else:
+                    self.assertEqual(form.errors['username'], [error])
+
+
+@override_settings(FEED_MODE='push', FEED_CACHE_ENABLED=False)
+class PushFeedTests(TestCase):
+    """Flux matérialisé (FeedEntry) maintenu par les signaux."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        cls.carol = User.objects.create_user('carol', password='testpass123')
+        cls.dave = User.objects.create_user('dave', password='testpass123')
+
+    def setUp(self):
+        UserFollows.objects.create(user=self.alice, followed_user=self.bob)
+        UserFollows.objects.create(user=self.alice, followed_user=self.carol)
+
+    def create_posts(self):
+        """Posts de tous, dont plusieurs à la même date."""
+        tie = timezone.now() - timedelta(days=1)
+        with explicit_timestamps(Ticket, Review):
+            for i, author in enumerate(
+                    (self.alice, self.bob, self.carol, self.dave) * 2):
+                ticket = Ticket.objects.create(
+                    title=f"Livre {i}", user=author,
+                    time_created=tie if i % 3 else tie - timedelta(hours=i),
+                    time_updated=tie)
+                Review.objects.create(
+                    ticket=ticket, rating=3, headline=f"Avis {i}",
+                    user=self.bob if author != self.bob else self.carol,
+                    time_created=tie, time_updated=tie)
+
+    def pages(self, user, page_size=3):
+        pages, cursor = [], None
+        while True:
+            page = get_feed_page(user, cursor, page_size)
+            pages.append([(type(post).__name__, post.pk)
+                          for post in page.posts])
+            if not (cursor := page.next_cursor):
+                return pages
+
+    def entries(self, user):
+        return set(FeedEntry.objects.filter(owner=user).values_list(
+            'author__username', 'content_type', 'post_id'))
+
+    def test_push_and_pull_pages_match(self):
+        self.create_posts()
+        for user in (self.alice, self.bob, self.dave):
+            with self.subTest(user=user.username):
+                pushed = self.pages(user)
+                with override_settings(FEED_MODE='pull'):
+                    self.assertEqual(pushed, self.pages(user))
+
+    def test_rebuild_matches_signals(self):
+        self.create_posts()
+        entries = self.entries(self.alice)
+        rebuild_feed(self.alice)
+        self.assertEqual(self.entries(self.alice), entries)
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        self.create_posts()
+        dave_posts = Ticket.objects.filter(user=self.dave).count()
+        UserFollows.objects.create(user=self.alice, followed_user=self.dave)
+        self.assertEqual(FeedEntry.objects.filter(
+            owner=self.alice, author=self.dave).count(), dave_posts)
+
+        UserFollows.objects.filter(user=self.alice).delete()
+        self.assertEqual(
+            {author for author, _, _ in self.entries(self.alice)}, {'alice'})
+
+    def test_deleted_posts_leave_every_feed(self):
+        self.create_posts()
+        review = Review.objects.filter(user=self.bob).first()
+        review.delete()
+        self.assertFalse(FeedEntry.objects.filter(
+            content_type=FeedEntry.REVIEW, post_id=review.pk).exists())
+
+        ticket = Ticket.objects.filter(
+            user=self.carol, review__isnull=False).first()
+        review_ids = list(ticket.review_set.values_list('pk', flat=True))
+        ticket.delete()
+        self.assertFalse(FeedEntry.objects.filter(
+            content_type=FeedEntry.TICKET, post_id=ticket.pk).exists())
+        # Critiques supprimées en cascade avec le ticket
+        self.assertFalse(FeedEntry.objects.filter(
+            content_type=FeedEntry.REVIEW, post_id__in=review_ids).exists())
+
+
+class SeedingTests(TestCase):
+    """Données synthétiques de `seed_litreview` (reviews/seeding.py)."""
+
+    def seed(self, prefix, seed=0):
+        call_command(
+            'seed_litreview', users=30, follows_per_user=5, tickets=60,
+            reviews=80, seed=seed, days=30, prefix=prefix, stdout=StringIO())
+
+    def seeded_rows(self, prefix):
+        """Lignes générées, sans le préfixe des noms ni les clés."""
+        users = User.objects.filter(username__startswith=prefix)
+        name = {pk: username.removeprefix(prefix)
+                for pk, username in users.values_list('pk', 'username')}
+        tickets = Ticket.objects.filter(user__in=users).order_by('pk')
+        ticket_index = {pk: index for index, pk in enumerate(
+            tickets.values_list('pk', flat=True))}
+        return {
+            'users': sorted(name.values()),
+            'follows': sorted(
+                (name[follower], name[followed])
+                for follower, followed in UserFollows.objects.filter(
+                    user__in=users).values_list('user', 'followed_user')),
+            'tickets': [
+                (name[user], title, description, time_created,
+                 review_count, rating_sum)
+                for user, title, description, time_created, review_count,
+                rating_sum in tickets.values_list(
+                    'user', 'title', 'description', 'time_created',
+                    'review_count', 'rating_sum')],
+            'reviews': [
+                (ticket_index[ticket], name[user], rating, headline, body,
+                 time_created)
+                for ticket, user, rating, headline, body, time_created
+                in Review.objects.filter(user__in=users).order_by(
+                    'pk').values_list('ticket', 'user', 'rating',
+                                      'headline', 'body', 'time_created')],
+        }
+
+    def test_same_seed_gives_same_rows_on_any_day(self):
+        self.seed('first')
+        # Un autre jour : les dates ne dépendent pas du jour courant
+        with mock.patch('django.utils.timezone.now',
+                        return_value=timezone.now() + timedelta(days=3)):
+            self.seed('second')
+        self.seed('third', seed=1)
+
+        first = self.seeded_rows('first')
+        self.assertEqual(len(first['tickets']), 60)
+        self.assertEqual(len(first['reviews']), 80)
+        self.assertEqual(first, self.seeded_rows('second'))
+        self.assertNotEqual(first, self.seeded_rows('third'))
+
+
+class TransferTests(TestCase):
+    """Export puis import JSONL (export_litreview / import_litreview)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        alice = User.objects.create_user('alice', password='testpass123')
+        bob = User.objects.create_user('bob', password='testpass123')
+        UserFollows.objects.create(user=alice, followed_user=bob)
+        for i, (author, reviewer) in enumerate(((alice, bob), (bob, alice))):
+            ticket = Ticket.objects.create(
+                title=f"Livre {i}", description="Résumé", user=author)
+            Review.objects.create(
+                ticket=ticket, rating=i + 3, headline=f"Avis {i}",
+                body="Très bien.", user=reviewer)
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = str(Path(directory.name) / 'export.jsonl.gz')
+
+    def snapshot(self):
+        return {
+            'users': sorted(User.objects.values_list(
+                'username', 'password', 'date_joined')),
+            'follows': sorted(UserFollows.objects.values_list(
+                'user__username', 'followed_user__username')),
+            'tickets': sorted(Ticket.objects.values_list(
+                'title', 'description', 'user__username', 'time_created',
+                'review_count', 'rating_sum')),
+            'reviews': sorted(Review.objects.values_list(
+                'ticket__title', 'user__username', 'rating', 'headline',
+                'body', 'time_created')),
+        }
+
+    def import_file(self):
+        call_command('import_litreview', self.path, stdout=StringIO())
+
+    def test_round_trip_into_empty_database(self):
+        expected = self.snapshot()
+        call_command('export_litreview', self.path, stdout=StringIO())
+        User.objects.all().delete()
+        self.assertFalse(Ticket.objects.exists())
+
+        self.import_file()
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_second_import_reuses_existing_users(self):
+        call_command('export_litreview', self.path, stdout=StringIO())
+        self.import_file()
+        # Utilisateurs réutilisés (abonnements inchangés), posts dupliqués
+        self.assertEqual(User.objects.count(), 2)
+        self.assertEqual(UserFollows.objects.count(), 1)
+        self.assertEqual(Ticket.objects.count(), 4)
+        self.assertEqual(Review.objects.count(), 4)
+        self.assertEqual(
+            sorted(Ticket.objects.values_list('review_count', 'rating_sum')),
+            [(1, 3), (1, 3), (1, 4), (1, 4)])
+
+
+class SnippetCacheTests(TestCase):
+    """Fragments des posts mis en cache (ticket_snippet, review_snippet)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+        cls.bob = User.objects.create_user('bob', password='testpass123')
+        UserFollows.objects.create(user=cls.alice, followed_user=cls.bob)
+        ticket = Ticket.objects.create(title="Livre", user=cls.bob)
+        Review.objects.create(
+            ticket=ticket, rating=4, headline="Avis", user=cls.bob)
+        Review.objects.create(
+            ticket=Ticket.objects.create(title="Essai", user=cls.alice),
+            rating=3, headline="Critique", user=cls.bob)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.alice)
+
+    def test_renamed_author_is_shown(self):
+        self.assertContains(self.client.get(reverse('feed')), "Par bob")
+        self.bob.username = 'robert'
+        self.bob.save()
+        response = self.client.get(reverse('feed'))
+        self.assertNotContains(response, "Par bob")
+        self.assertContains(response, "Par robert")
+
+
+class ImageProcessingTests(TestCase):
+    """Traitement des images de tickets (thumbnails.py, jobs.py)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.alice = User.objects.create_user('alice', password='testpass123')
+
+    def setUp(self):
+        cache.clear()
+        self.media_root = use_temporary_media_root(self)
+        self.client.force_login(self.alice)
+
+    def create_ticket(self, image):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('create_ticket'), {
+                'title': "Livre", 'description': '', 'image': image})
+        return Ticket.objects.get()
+
+    def run_jobs(self):
+        """Exécute les tâches en attente comme le fait `run_workers`."""
+        with self.captureOnCommitCallbacks(execute=True):
+            for job_id in claim_jobs(limit=10):
+                run_image_job(job_id)
+
+    def test_upload_is_processed_by_a_worker(self):
+        exif = Image.Exif()
+        exif[0x010F] = "Appareil"  # Make
+        exif[0x0112] = 6  # Orientation : rotation de 90°
+        ticket = self.create_ticket(
+            image_upload('photo.jpg', 'green', (1200, 800), exif))
+        self.assertEqual(ticket.thumbnails, {})
+        self.assertEqual(ImageJob.objects.get().ticket, ticket)
+
+        self.run_jobs()
+        self.assertFalse(ImageJob.objects.exists())
+        ticket.refresh_from_db()
+        with Image.open(self.media_root / ticket.image.name) as image:
+            self.assertEqual(len(image.getexif()), 0)
+            self.assertEqual(image.size, (800, 1200))
+        formats = {'jpeg', 'webp'} if features.check('webp') else {'jpeg'}
+        # Image d'origine réencodée sous un nouveau nom
+        stem = Path(ticket.image.name).stem
+        self.assertTrue(stem.startswith('photo'))
+        self.assertEqual(set(ticket.thumbnails), {'200', '400'})
+        for width, variants in ticket.thumbnails.items():
+            self.assertEqual(set(variants), formats)
+            for name in variants.values():
+                self.assertTrue(name.startswith(f'thumbs/{stem}_{width}.'))
+                with Image.open(self.media_root / name) as thumbnail:
+                    self.assertEqual(thumbnail.width, int(width))
+                    self.assertEqual(len(thumbnail.getexif()), 0)
+        self.assertContains(
+            self.client.get(reverse('feed')),
+            f'src="{ticket.thumbnail_url}"')
+
+    @override_settings(IMAGE_JOB_MAX_ATTEMPTS=2)
+    def test_failed_job_is_retried_then_kept_as_failed(self):
+        ticket = self.create_ticket(image_upload('photo.jpg', 'green'))
+        job = ImageJob.objects.get()
+        with mock.patch('reviews.jobs.process_ticket_image',
+                        side_effect=OSError("disque plein")), \
+                self.assertLogs('reviews.jobs', 'ERROR'):
+            self.assertFalse(run_image_job(claim_jobs(limit=10)[0]))
+            job.refresh_from_db()
+            self.assertEqual(
+                (job.status, job.attempts), (ImageJob.PENDING, 1))
+            self.assertIn("disque plein", job.error)
+
+            self.assertFalse(run_image_job(claim_jobs(limit=10)[0]))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (ImageJob.FAILED, 2))
+        self.assertEqual(claim_jobs(limit=10), [])
+        # L'image d'origine reste affichée
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.thumbnail_url, ticket.image.url)
+
+    def test_stale_running_job_is_requeued(self):
+        self.create_ticket(image_upload('photo.jpg', 'green'))
+        claim_jobs(limit=10)
+        ImageJob.objects.update(
+            time_updated=timezone.now() - timedelta(minutes=30))
+        self.assertEqual(requeue_stale_jobs(max_age=600), 1)
+        self.assertEqual(len(claim_jobs(limit=10)), 1)
+
+    def test_new_image_replaces_old_thumbnails(self):
+        ticket = self.create_ticket(image_upload('red.jpg', 'red'))
+        self.run_jobs()
+        ticket.refresh_from_db()
+        old_thumbnails = [
+            name for variants in ticket.thumbnails.values()
+            for name in variants.values()]
+        self.assertContains(
+            self.client.get(reverse('feed')), 'thumbs/red_200.jpg')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(reverse('edit_ticket', args=[ticket.pk]), {
+                'title': "Livre", 'description': '',
+                'image': image_upload('blue.jpg', 'blue')})
+        ticket.refresh_from_db()
+        self.assertEqual(ticket.thumbnails, {})
+        # Nouvelle image d'origine, en attendant le traitement
+        response = self.client.get(reverse('feed'))
+        self.assertContains(response, f'src="{ticket.image.url}"')
+        self.assertNotContains(response, 'thumbs/red')
+        for name in old_thumbnails:
+            self.assertFalse((self.media_root / name).exists())
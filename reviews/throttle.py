@@ -0,0 +1,107 @@
+"""
+Limitation des tentatives de connexion (seau à jetons).
+
+Chaque adresse IP et chaque nom d'utilisateur disposent d'un seau de
+jetons (LOGIN_THROTTLE_RATES : capacité, jetons regagnés par minute) ;
+derrière des mandataires inverses, l'adresse est lue dans l'en-tête
+qu'ils complètent (voir client_ip). Une tentative consomme un jeton de
+chacun de ses seaux ; si l'un est vide, elle est refusée avant
+authenticate(), donc avant le hachage du mot de passe (PBKDF2) qui fait
+le coût d'une attaque par force brute.
+Une tentative refusée ne consomme rien : un attaquant obtient au plus
+le débit de regain, quel que soit son propre débit.
+
+Chaque seau est stocké dans le cache sous la forme (jetons, horodatage).
+La lecture et l'écriture ne sont pas atomiques : des tentatives
+simultanées peuvent passer en plus de la limite, sans changer le débit
+soutenu. Avec le cache `locmem`, chaque processus a ses propres seaux.
+"""
+import hashlib
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+BUCKET_KEY = 'throttle:login:{scope}:{ident}'
+
+
+def _key(scope, ident):
+    # Empreinte : un nom quelconque donne une clé valide pour tout cache
+    digest = hashlib.sha256(ident.encode()).hexdigest()
+    return BUCKET_KEY.format(scope=scope, ident=digest)
+
+
+def client_ip(request):
+    """
+    Adresse du client : celle que le plus éloigné des mandataires de
+    confiance (TRUSTED_PROXY_COUNT) a ajoutée à CLIENT_IP_HEADER, ou
+    REMOTE_ADDR.
+    """
+    remote_addr = request.META.get('REMOTE_ADDR', '')
+    if not settings.CLIENT_IP_HEADER:
+        return remote_addr
+    header = 'HTTP_' + settings.CLIENT_IP_HEADER.upper().replace('-', '_')
+    addresses = [address.strip() for address in
+                 request.META.get(header, '').split(',') if address.strip()]
+    if not addresses:
+        return remote_addr
+    # Chaque mandataire ajoute à droite l'adresse de son interlocuteur
+    return addresses[-min(settings.TRUSTED_PROXY_COUNT, len(addresses))]
+
+
+def _buckets(request, username):
+    """{clé: (capacité, jetons regagnés par seconde)} d'une tentative."""
+    idents = {
+        'ip': client_ip(request),
+        # Sans distinction de casse : "Alice" ne contourne pas "alice"
+        'username': username.strip().lower(),
+    }
+    return {
+        _key(scope, idents[scope]): (capacity, per_minute / 60)
+        for scope, (capacity, per_minute)
+        in settings.LOGIN_THROTTLE_RATES.items()
+    }
+
+
+def _tokens(state, capacity, rate, now):
+    """Jetons d'un seau à l'instant `now` (plein s'il n'existe pas)."""
+    if state is None:
+        return capacity
+    tokens, updated = state
+    return min(capacity, tokens + (now - updated) * rate)
+
+
+def throttle_login(request, username):
+    """
+    Consomme un jeton de chaque seau d'une tentative de connexion.
+    Retourne 0 si elle est permise, sinon le délai (en secondes, arrondi
+    au-dessus) avant qu'elle le soit.
+    """
+    buckets = _buckets(request, username)
+    now = time.time()
+    states = cache.get_many(buckets)
+    tokens = {
+        key: _tokens(states.get(key), capacity, rate, now)
+        for key, (capacity, rate) in buckets.items()
+    }
+    wait = max((
+        (1 - tokens[key]) / rate
+        for key, (capacity, rate) in buckets.items() if tokens[key] < 1
+    ), default=0)
+    if wait:
+        return math.ceil(wait)
+    for key, (capacity, rate) in buckets.items():
+        # Expire une fois le seau de nouveau plein : l'absence équivaut
+        cache.set(key, (tokens[key] - 1, now),
+                  timeout=math.ceil(capacity / rate))
+    return 0
+
+
+def reset_login_throttle(username):
+    """
+    Remplit le seau d'un nom après une connexion réussie. Celui de
+    l'adresse IP est conservé : un compte valide ne doit pas permettre
+    d'essayer d'autres noms sans limite.
+    """
+    cache.delete(_key('username', username.strip().lower()))
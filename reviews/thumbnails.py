@@ -0,0 +1,178 @@
+"""
+Traitement des images de tickets : suppression des métadonnées EXIF et
+miniatures.
+
+Chaque image est déclinée en plusieurs largeurs (TICKET_THUMBNAIL_WIDTHS,
+la plus grande servant aux écrans haute densité), en WebP et en JPEG
+pour les navigateurs qui ne lisent pas le WebP. Les chemins sont stockés
+dans Ticket.thumbnails ; tant qu'ils sont absents, les templates affichent
+l'image d'origine.
+
+Ce traitement est normalement exécuté hors requête par les workers
+(voir jobs.py et la commande `run_workers`).
+"""
+import logging
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.functions import Now
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .cache import bump_feed_versions_on_commit
+from .feed import post_audience_ids
+from .models import Ticket
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_DIR = 'thumbs'
+
+# Format Pillow -> (extension, options d'encodage)
+FORMATS = {
+    'webp': ('webp', {'format': 'WEBP', 'quality': 80, 'method': 4}),
+    'jpeg': ('jpg', {'format': 'JPEG', 'quality': 82,
+                     'optimize': True, 'progressive': True}),
+}
+
+
+def _flatten(image):
+    """Convertit l'image en RGB, la transparence sur fond blanc."""
+    if image.mode == 'RGB':
+        return image
+    image = image.convert('RGBA')
+    background = Image.new('RGB', image.size, 'white')
+    background.paste(image, mask=image.getchannel('A'))
+    return background
+
+
+def _resize(image, width):
+    """Réduit l'image à la largeur donnée (sans jamais l'agrandir)."""
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def render_thumbnails(image, name, storage):
+    """
+    Enregistre les miniatures d'une image Pillow dans le stockage et
+    retourne leurs chemins : {largeur: {format: chemin}}.
+    """
+    image = _flatten(ImageOps.exif_transpose(image))
+    stem = PurePosixPath(name).stem
+    formats = [
+        fmt for fmt in FORMATS if fmt != 'webp' or features.check('webp')]
+
+    thumbnails = {}
+    for width in sorted(settings.TICKET_THUMBNAIL_WIDTHS):
+        # Inutile de produire une variante plus large que l'original
+        if thumbnails and image.width < width:
+            break
+        resized = _resize(image, width)
+        variants = {}
+        for fmt in formats:
+            extension, options = FORMATS[fmt]
+            buffer = BytesIO()
+            resized.save(buffer, **options)
+            variants[fmt] = storage.save(
+                f'{THUMBNAIL_DIR}/{stem}_{width}.{extension}',
+                ContentFile(buffer.getvalue())
+            )
+        thumbnails[str(width)] = variants
+    return thumbnails
+
+
+def delete_thumbnails(thumbnails, storage):
+    """Supprime les fichiers de miniatures du stockage."""
+    for variants in thumbnails.values():
+        for name in variants.values():
+            storage.delete(name)
+
+
+def reset_thumbnails(ticket):
+    """
+    Oublie les miniatures d'un ticket dont l'image vient de changer : les
+    pages affichent la nouvelle image d'origine jusqu'au traitement. Les
+    anciens fichiers sont supprimés après la validation de la transaction.
+    """
+    old_thumbnails = ticket.thumbnails
+    Ticket.objects.filter(pk=ticket.pk).update(
+        thumbnails={}, time_updated=Now())
+    ticket.thumbnails = {}
+    if old_thumbnails:
+        storage = ticket.image.storage
+        transaction.on_commit(
+            lambda: delete_thumbnails(old_thumbnails, storage))
+
+
+def generate_thumbnails(ticket):
+    """
+    (Re)génère les miniatures de l'image d'un ticket, ou les supprime si
+    le ticket n'a plus d'image.
+    """
+    storage = ticket.image.storage
+    old_thumbnails = ticket.thumbnails
+    thumbnails = {}
+
+    if ticket.image:
+        try:
+            with ticket.image.open('rb') as file, Image.open(file) as image:
+                thumbnails = render_thumbnails(
+                    image, ticket.image.name, storage)
+        except (OSError, UnidentifiedImageError):
+            # L'image d'origine reste affichée
+            logger.exception(
+                "Miniatures impossibles pour le ticket %s", ticket.pk)
+
+    Ticket.objects.filter(pk=ticket.pk).update(
+        thumbnails=thumbnails, time_updated=Now())
+    ticket.thumbnails = thumbnails
+    # UPDATE sans signal : les pages qui affichent le ticket changent
+    bump_feed_versions_on_commit(post_audience_ids(ticket))
+    delete_thumbnails(old_thumbnails, storage)
+    return thumbnails
+
+
+def strip_metadata(ticket):
+    """
+    Réencode l'image d'origine sans ses métadonnées EXIF (localisation,
+    appareil...), en appliquant son orientation. Sans effet si l'image
+    n'en contient pas : le traitement peut être relancé sans perte.
+    """
+    if not ticket.image:
+        return
+    storage = ticket.image.storage
+    old_name = ticket.image.name
+
+    with ticket.image.open('rb') as file, Image.open(file) as image:
+        if not image.getexif():
+            return
+        image_format = image.format
+        image = ImageOps.exif_transpose(image)
+        if image_format == 'JPEG':
+            image = _flatten(image)
+        options = {}
+        if image_format in ('JPEG', 'WEBP'):
+            options['quality'] = 90
+        if 'icc_profile' in image.info:
+            options['icc_profile'] = image.info['icc_profile']
+        buffer = BytesIO()
+        image.save(buffer, format=image_format, **options)
+
+    new_name = storage.save(old_name, ContentFile(buffer.getvalue()))
+    # Le ticket peut avoir changé d'image pendant le traitement
+    if Ticket.objects.filter(pk=ticket.pk, image=old_name).update(
+            image=new_name, time_updated=Now()):
+        ticket.image = new_name
+        storage.delete(old_name)
+    else:
+        storage.delete(new_name)
+
+
+def process_ticket_image(ticket):
+    """Traitement complet de l'image d'un ticket."""
+    if ticket.image:
+        strip_metadata(ticket)
+    return generate_thumbnails(ticket)
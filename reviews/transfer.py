@@ -0,0 +1,328 @@
+"""
+Export et import des données au format JSONL (commandes
+`export_litreview` et `import_litreview`).
+
+Une ligne par objet, au format des sérialiseurs de Django :
+{"model": "reviews.ticket", "pk": 12, "fields": {...}}, les clés
+étrangères désignant les pk d'origine. Les modèles sont écrits dans
+l'ordre de leurs dépendances (utilisateurs, abonnements, tickets,
+critiques), ce qui permet d'importer le fichier en une seule lecture.
+
+Les deux sens travaillent en flux, avec une mémoire constante :
+l'export lit la base par blocs (iterator), l'import insère par lots
+(bulk_insert) et conserve la correspondance entre anciens et nouveaux
+identifiants dans une base SQLite temporaire (IdMap), sur disque.
+
+À l'import, un utilisateur dont le nom existe déjà est réutilisé (ni
+modifié ni dupliqué). Chaque lot est validé dans sa propre transaction :
+un import interrompu laisse les lots précédents en base.
+"""
+import gzip
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from datetime import datetime
+from itertools import groupby, islice
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import reset_queries
+from django.db.models.fields.related import ForeignKey
+from django.utils._os import safe_join
+from django.utils.dateparse import parse_datetime
+
+from .bulk import bulk_insert, explicit_timestamps
+from .cache import bump_feed_versions
+from .models import ImageJob, Review, Ticket, User, UserFollows
+
+# Champs exportés, par modèle, dans l'ordre des dépendances
+EXPORTED_FIELDS = {
+    User: ('username', 'password', 'email', 'first_name', 'last_name',
+           'is_active', 'is_staff', 'is_superuser', 'date_joined',
+           'last_login'),
+    UserFollows: ('user', 'followed_user'),
+    # Les miniatures ne sont pas exportées : elles sont régénérées
+    Ticket: ('title', 'description', 'user', 'image', 'time_created',
+             'time_updated', 'review_count', 'rating_sum'),
+    Review: ('ticket', 'rating', 'headline', 'body', 'user',
+             'time_created', 'time_updated'),
+}
+
+MODELS = {model._meta.label_lower: model for model in EXPORTED_FIELDS}
+
+
+class InvalidExport(Exception):
+    """Fichier d'export illisible ou incohérent."""
+
+
+class ExportEncoder(DjangoJSONEncoder):
+    """Dates complètes : DjangoJSONEncoder les tronque à la milliseconde."""
+
+    def default(self, o):
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def open_export(path, mode):
+    """Ouvre un fichier d'export en texte, compressé si `.gz`."""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _field(model, name):
+    return model._meta.get_field(name)
+
+
+def _is_datetime(field):
+    return field.get_internal_type() == 'DateTimeField'
+
+
+# Export
+
+def export_records(model, chunk_size):
+    """Enregistrements d'un modèle, lus par blocs de `chunk_size`."""
+    names = EXPORTED_FIELDS[model]
+    columns = [_field(model, name).attname for name in names]
+    rows = model.objects.order_by('pk').values_list('pk', *columns)
+    label = model._meta.label_lower
+    for pk, *values in rows.iterator(chunk_size=chunk_size):
+        yield {'model': label, 'pk': pk, 'fields': dict(zip(names, values))}
+
+
+def copy_media_out(name, media_dir):
+    """Copie un fichier du stockage des médias vers `media_dir`."""
+    target = safe_join(media_dir, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with default_storage.open(name, 'rb') as source, \
+            open(target, 'wb') as destination:
+        shutil.copyfileobj(source, destination)
+
+
+def export_data(stream, chunk_size=2000, media_dir=None, log=print):
+    """
+    Écrit toutes les données dans `stream` (une ligne JSON par objet) ;
+    copie les images des tickets dans `media_dir` s'il est donné.
+    Retourne le nombre d'objets exportés par modèle.
+    """
+    counts = {}
+    missing = 0
+    for model in EXPORTED_FIELDS:
+        label = model._meta.label_lower
+        counts[label] = 0
+        for record in export_records(model, chunk_size):
+            stream.write(json.dumps(record, cls=ExportEncoder) + '\n')
+            counts[label] += 1
+            image = record['fields'].get('image')
+            if media_dir and image:
+                try:
+                    copy_media_out(image, media_dir)
+                except FileNotFoundError:
+                    missing += 1
+        log(f"{label} : {counts[label]} objet(s).")
+    if missing:
+        log(f"{missing} image(s) introuvable(s) non copiée(s).")
+    return counts
+
+
+# Import
+
+class IdMap:
+    """
+    Correspondance entre les pk d'origine et les pk créés, par modèle,
+    stockée dans une base SQLite temporaire plutôt qu'en mémoire.
+    """
+
+    def __init__(self, directory):
+        self.db = sqlite3.connect(os.path.join(directory, 'ids.sqlite3'))
+        self.db.execute(
+            'CREATE TABLE ids (model TEXT, old INTEGER, new INTEGER, '
+            'existing INTEGER, PRIMARY KEY (model, old)) WITHOUT ROWID')
+        self.db.execute(
+            'CREATE TABLE media (old TEXT PRIMARY KEY, new TEXT)')
+
+    def add(self, model, pairs, existing=False):
+        """Enregistre des couples (ancien pk, nouveau pk)."""
+        with self.db:
+            self.db.executemany(
+                'INSERT INTO ids VALUES (?, ?, ?, ?)',
+                ((model._meta.label_lower, old, new, existing)
+                 for old, new in pairs))
+
+    def get(self, model, old):
+        """Nouveau pk d'un objet importé."""
+        row = self.db.execute(
+            'SELECT new FROM ids WHERE model = ? AND old = ?',
+            (model._meta.label_lower, old)).fetchone()
+        if row is None:
+            raise InvalidExport(
+                f"{model._meta.label_lower} {old} référencé avant "
+                "d'avoir été importé.")
+        return row[0]
+
+    def get_media(self, old):
+        """Nom dans le stockage d'un fichier déjà copié, ou None."""
+        row = self.db.execute(
+            'SELECT new FROM media WHERE old = ?', (old,)).fetchone()
+        return row and row[0]
+
+    def add_media(self, old, new):
+        with self.db:
+            self.db.execute('INSERT INTO media VALUES (?, ?)', (old, new))
+
+    def existing(self, model):
+        """Nouveaux pk des objets qui existaient déjà en base."""
+        rows = self.db.execute(
+            'SELECT new FROM ids WHERE model = ? AND existing',
+            (model._meta.label_lower,))
+        for row in rows:
+            yield row[0]
+
+    def close(self):
+        self.db.close()
+
+
+def read_records(stream):
+    """Enregistrements d'un fichier d'export, vérifiés ligne par ligne."""
+    for number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            model = MODELS[record['model']]
+            fields = record['fields']
+            valid = 'pk' in record and isinstance(fields, dict) and \
+                set(fields) <= set(EXPORTED_FIELDS[model])
+        except (ValueError, KeyError, TypeError):
+            valid = False
+        if not valid:
+            raise InvalidExport(f"Ligne {number} invalide.")
+        yield model, record
+
+
+class Importer:
+    """
+    Importe un fichier d'export en flux : `Importer(...).run(stream)`.
+    Les images sont copiées depuis `media_dir` s'il est donné, sinon
+    les chemins sont conservés tels quels.
+    """
+
+    def __init__(self, batch_size=5000, media_dir=None, log=print):
+        self.batch_size = batch_size
+        self.media_dir = media_dir
+        self.log = log
+        self.ids = None
+        self.missing_media = 0
+        self.image_jobs = 0
+
+    def run(self, stream):
+        counts = {}
+        with tempfile.TemporaryDirectory() as directory, \
+                explicit_timestamps(Ticket, Review):
+            self.ids = IdMap(directory)
+            try:
+                for model, records in groupby(
+                        read_records(stream), key=lambda item: item[0]):
+                    records = (record for _, record in records)
+                    label = model._meta.label_lower
+                    imported = self.import_model(model, records)
+                    counts[label] = counts.get(label, 0) + imported
+                    self.log(f"{label} : {imported} objet(s).")
+                self.invalidate_feeds()
+            finally:
+                self.ids.close()
+        if self.missing_media:
+            self.log(f"{self.missing_media} image(s) introuvable(s) : "
+                     "tickets importés sans image.")
+        return counts
+
+    def import_model(self, model, records):
+        if model is User:
+            return self.import_users(records)
+        options = {}
+        if model is UserFollows:
+            # Les deux utilisateurs existaient peut-être déjà
+            options['ignore_conflicts'] = True
+        return bulk_insert(
+            model, (self.build(model, record) for record in records),
+            self.batch_size, self.batch_imported, **options)
+
+    def build(self, model, record):
+        """Instance non enregistrée, clés étrangères traduites."""
+        values = {}
+        for name, value in record['fields'].items():
+            field = _field(model, name)
+            if isinstance(field, ForeignKey):
+                value = self.ids.get(field.related_model, value)
+            elif value is not None and _is_datetime(field):
+                value = parse_datetime(value)
+            values[field.attname] = value
+        if model is Ticket and values.get('image'):
+            values['image'] = self.copy_media_in(values['image'])
+        instance = model(**values)
+        instance._import_pk = record['pk']
+        return instance
+
+    def import_users(self, records):
+        count = 0
+        while batch := list(islice(records, self.batch_size)):
+            users = [self.build(User, record) for record in batch]
+            existing = dict(User.objects.filter(
+                username__in=[user.username for user in users]
+            ).values_list('username', 'pk'))
+            self.ids.add(User, (
+                (user._import_pk, existing[user.username])
+                for user in users if user.username in existing
+            ), existing=True)
+            bulk_insert(
+                User, (user for user in users
+                       if user.username not in existing),
+                self.batch_size, self.batch_imported)
+            count += len(batch)
+        return count
+
+    def batch_imported(self, batch):
+        model = type(batch[0])
+        if model in (User, Ticket):
+            self.ids.add(model, (
+                (instance._import_pk, instance.pk) for instance in batch))
+        if model is Ticket:
+            # Miniatures à régénérer par `run_workers`
+            jobs = ImageJob.objects.bulk_create(
+                ImageJob(ticket=ticket) for ticket in batch if ticket.image)
+            self.image_jobs += len(jobs)
+        # Avec DEBUG, le journal des requêtes garderait chaque lot en
+        # mémoire
+        reset_queries()
+
+    def copy_media_in(self, name):
+        """Copie une image de `media_dir` dans le stockage des médias."""
+        if not self.media_dir:
+            return name
+        # Une même image peut illustrer plusieurs tickets
+        copied = self.ids.get_media(name)
+        if copied:
+            return copied
+        try:
+            with open(safe_join(self.media_dir, name), 'rb') as source:
+                copied = default_storage.save(name, File(source))
+        except FileNotFoundError:
+            self.missing_media += 1
+            return None
+        self.ids.add_media(name, copied)
+        return copied
+
+    def invalidate_feeds(self):
+        """
+        Invalide le flux en cache des utilisateurs qui existaient déjà,
+        et de leurs abonnés, dont les pages peuvent avoir changé.
+        """
+        existing = self.ids.existing(User)
+        while user_ids := list(islice(existing, self.batch_size)):
+            followers = UserFollows.objects.filter(
+                followed_user__in=user_ids).values_list('user', flat=True)
+            bump_feed_versions([*user_ids, *followers])
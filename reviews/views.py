@@ -1,6 +1,10 @@
+import json
+
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth import login, logout, authenticate
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_http_methods
 from django.contrib import messages
 from django.contrib.auth import get_user_model
 from .forms import (SignUpForm,
@@ -10,10 +14,21 @@ from .forms import (SignUpForm,
                     TicketReviewForm,
                     FollowUserForm
                     )
-from django.http import HttpResponseForbidden
+from django.http import (HttpResponseForbidden,
+                         HttpResponseBadRequest,
+                         JsonResponse
+                         )
+from django.db import IntegrityError, transaction
 from .models import Ticket, Review, UserFollows
-from itertools import chain
-from django.db.models import CharField, Value, Exists, OuterRef
+from .conditional import conditional_page
+from .feed import get_feed_page, InvalidCursor
+from .follows import follow_users, unfollow_users
+from .loaders import load_user_posts
+from .jobs import enqueue_image_processing
+from .search import autocomplete_usernames, search_posts
+from .suggestions import get_suggestions
+from .throttle import reset_login_throttle, throttle_login
+from .thumbnails import reset_thumbnails
 
 User = get_user_model()
 
@@ -60,6 +75,17 @@ def login_view(request):
         return redirect('feed')
 
     if request.method == 'POST':
+        # Avant toute validation : authenticate() hache le mot de passe
+        retry_after = throttle_login(
+            request, request.POST.get('username', ''))
+        if retry_after:
+            form = LoginForm(
+                initial={'username': request.POST.get('username', '')})
+            response = render(request, 'reviews/home.html', {
+                'form': form, 'retry_after': retry_after}, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
+
         form = LoginForm(request.POST)
         if form.is_valid():
             username = form.cleaned_data['username']
@@ -68,6 +94,7 @@ def login_view(request):
                 request, username=username, password=password)
 
             if user is not None:
+                reset_login_throttle(username)
                 login(request, user)
                 return redirect('feed')
             else:
@@ -92,43 +119,99 @@ def logout_view(request):
 
 
 @login_required
+@conditional_page
 def feed_view(request):
-    """Vue pour afficher le flux de l'utilisateur."""
-    # Récupérer les utilisateurs suivis + soi-même
-    followed_users = list(
-        UserFollows.objects.filter(user=request.user)
-        .values_list('followed_user', flat=True)
-    )
-    followed_users.append(request.user.id)
-
-    # Récupérer les tickets
-    tickets = Ticket.objects.filter(
-        user__in=followed_users
-    ).annotate(
-        content_type=Value('TICKET', CharField()),
-        already_reviewed=Exists(
-            Review.objects.filter(
-                ticket=OuterRef('pk'),
-                user=request.user
-            )
-        )
-    )
-
-    # Récupérer les reviews
-    reviews = Review.objects.filter(
-        user__in=followed_users
-    ).annotate(
-        content_type=Value('REVIEW', CharField())
-    )
-
-    # Combiner et trier les deux types de posts
-    posts = sorted(
-        chain(reviews, tickets),
-        key=lambda post: post.time_created,
-        reverse=True
-    )
-
-    return render(request, 'reviews/feed.html', context={'posts': posts})
+    """Vue pour afficher le flux de l'utilisateur, page par page."""
+    try:
+        page = get_feed_page(request.user, request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Curseur de pagination invalide.")
+
+    return render(request, 'reviews/feed.html', context={
+        'posts': page.posts,
+        'next_cursor': page.next_cursor,
+    })
+
+
+@login_required
+@conditional_page
+def feed_posts_view(request):
+    """
+    Fragment HTML des publications d'une page du flux, pour le défilement
+    infini. Le curseur de la page suivante est transmis dans l'en-tête
+    X-Next-Cursor (absent sur la dernière page).
+    """
+    try:
+        page = get_feed_page(request.user, request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Curseur de pagination invalide.")
+
+    response = render(request, 'reviews/feed_posts.html', context={
+        'posts': page.posts,
+    })
+    if page.next_cursor:
+        response['X-Next-Cursor'] = page.next_cursor
+    return response
+
+
+def _search_page(request):
+    """Lit les paramètres de recherche et retourne (requête, page)."""
+    query = request.GET.get('q', '').strip()
+    try:
+        number = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        number = 1
+    return query, search_posts(query, request.user, number,
+                               settings.SEARCH_PAGE_SIZE)
+
+
+@login_required
+def search_view(request):
+    """
+    Vue pour rechercher des tickets et des critiques.
+    """
+    query, page = _search_page(request)
+    return render(request, 'reviews/search.html',
+                  {'query': query, 'page': page})
+
+
+@login_required
+def search_api_view(request):
+    """
+    Recherche au format JSON.
+    """
+    query, page = _search_page(request)
+    results = []
+    for post in page.posts:
+        if post.content_type == 'TICKET':
+            title = post.title
+        else:
+            title = post.headline
+        results.append({
+            'type': post.content_type.lower(),
+            'id': post.id,
+            'title': title,
+            'author': post.user.username,
+            'time_created': post.time_created.isoformat(),
+        })
+    return JsonResponse({
+        'query': query,
+        'page': page.number,
+        'has_next': page.has_next,
+        'results': results,
+    })
+
+
+@login_required
+def user_autocomplete_view(request):
+    """
+    Noms d'utilisateurs commençant par le texte saisi (paramètre q), pour
+    l'autocomplétion du formulaire d'abonnement.
+    """
+    usernames = autocomplete_usernames(
+        request.GET.get('q', ''), request.user,
+        settings.USER_AUTOCOMPLETE_LIMIT)
+    return JsonResponse({'results': usernames})
 
 
 @login_required
@@ -142,6 +225,8 @@ def create_ticket_view(request):
             ticket = form.save(commit=False)
             ticket.user = request.user
             ticket.save()
+            if ticket.image:
+                enqueue_image_processing(ticket)
             messages.success(request, "Votre ticket a été créé avec succès !")
             return redirect('feed')
         else:
@@ -159,17 +244,23 @@ def create_review_view(request, ticket_id):
     """
     ticket = get_object_or_404(Ticket, id=ticket_id)
 
-    # Vérifier si l'utilisateur a déjà répondu à ce ticket
-    if Review.objects.filter(ticket=ticket, user=request.user).exists():
-        return redirect('feed')
-
     if request.method == 'POST':
         form = ReviewForm(request.POST)
         if form.is_valid():
             review = form.save(commit=False)
             review.user = request.user
             review.ticket = ticket
-            review.save()
+            try:
+                with transaction.atomic():
+                    review.save()
+            except IntegrityError:
+                # La contrainte unique (ticket, user) garantit une seule
+                # critique par utilisateur, même en cas de double envoi
+                messages.error(request,
+                               "Vous avez déjà publié une critique "
+                               "pour ce ticket."
+                               )
+                return redirect('feed')
             messages.success(request,
                              "Votre critique a été publiée avec succès !"
                              )
@@ -178,6 +269,8 @@ def create_review_view(request, ticket_id):
             messages.error(request,
                            "Erreur lors de la création de la critique."
                            )
+    elif ticket.user_has_reviewed(request.user):
+        return redirect('feed')
     else:
         form = ReviewForm()
 
@@ -204,7 +297,14 @@ def edit_ticket_view(request, ticket_id):
                           instance=ticket
                           )
         if form.is_valid():
-            form.save()
+            image_changed = 'image' in form.changed_data
+            with transaction.atomic():
+                form.save()
+                if image_changed:
+                    # Miniatures de l'ancienne image : plus affichées
+                    reset_thumbnails(ticket)
+            if image_changed:
+                enqueue_image_processing(ticket)
             messages.success(request,
                              "Votre ticket a été modifié avec succès !"
                              )
@@ -252,22 +352,25 @@ def create_ticket_review_view(request):
     if request.method == 'POST':
         form = TicketReviewForm(request.POST, request.FILES)
         if form.is_valid():
-            # Créer le ticket dans la base
-            ticket = Ticket.objects.create(
-                title=form.cleaned_data['ticket_title'],
-                description=form.cleaned_data['ticket_description'],
-                image=form.cleaned_data['ticket_image'],
-                user=request.user
-            )
-
-            # Créer la review associée
-            Review.objects.create(
-                ticket=ticket,
-                rating=form.cleaned_data['rating'],
-                headline=form.cleaned_data['headline'],
-                body=form.cleaned_data['body'],
-                user=request.user
-            )
+            with transaction.atomic():
+                # Créer le ticket dans la base
+                ticket = Ticket.objects.create(
+                    title=form.cleaned_data['ticket_title'],
+                    description=form.cleaned_data['ticket_description'],
+                    image=form.cleaned_data['ticket_image'],
+                    user=request.user
+                )
+
+                # Créer la review associée
+                Review.objects.create(
+                    ticket=ticket,
+                    rating=form.cleaned_data['rating'],
+                    headline=form.cleaned_data['headline'],
+                    body=form.cleaned_data['body'],
+                    user=request.user
+                )
+            if ticket.image:
+                enqueue_image_processing(ticket)
 
             messages.success(request,
                              "Votre critique a été créée avec succès !")
@@ -335,35 +438,19 @@ def delete_review_view(request, review_id):
 
 
 @login_required
+@conditional_page
 def posts_view(request):
     """
     Vue pour afficher les tickets de l'utilisateur
     + leurs critiques séparées.
     """
-
-    user_tickets = Ticket.objects.filter(user=request.user)
-
-    data = []
-
-    for ticket in user_tickets:
-        my_review = Review.objects.filter(
-            ticket=ticket, user=request.user).first()
-        other_reviews = Review.objects.filter(
-            ticket=ticket).exclude(user=request.user)
-
-        data.append({
-            'ticket': ticket,
-            'my_review': my_review,
-            'other_reviews': other_reviews,
-        })
-
-    # Trier les tickets par date
-    data.sort(key=lambda item: item["ticket"].time_created, reverse=True)
+    data = load_user_posts(request.user)
 
     return render(request, 'reviews/posts.html', {'data': data})
 
 
 @login_required
+@conditional_page
 def subscriptions_view(request):
     """
     Vue pour gérer les abonnements.
@@ -372,12 +459,13 @@ def subscriptions_view(request):
     if request.method == 'POST':
         form = FollowUserForm(request.POST, current_user=request.user)
         if form.is_valid():
-            username = form.cleaned_data['username']
-            user_to_follow = User.objects.get(username=username)
+            user_to_follow = form.user_to_follow
             # On cree une nouvlle ligne
             UserFollows.objects.create(user=request.user,
                                        followed_user=user_to_follow)
-            messages.success(request, f"Vous suivez maintenant {username}.")
+            messages.success(
+                request,
+                f"Vous suivez maintenant {user_to_follow.username}.")
             return redirect('subscriptions')
     else:
         form = FollowUserForm(current_user=request.user)
@@ -390,15 +478,55 @@ def subscriptions_view(request):
     followers = UserFollows.objects.filter(
         followed_user=request.user).select_related('user')
 
+    # Suggestions précalculées par `compute_suggestions`
+    suggestions = get_suggestions(request.user)[
+        :settings.FOLLOW_SUGGESTIONS_COUNT]
+
     context = {
         'form': form,
         'following': following,
-        'followers': followers
+        'followers': followers,
+        'suggestions': suggestions,
     }
 
     return render(request, 'reviews/subscriptions.html', context)
 
 
+@login_required
+@require_http_methods(['POST', 'DELETE'])
+def bulk_follow_view(request):
+    """
+    Abonnements (POST) ou désabonnements (DELETE) en masse. Corps JSON :
+    {"usernames": [...]} ; la réponse classe chaque nom.
+    """
+    try:
+        usernames = json.loads(request.body)['usernames']
+    except (ValueError, KeyError, TypeError):
+        usernames = None
+    if not isinstance(usernames, list) or not all(
+            isinstance(username, str) for username in usernames):
+        return JsonResponse(
+            {'error': "Corps attendu : {\"usernames\": [...]}."}, status=400)
+    if len(usernames) > settings.BULK_FOLLOW_MAX_USERNAMES:
+        return JsonResponse(
+            {'error': f"{settings.BULK_FOLLOW_MAX_USERNAMES} noms au plus."},
+            status=400)
+
+    if request.method == 'POST':
+        result = follow_users(request.user, usernames)
+        return JsonResponse({
+            'followed': result.changed,
+            'already_followed': result.unchanged,
+            'unknown': result.unknown,
+        })
+    result = unfollow_users(request.user, usernames)
+    return JsonResponse({
+        'unfollowed': result.changed,
+        'not_followed': result.unchanged,
+        'unknown': result.unknown,
+    })
+
+
 @login_required
 def unfollow_user_view(request, user_id):
     """